@@ -1,13 +1,33 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, redirect
 from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
 import pandas as pd
 import os
 import time
 import threading
 import json
-from datetime import datetime, timedelta
+import hashlib
+import hmac
+import base64
+import functools
+import queue
+import uuid
+import random
+import atexit
+import logging
+import logging.handlers
+import contextvars
+import multiprocessing
+import sqlite3
+import socket
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 import pytz
-from notion_client import Client as NotionClient
 import requests
 import openai
 from reportlab.lib.pagesizes import A4
@@ -19,12 +39,601 @@ from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
     HRFlowable, PageBreak
 )
-from reportlab.graphics.shapes import Drawing, Rect
+from reportlab.graphics.shapes import Drawing, Rect, PolyLine, Circle, String
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
 from reportlab.graphics import renderPDF
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
 import io
 
 app = Flask(__name__)
 
+# =========================
+# LOGGING
+# =========================
+# JSON lines written off the calling thread: records go onto a bounded queue and
+# a QueueListener writes them to stdout, so a slow stdout never blocks a request.
+# Each request gets a correlation id that follows its work into dispatcher,
+# job and timer threads (see with_current_context). Founder financials passed
+# as structured fields are redacted, and noisy per-item debug lines are sampled.
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = 10000
+DEBUG_LOG_SAMPLE_RATE = float(os.environ.get("DEBUG_LOG_SAMPLE_RATE", 0.1))
+REDACTED_LOG_FIELDS = frozenset([
+    "mrr", "previous_mrr", "runway", "headcount",
+    "biggest_win", "biggest_blocker", "help_needed"
+])
+
+correlation_id = contextvars.ContextVar("correlation_id", default="-")
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return {k: "[redacted]" if k in REDACTED_LOG_FIELDS else redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    return value
+
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+            "correlation_id": getattr(record, "correlation_id", "-")
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry["fields"] = redact(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Stamp the correlation id on the calling thread and drop unsampled debug lines."""
+
+    def filter(self, record):
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None and random.random() >= sample_rate:
+            return False
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def _configure_logging():
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonLogFormatter())
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    configured = logging.getLogger("unicornfactory")
+    configured.setLevel(LOG_LEVEL)
+    configured.handlers = [queue_handler]
+    configured.propagate = False
+    listener.start()
+    atexit.register(listener.stop)
+    return configured
+
+
+logger = _configure_logging()
+
+
+def log_sampled(message, rate=DEBUG_LOG_SAMPLE_RATE, **fields):
+    logger.debug(message, extra={"sample_rate": rate, "fields": fields or None})
+
+
+def with_current_context(func):
+    """Bind func to the caller's contextvars so worker threads keep the correlation id."""
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+@app.before_request
+def assign_correlation_id():
+    correlation_id.set(request.headers.get("X-Request-Id") or uuid.uuid4().hex[:12])
+
+
+# =========================
+# METRICS
+# =========================
+# In-process Prometheus metrics. Every outbound call to Slack, Notion and OpenAI
+# goes through track_call, which records a latency histogram and counts
+# outcomes (ok / error / rate_limited). Queue depths are read at scrape time
+# from the gauges registered with register_gauge.
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+_metrics_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_gauges = {}
+_metric_help = {}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def observe(name, value, help_text="", **labels):
+    key = (name, _label_key(labels))
+    with _metrics_lock:
+        _metric_help.setdefault(name, ("histogram", help_text))
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                hist["buckets"][i] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+
+def increment(name, amount=1, help_text="", **labels):
+    key = (name, _label_key(labels))
+    with _metrics_lock:
+        _metric_help.setdefault(name, ("counter", help_text))
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def register_gauge(name, help_text, func):
+    """Register a callable returning {labels_tuple: value} (or a number) read at scrape time."""
+    with _metrics_lock:
+        _metric_help[name] = ("gauge", help_text)
+        _gauges[name] = func
+
+
+def _is_rate_limited(error):
+    if isinstance(error, SlackApiError):
+        return error.response.status_code == 429
+    if isinstance(error, openai.RateLimitError):
+        return True
+    return getattr(getattr(error, "response", None), "status_code", None) == 429
+
+
+@contextmanager
+def track_call(integration, operation):
+    """Time an outbound call. Callers may set call["status"] to the HTTP status they got back."""
+    call = {"status": None}
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield call
+    except Exception as e:
+        outcome = "rate_limited" if _is_rate_limited(e) else "error"
+        raise
+    finally:
+        if outcome == "ok" and call["status"] is not None:
+            if call["status"] == 429:
+                outcome = "rate_limited"
+            elif call["status"] >= 400:
+                outcome = "error"
+        observe("outbound_request_duration_seconds", time.perf_counter() - started,
+                "Latency of outbound API calls.", integration=integration, operation=operation)
+        increment("outbound_requests_total", 1, "Outbound API calls by outcome.",
+                  integration=integration, operation=operation, outcome=outcome)
+
+
+class InstrumentedWebClient(WebClient):
+    """WebClient that records every Slack Web API call, including the steps of files_upload_v2."""
+
+    def api_call(self, api_method, *args, **kwargs):
+        with track_call("slack", api_method):
+            return super().api_call(api_method, *args, **kwargs)
+
+    def files_upload_v2(self, *args, **kwargs):
+        with track_call("slack", "files_upload_v2"):
+            return super().files_upload_v2(*args, **kwargs)
+
+
+class CountingRateLimitRetryHandler(RateLimitErrorRetryHandler):
+    def prepare_for_next_attempt(self, *args, **kwargs):
+        increment("outbound_retries_total", 1, "Outbound API calls retried after a 429.", integration="slack")
+        return super().prepare_for_next_attempt(*args, **kwargs)
+
+
+def render_metrics():
+    lines = []
+    with _metrics_lock:
+        histograms = {k: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]} for k, v in _histograms.items()}
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        metric_help = dict(_metric_help)
+
+    def fmt_labels(labels):
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{k}="{str(v)}"' for k, v in labels) + "}"
+
+    for name in sorted(metric_help):
+        kind, help_text = metric_help[name]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            for (metric, labels), hist in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(LATENCY_BUCKETS, hist["buckets"]):
+                    lines.append(f"{name}_bucket{fmt_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_bucket{fmt_labels(labels + (('le', '+Inf'),))} {hist['count']}")
+                lines.append(f"{name}_sum{fmt_labels(labels)} {hist['sum']:.6f}")
+                lines.append(f"{name}_count{fmt_labels(labels)} {hist['count']}")
+        elif kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{fmt_labels(labels)} {value}")
+        elif name in gauges:
+            try:
+                values = gauges[name]()
+            except Exception as e:
+                logger.error(f"Gauge {name} failed: {e}")
+                continue
+            if not isinstance(values, dict):
+                values = {(): values}
+            for labels, value in sorted(values.items()):
+                lines.append(f"{name}{fmt_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+# =========================
+# SHARED STATE
+# =========================
+# State that must agree across gunicorn workers and nodes lives behind a small
+# key/value backend: the admin session, the data source id, dedup keys, locks,
+# job slots and cron claims. STATE_BACKEND_URL picks the backend:
+#   sqlite:///app_state.db  – default; shared by the workers of one host
+#   redis://host:6379/0     – shared across hosts (needs the `redis` package)
+# Both give the same guarantees: TTLs, atomic add (set-if-absent) and
+# compare-and-delete/expire, which is all the locks and claims below rely on, plus
+# durable FIFO queues (push / peek / remove) for work that must survive a restart.
+# Values are JSON; sets and datetimes round-trip.
+
+STATE_BACKEND_URL = os.environ.get("STATE_BACKEND_URL", "sqlite:///app_state.db")
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+STATE_LOCK_POLL_SECONDS = 0.05
+CRON_CLAIM_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _encode_state(value):
+    def default(obj):
+        if isinstance(obj, (set, frozenset)):
+            return {"__set__": sorted(obj)}
+        if isinstance(obj, datetime):
+            return {"__datetime__": obj.isoformat()}
+        raise TypeError(f"{type(obj).__name__} can't be stored in shared state")
+    return json.dumps(value, default=default, ensure_ascii=False)
+
+
+def _decode_state(raw):
+    def hook(obj):
+        if "__set__" in obj:
+            return set(obj["__set__"])
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        return obj
+    return None if raw is None else json.loads(raw, object_hook=hook)
+
+
+class SQLiteStateBackend:
+    """Shared state in one SQLite file; every worker on the host opens the same file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS queue (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, value TEXT NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS queue_name ON queue (name, id)")
+
+    def _conn(self):
+        # One connection per thread; WAL lets readers run alongside a writer.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return _decode_state(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        self._conn().execute("INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)", (key, _encode_state(value), expires_at))
+
+    def add(self, key, value, ttl=None):
+        """Set the key only if it is missing or expired; True if this call set it."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM state WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?", (key, now))
+            added = conn.execute(
+                "INSERT OR IGNORE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, _encode_state(value), now + ttl if ttl else None)
+            ).rowcount == 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def delete(self, key, expected=None):
+        """Delete the key; with `expected`, only if it still holds that value."""
+        if expected is None:
+            return self._conn().execute("DELETE FROM state WHERE key = ?", (key,)).rowcount == 1
+        return self._conn().execute("DELETE FROM state WHERE key = ? AND value = ?", (key, _encode_state(expected))).rowcount == 1
+
+    def expire(self, key, ttl, expected):
+        """Push the key's expiry `ttl` seconds out if it still holds `expected`; True if it did."""
+        now = time.time()
+        return self._conn().execute(
+            "UPDATE state SET expires_at = ? WHERE key = ? AND value = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (now + ttl, key, _encode_state(expected), now)
+        ).rowcount == 1
+
+    def incr(self, key, amount=1):
+        row = self._conn().execute(
+            "INSERT INTO state (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + ? RETURNING value",
+            (key, str(amount), amount)
+        ).fetchone()
+        return int(row[0])
+
+    def push(self, name, value):
+        self._conn().execute("INSERT INTO queue (name, value) VALUES (?, ?)", (name, _encode_state(value)))
+
+    def peek(self, name, count):
+        """Oldest `count` items as (item_id, value); they stay queued until removed."""
+        rows = self._conn().execute("SELECT id, value FROM queue WHERE name = ? ORDER BY id LIMIT ?", (name, count)).fetchall()
+        return [(item_id, _decode_state(value)) for item_id, value in rows]
+
+    def remove(self, name, item_ids):
+        item_ids = list(item_ids)
+        if item_ids:
+            self._conn().execute(f"DELETE FROM queue WHERE name = ? AND id IN ({', '.join('?' * len(item_ids))})", (name, *item_ids))
+
+    def size(self, name):
+        return self._conn().execute("SELECT COUNT(*) FROM queue WHERE name = ?", (name,)).fetchone()[0]
+
+
+class RedisStateBackend:
+    """Shared state in Redis, for workers spread over several hosts."""
+
+    _DELETE_IF_EQUAL = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+    _EXPIRE_IF_EQUAL = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("STATE_BACKEND_URL points at Redis but the `redis` package is not installed.") from e
+        self.client = redis.Redis.from_url(url)
+        self._delete_if_equal = self.client.register_script(self._DELETE_IF_EQUAL)
+        self._expire_if_equal = self.client.register_script(self._EXPIRE_IF_EQUAL)
+
+    def get(self, key):
+        raw = self.client.get(key)
+        return _decode_state(raw.decode("utf-8") if raw is not None else None)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, _encode_state(value), px=int(ttl * 1000) if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        return bool(self.client.set(key, _encode_state(value), nx=True, px=int(ttl * 1000) if ttl else None))
+
+    def delete(self, key, expected=None):
+        if expected is None:
+            return self.client.delete(key) == 1
+        return self._delete_if_equal(keys=[key], args=[_encode_state(expected)]) == 1
+
+    def expire(self, key, ttl, expected):
+        return self._expire_if_equal(keys=[key], args=[_encode_state(expected), int(ttl * 1000)]) == 1
+
+    def incr(self, key, amount=1):
+        return int(self.client.incrby(key, amount))
+
+    # Queues are Redis streams: ids are ordered and entries stay until deleted.
+    def push(self, name, value):
+        self.client.xadd(f"queue:{name}", {"value": _encode_state(value)})
+
+    def peek(self, name, count):
+        return [(item_id, _decode_state(fields[b"value"].decode("utf-8"))) for item_id, fields in self.client.xrange(f"queue:{name}", count=count)]
+
+    def remove(self, name, item_ids):
+        item_ids = list(item_ids)
+        if item_ids:
+            self.client.xdel(f"queue:{name}", *item_ids)
+
+    def size(self, name):
+        return self.client.xlen(f"queue:{name}")
+
+
+def open_state_backend(url):
+    if url.startswith("sqlite:///"):
+        return SQLiteStateBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStateBackend(url)
+    raise ValueError(f"Unsupported STATE_BACKEND_URL: {url}")
+
+
+state = open_state_backend(STATE_BACKEND_URL)
+
+
+def acquire_lease(name, ttl, owner=None):
+    """Take a named lease for `ttl` seconds; returns the token to release it with, or None if held."""
+    token = {"worker": WORKER_ID, "id": uuid.uuid4().hex, **(owner or {})}
+    return token if state.add(f"lease:{name}", token, ttl) else None
+
+
+def renew_lease(name, token, ttl):
+    """Extend a lease we still hold; False if it already expired (and may belong to someone else now)."""
+    return bool(token) and state.expire(f"lease:{name}", ttl, expected=token)
+
+
+def release_lease(name, token):
+    if token:
+        state.delete(f"lease:{name}", expected=token)
+
+
+@contextmanager
+def shared_lock(name, ttl=30, timeout=10):
+    """Block until the lease is free (or `timeout` passes), hold it for the body, then release."""
+    deadline = time.monotonic() + timeout
+    token = acquire_lease(name, ttl)
+    while token is None:
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Timed out waiting for shared lock {name}")
+        time.sleep(STATE_LOCK_POLL_SECONDS)
+        token = acquire_lease(name, ttl)
+    try:
+        yield
+    finally:
+        release_lease(name, token)
+
+
+def claim_once(name, ttl):
+    """True for exactly one worker per name — how crons and timers avoid firing once per worker."""
+    return state.add(f"claim:{name}", WORKER_ID, ttl)
+
+
+class SharedSession(MutableMapping):
+    """Dict-like admin session stored in the state backend, so every worker sees the same Home tab.
+
+    Keys in `local_keys` hold process objects (timers) and stay in this worker."""
+
+    def __init__(self, defaults, local_keys=()):
+        self._defaults = dict(defaults)
+        self._local_keys = set(local_keys)
+        self._local = {k: self._defaults[k] for k in self._local_keys}
+
+    def __getitem__(self, key):
+        if key in self._local_keys:
+            return self._local[key]
+        if key not in self._defaults:
+            raise KeyError(key)
+        value = state.get(f"session:{key}")
+        return self._defaults[key] if value is None else value["value"]
+
+    def __setitem__(self, key, value):
+        if key in self._local_keys:
+            self._local[key] = value
+            return
+        self._defaults.setdefault(key, None)
+        state.set(f"session:{key}", {"value": value})
+
+    def __delitem__(self, key):
+        if key in self._local_keys:
+            self._local[key] = self._defaults[key]
+        else:
+            state.delete(f"session:{key}")
+
+    def __iter__(self):
+        return iter(self._defaults)
+
+    def __len__(self):
+        return len(self._defaults)
+
+# =========================
+# LAZY RESOURCES
+# =========================
+# API clients and looked-up ids are built on first use, not at import (which
+# also keeps report worker processes cheap to spawn). LazyResource is
+# single-flight:
+# - one caller builds the value while concurrent callers wait for it, so a cold
+#   start costs exactly one call;
+# - a failure is remembered for `failure_cooldown` seconds, and callers in that
+#   window fail fast instead of retrying;
+# - with `ttl`, the value is refreshed after that long; if the refresh fails,
+#   the last good value keeps being served until the next attempt.
+
+LAZY_FAILURE_COOLDOWN_SECONDS = 30
+
+
+class LazyResource:
+    def __init__(self, name, factory, ttl=None, failure_cooldown=LAZY_FAILURE_COOLDOWN_SECONDS):
+        self.name = name
+        self.factory = factory
+        self.ttl = ttl
+        self.failure_cooldown = failure_cooldown
+        self._lock = threading.Lock()
+        self._value = None
+        self._has_value = False
+        self._expires_at = None
+        self._error = None
+        self._retry_at = 0.0
+
+    def _fresh(self, now):
+        return self._has_value and (self._expires_at is None or now < self._expires_at)
+
+    def get(self):
+        if self._fresh(time.monotonic()):
+            return self._value
+        with self._lock:
+            now = time.monotonic()
+            if self._fresh(now):
+                return self._value
+            if now < self._retry_at:
+                if self._has_value:
+                    return self._value
+                raise self._error
+            try:
+                value = self.factory()
+            except Exception as e:
+                self._error = e
+                self._retry_at = now + self.failure_cooldown
+                increment("lazy_init_failures_total", 1, "Failed lazy initialisations (clients, cached ids).", resource=self.name)
+                logger.error(f"Could not initialise {self.name}: {e} (next attempt in {self.failure_cooldown:.0f}s)")
+                if self._has_value:
+                    return self._value
+                raise
+            self._value = value
+            self._has_value = True
+            self._expires_at = now + self.ttl if self.ttl else None
+            self._error = None
+            self._retry_at = 0.0
+            return value
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+            self._has_value = False
+            self._expires_at = None
+            self._retry_at = 0.0
+
+
+class LazyProxy:
+    """Stands in for a LazyResource's value, so call sites keep using plain module globals."""
+
+    def __init__(self, resource):
+        object.__setattr__(self, "_resource", resource)
+
+    def __getattr__(self, name):
+        if name == "_resource":
+            raise AttributeError(name)
+        return getattr(self._resource.get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resource.get(), name, value)
+
+
+def lazy_client(name, factory):
+    return LazyProxy(LazyResource(name, factory))
+
 # =========================
 # CONFIGURATION
 # =========================
@@ -49,6 +658,10 @@ TYPEFORM_WEBHOOK_SECRET = os.environ.get("TYPEFORM_WEBHOOK_SECRET")
 if not TYPEFORM_WEBHOOK_SECRET:
     raise ValueError("TYPEFORM_WEBHOOK_SECRET environment variable not set!")
 
+SLACK_SIGNING_SECRET = os.environ.get("SLACK_SIGNING_SECRET")
+if not SLACK_SIGNING_SECRET:
+    raise ValueError("SLACK_SIGNING_SECRET environment variable not set!")
+
 ALERT_SLACK_CHANNEL = os.environ.get("ALERT_SLACK_CHANNEL")
 if not ALERT_SLACK_CHANNEL:
     raise ValueError("ALERT_SLACK_CHANNEL environment variable not set!")
@@ -60,15 +673,40 @@ if not OPENAI_API_KEY:
 REPORT_OUTPUT_PATH = os.environ.get("REPORT_OUTPUT_PATH", "reports")
 os.makedirs(REPORT_OUTPUT_PATH, exist_ok=True)
 
-openai.api_key = OPENAI_API_KEY
+# API endpoints can be pointed at local stand-ins (see bench.py). LLM_BASE_URL
+# takes any OpenAI-compatible server; unset, the SDK default (or OPENAI_BASE_URL) is used.
+SLACK_API_URL = os.environ.get("SLACK_API_URL", "https://slack.com/api/")
+NOTION_API_URL = os.environ.get("NOTION_API_URL", "https://api.notion.com/v1")
+LLM_BASE_URL = os.environ.get("LLM_BASE_URL") or os.environ.get("OPENAI_BASE_URL")
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", 30))
 
-user_client = WebClient(token=USER_TOKEN)
-bot_client = WebClient(token=BOT_TOKEN)
-notion = NotionClient(auth=NOTION_TOKEN)
+# Pause between DMs in a blast, to stay inside chat.postMessage's rate tier.
+SEND_INTERVAL_SECONDS = float(os.environ.get("SEND_INTERVAL_SECONDS", 1))
+
+NOTION_VERSION = "2025-09-03"
+
+
+def build_slack_client(token):
+    client = InstrumentedWebClient(token=token, base_url=SLACK_API_URL)
+    client.retry_handlers.append(CountingRateLimitRetryHandler(max_retry_count=2))
+    return client
+
+
+def build_notion_session():
+    session = requests.Session()
+    session.headers.update({"Authorization": f"Bearer {NOTION_TOKEN}", "Notion-Version": NOTION_VERSION})
+    return session
+
+
+# Retries are done by chat_completion, which knows about backoff and metrics.
+llm_client = lazy_client("openai", lambda: openai.OpenAI(api_key=OPENAI_API_KEY, base_url=LLM_BASE_URL, timeout=LLM_TIMEOUT_SECONDS, max_retries=0))
+user_client = lazy_client("slack_user_client", lambda: build_slack_client(USER_TOKEN))
+bot_client = lazy_client("slack_bot_client", lambda: build_slack_client(BOT_TOKEN))
+notion_http = lazy_client("notion_http", build_notion_session)
 
 ADMIN_USER_ID = "U0AFL5S3R0A"
 
-CSV_PATH = "workspace_users.csv"
+CSV_PATH = os.environ.get("ROSTER_CSV_PATH", "workspace_users.csv")
 if not os.path.exists(CSV_PATH):
     raise FileNotFoundError(f"{CSV_PATH} not found.")
 
@@ -92,20 +730,272 @@ HEALTH_CHECK_MESSAGE_TEMPLATE = (
 
 TYPEFORM_URL = os.environ.get("TYPEFORM_URL", "https://your-typeform-url.typeform.com/to/xxxxxx")
 
-admin_session = {
+admin_session = SharedSession({
     "selected_startup_ids": None,
+    "roster_page": 0,
     "message_template": DEFAULT_MESSAGE_TEMPLATE,
     "scheduled_time": None,
+    "scheduled_send": None,
     "scheduled_timer": None,
     "timezone": "Europe/Lisbon"
-}
+}, local_keys={"scheduled_timer"})
+
+# =========================
+# MESSAGE TEMPLATES
+# =========================
+# Templates use `{column}` placeholders for any roster CSV column, `{{`/`}}` for
+# literal braces, and `{?column}...{/column}` for sections that only render when
+# the column has a value for that founder.
+
+class TemplateError(ValueError):
+    pass
+
+
+def roster_template_fields():
+    return tuple(str(c) for c in startups.columns)
+
+
+@functools.lru_cache(maxsize=64)
+def compile_template(text, allowed_fields):
+    """Parse a template once into text/field/section parts, validating every placeholder."""
+    allowed = set(allowed_fields)
+    root = []
+    stack = [(None, root)]
+    buf = []
+    i = 0
+
+    def flush():
+        if buf:
+            stack[-1][1].append(("text", "".join(buf)))
+            buf.clear()
+
+    def check_name(name):
+        if not name.isidentifier():
+            raise TemplateError(f"'{{{name}}}' is not a valid placeholder.")
+        if name not in allowed:
+            raise TemplateError(f"Unknown placeholder '{{{name}}}'. Available: {', '.join('{' + f + '}' for f in sorted(allowed))}")
+
+    while i < len(text):
+        char = text[i]
+        if char == "{":
+            if text.startswith("{{", i):
+                buf.append("{")
+                i += 2
+                continue
+            end = text.find("}", i)
+            if end == -1:
+                raise TemplateError("A '{' is never closed. Use '{{' for a literal brace.")
+            tag = text[i + 1:end].strip()
+            flush()
+            if tag.startswith("?"):
+                name = tag[1:].strip()
+                check_name(name)
+                section = []
+                stack[-1][1].append(("section", name, section))
+                stack.append((name, section))
+            elif tag.startswith("/"):
+                name = tag[1:].strip()
+                if stack[-1][0] != name:
+                    raise TemplateError(f"'{{/{name}}}' does not match an open '{{?{name}}}' section.")
+                stack.pop()
+            else:
+                check_name(tag)
+                stack[-1][1].append(("field", tag))
+            i = end + 1
+        elif char == "}":
+            if text.startswith("}}", i):
+                buf.append("}")
+                i += 2
+                continue
+            raise TemplateError("Unexpected '}'. Use '}}' for a literal brace.")
+        else:
+            buf.append(char)
+            i += 1
+
+    flush()
+    if len(stack) > 1:
+        raise TemplateError(f"Section '{{?{stack[-1][0]}}}' is never closed with '{{/{stack[-1][0]}}}'.")
+    return tuple(root)
+
+
+def validate_template(text, extra_fields=()):
+    """Return an error message for an invalid template, or None if it compiles."""
+    try:
+        compile_template(text, roster_template_fields() + tuple(extra_fields))
+        return None
+    except TemplateError as e:
+        return str(e)
+
+
+def _render_parts(parts, values):
+    out = []
+    for part in parts:
+        if part[0] == "text":
+            out.append(part[1])
+        elif part[0] == "field":
+            out.append(values.get(part[1], ""))
+        elif values.get(part[1]):
+            out.append(_render_parts(part[2], values))
+    return "".join(out)
+
+
+def _template_value(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value)
+
+
+def render_template(text, values):
+    fields = roster_template_fields() + tuple(k for k in values if k not in startups.columns)
+    compiled = compile_template(text, fields)
+    return _render_parts(compiled, {k: _template_value(v) for k, v in values.items()})
+
+
+def render_for_roster(text, selected_ids=None, extra=None, extra_for=None):
+    """Compile once and render the template for every selected founder in a single pass.
+
+    `extra_for(slack_id)` may override `extra` values per founder (same keys only)."""
+    ensure_roster_fresh()
+    extra = {k: _template_value(v) for k, v in (extra or {}).items()}
+    compiled = compile_template(text, roster_template_fields() + tuple(extra))
+    rendered = []
+    for record in startups.to_dict("records"):
+        slack_id = _template_value(record.get("slack_user_id"))
+        if not slack_id:
+            continue
+        if selected_ids is not None and slack_id not in selected_ids:
+            continue
+        values = {k: _template_value(v) for k, v in record.items()}
+        values["founder_name"] = values.get("founder_name") or "Founder"
+        values["startup_name"] = values.get("startup_name") or "Startup"
+        values.update(extra)
+        if extra_for:
+            values.update({k: _template_value(v) for k, v in extra_for(slack_id).items() if k in extra})
+        rendered.append((slack_id, _render_parts(compiled, values)))
+    return rendered
+
+
+def template_preview(text):
+    # Brackets, not <...>: the preview is mrkdwn, where <...> is link/mention syntax.
+    sample = {c: f"[{c}]" for c in roster_template_fields()}
+    sample.update({"founder_name": "Maria", "startup_name": "Acme"})
+    try:
+        return render_template(text, sample)
+    except TemplateError as e:
+        return f"⚠️ {e}"
 
 # =========================
 # ALERT THRESHOLDS
 # =========================
 
 RUNWAY_ALERT_THRESHOLD = 6
+RUNWAY_CRITICAL_THRESHOLD = 3
 MRR_DROP_ALERT = True
+ALERT_REPEAT_SUPPRESS_SECONDS = 60 * 60 * 24 * 7
+
+HELP_NOT_NEEDED_ANSWERS = frozenset(["no", "não", "nao", "n/a", "-", ""])
+
+# =========================
+# ALERT RULES
+# =========================
+# Each rule is compiled once into a predicate over a normalised submission row.
+# Rules sharing a "group" are mutually exclusive: only the first match (listed
+# most severe first) fires. The same evaluation feeds the webhook alerts, the
+# digest and the PDF status badges.
+
+ALERT_RULES = [
+    {"id": "runway_critical", "group": "runway", "when": ("runway", "lt", RUNWAY_CRITICAL_THRESHOLD), "severity": "critical", "reason": "Runway is only {runway} months"},
+    {"id": "runway_low", "group": "runway", "when": ("runway", "lt", RUNWAY_ALERT_THRESHOLD), "severity": "watch", "reason": "Runway is only {runway} months"},
+    {"id": "mrr_drop", "when": ("mrr", "lt_field", "previous_mrr"), "severity": "watch", "reason": "MRR dropped from €{previous_mrr:,.0f} to €{mrr:,.0f}", "enabled": MRR_DROP_ALERT},
+    {"id": "help_requested", "when": ("help_requested", "is_true", None), "severity": "watch", "reason": "Founder requested help: {help_needed}"},
+]
+
+RULE_OPERATORS = {
+    "lt": lambda field, value: lambda row: row[field] < value,
+    "lt_field": lambda field, other: lambda row: bool(row[other]) and row[field] < row[other],
+    "is_true": lambda field, _: lambda row: bool(row[field]),
+}
+
+SEVERITY_RANK = {"healthy": 0, "watch": 1, "critical": 2}
+SEVERITY_STATUS = {"healthy": "🟢 Healthy", "watch": "🟡 Watch", "critical": "🔴 Critical"}
+
+
+def compile_alert_rules(rules):
+    compiled = []
+    for rule in rules:
+        if not rule.get("enabled", True):
+            continue
+        field, op, operand = rule["when"]
+        compiled.append({
+            "id": rule["id"],
+            "group": rule.get("group"),
+            "predicate": RULE_OPERATORS[op](field, operand),
+            "severity": rule["severity"],
+            "reason": rule["reason"]
+        })
+    return tuple(compiled)
+
+
+COMPILED_ALERT_RULES = compile_alert_rules(ALERT_RULES)
+
+
+def normalise_submission(data, previous_mrr):
+    """Coerce one submission into the flat row the rules evaluate, normalising text once."""
+    help_needed = data.get("help_needed", "") or ""
+    return {
+        "company": data.get("company", "Unknown"),
+        "mrr": data.get("mrr", 0) or 0,
+        "previous_mrr": previous_mrr or 0,
+        "runway": data.get("runway", 0) or 0,
+        "help_needed": help_needed,
+        "help_requested": help_needed.strip().lower() not in HELP_NOT_NEEDED_ANSWERS
+    }
+
+
+def evaluate_alert_rules(rows):
+    """Evaluate every compiled rule over a batch of normalised rows."""
+    results = []
+    for row in rows:
+        fired = []
+        fired_groups = set()
+        for rule in COMPILED_ALERT_RULES:
+            if rule["group"] and rule["group"] in fired_groups:
+                continue
+            if rule["predicate"](row):
+                fired.append(rule)
+                if rule["group"]:
+                    fired_groups.add(rule["group"])
+        severity = max((rule["severity"] for rule in fired), key=SEVERITY_RANK.get, default="healthy")
+        results.append({
+            "alert": bool(fired),
+            "rule_ids": tuple(rule["id"] for rule in fired),
+            "reasons": [rule["reason"].format(**row) for rule in fired],
+            "severity": severity,
+            "status": SEVERITY_STATUS[severity]
+        })
+    return results
+
+
+def track_alert_state(company, result):
+    """Record the latest evaluation for a company and report repeats and escalations.
+
+    The state is shared, so a company's next submission compares against this one whichever worker handles it."""
+    now = time.time()
+    key = f"alert-state:{company}"
+    with shared_lock(key):
+        previous = state.get(key)
+        state.set(key, {"severity": result["severity"], "rule_ids": list(result["rule_ids"]), "updated_at": now})
+    if previous is None:
+        return {"repeat": False, "escalated": False, "previous_severity": None}
+    return {
+        "repeat": (
+            tuple(previous["rule_ids"]) == result["rule_ids"]
+            and previous["severity"] == result["severity"]
+            and now - previous["updated_at"] < ALERT_REPEAT_SUPPRESS_SECONDS
+        ),
+        "escalated": SEVERITY_RANK[result["severity"]] > SEVERITY_RANK[previous["severity"]],
+        "previous_severity": previous["severity"]
+    }
 
 # =========================
 # BRAND COLORS
@@ -120,33 +1010,115 @@ UF_GREEN = colors.HexColor("#10B981")
 UF_YELLOW = colors.HexColor("#F59E0B")
 UF_RED = colors.HexColor("#EF4444")
 
+# =========================
+# REPORT OUTPUT
+# =========================
+# The investor update is uploaded to Slack on every run, so its size is bounded.
+# Every build is checked against REPORT_MAX_BYTES. An oversized report is rebuilt
+# without trend charts, then with one summary table in place of the per-company
+# snapshots (most of the file: a few tables and two sparklines each). If it still
+# doesn't fit, ReportTooLarge is raised so the admin is told instead of sent the file.
+
+REPORT_MAX_BYTES = int(os.environ.get("REPORT_MAX_BYTES", 10 * 1024 * 1024))
+REPORT_BRAND_FONT_PATH = os.environ.get("REPORT_BRAND_FONT_PATH")
+REPORT_BRAND_FONT_BOLD_PATH = os.environ.get("REPORT_BRAND_FONT_BOLD_PATH")
+
+
+def register_report_fonts():
+    if not REPORT_BRAND_FONT_PATH:
+        return "Helvetica", "Helvetica-Bold"
+    try:
+        pdfmetrics.registerFont(TTFont("Brand", REPORT_BRAND_FONT_PATH))
+        bold = "Brand"
+        if REPORT_BRAND_FONT_BOLD_PATH:
+            pdfmetrics.registerFont(TTFont("Brand-Bold", REPORT_BRAND_FONT_BOLD_PATH))
+            bold = "Brand-Bold"
+        pdfmetrics.registerFontFamily("Brand", normal="Brand", bold=bold, italic="Brand", boldItalic=bold)
+        return "Brand", bold
+    except Exception as e:
+        logger.error(f"Could not load brand font, falling back to Helvetica: {e}")
+        return "Helvetica", "Helvetica-Bold"
+
+
+REPORT_FONT, REPORT_FONT_BOLD = register_report_fonts()
+
+
+class ReportTooLarge(Exception):
+    pass
+
 # =========================
 # NOTION DATA SOURCE HELPER
 # =========================
 
-_data_source_id_cache = None
+NOTION_REQUESTS_PER_SECOND = 3
+
+_notion_rate_lock = threading.Lock()
+_notion_next_request_at = 0.0
+
+
+def _notion_throttle():
+    """Space Notion calls across all threads to stay under the API's average rate limit."""
+    global _notion_next_request_at
+    with _notion_rate_lock:
+        now = time.monotonic()
+        wait = _notion_next_request_at - now
+        _notion_next_request_at = max(now, _notion_next_request_at) + 1.0 / NOTION_REQUESTS_PER_SECOND
+    if wait > 0:
+        time.sleep(wait)
+
+
+NOTION_MAX_RETRIES = 3
+NOTION_RETRY_MAX_SECONDS = 30
+
+
+class NotionError(Exception):
+    pass
+
+
+def notion_request(operation, method, path, json_body=None):
+    """Throttled Notion call that retries 429s and 5xx (honouring Retry-After) and raises on any other non-2xx."""
+    for attempt in range(NOTION_MAX_RETRIES + 1):
+        _notion_throttle()
+        with track_call("notion", operation) as call:
+            response = notion_http.request(method, f"{NOTION_API_URL}{path}", json=json_body)
+            call["status"] = response.status_code
+        if response.ok:
+            return response.json()
+        if (response.status_code != 429 and response.status_code < 500) or attempt == NOTION_MAX_RETRIES:
+            raise NotionError(f"Notion {operation} failed with {response.status_code}: {response.text[:300]}")
+        try:
+            delay = float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            delay = 2 ** attempt
+        increment("outbound_retries_total", 1, "Outbound API calls retried after a 429.", integration="notion")
+        logger.warning(f"Notion {operation} got {response.status_code}; retry {attempt + 1}/{NOTION_MAX_RETRIES} in {delay:.1f}s")
+        time.sleep(min(delay, NOTION_RETRY_MAX_SECONDS))
+
+
+DATA_SOURCE_ID_TTL_SECONDS = 24 * 3600
+
+def fetch_data_source_id():
+    """Look the data source id up in shared state, then in Notion (storing it for the other workers)."""
+    data_source_id = state.get("cache:notion_data_source_id")
+    if data_source_id:
+        return data_source_id
+    data_sources = notion_request("get_database", "GET", f"/databases/{NOTION_DATABASE_ID}").get("data_sources", [])
+    if not data_sources:
+        raise Exception("No data sources found for this database.")
+    data_source_id = data_sources[0]["id"]
+    state.set("cache:notion_data_source_id", data_source_id, ttl=DATA_SOURCE_ID_TTL_SECONDS)
+    logger.debug(f"Fetched data_source_id: {data_source_id}")
+    return data_source_id
+
+
+_data_source_id = LazyResource("notion_data_source_id", fetch_data_source_id, ttl=DATA_SOURCE_ID_TTL_SECONDS)
+
 
 def get_data_source_id():
-    global _data_source_id_cache
-    if _data_source_id_cache:
-        return _data_source_id_cache
+    """The Notion data source id, or None while it can't be fetched (the failure is logged once per cooldown)."""
     try:
-        response = requests.get(
-            f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}",
-            headers={
-                "Authorization": f"Bearer {NOTION_TOKEN}",
-                "Notion-Version": "2025-09-03"
-            }
-        )
-        data = response.json()
-        data_sources = data.get("data_sources", [])
-        if not data_sources:
-            raise Exception("No data sources found for this database.")
-        _data_source_id_cache = data_sources[0]["id"]
-        print(f"[DEBUG] Fetched data_source_id: {_data_source_id_cache}")
-        return _data_source_id_cache
-    except Exception as e:
-        print(f"[ERROR] Failed to fetch data_source_id: {e}")
+        return _data_source_id.get()
+    except Exception:
         return None
 
 
@@ -162,83 +1134,228 @@ def notion_query(filters=None, sorts=None, page_size=100):
     if page_size:
         body["page_size"] = page_size
     try:
-        response = requests.post(
-            f"https://api.notion.com/v1/data_sources/{data_source_id}/query",
-            headers={
-                "Authorization": f"Bearer {NOTION_TOKEN}",
-                "Notion-Version": "2025-09-03",
-                "Content-Type": "application/json"
-            },
-            json=body
-        )
-        return response.json().get("results", [])
+        return _notion_query_page(data_source_id, body).get("results", [])
     except Exception as e:
-        print(f"[ERROR] Notion query failed: {e}")
+        logger.error(f"Notion query failed: {e}")
         return []
 
 
+def notion_query_all(filters=None, sorts=None, strict=False):
+    """Like notion_query, but follows next_cursor until every matching page is fetched.
+
+    With `strict`, failures raise instead of returning what was read so far."""
+    data_source_id = get_data_source_id()
+    if not data_source_id:
+        if strict:
+            raise NotionError("No Notion data source available")
+        return []
+    body = {"page_size": 100}
+    if filters:
+        body["filter"] = filters
+    if sorts:
+        body["sorts"] = sorts
+    results = []
+    try:
+        while True:
+            data = _notion_query_page(data_source_id, body)
+            results.extend(data.get("results", []))
+            if not data.get("has_more") or not data.get("next_cursor"):
+                return results
+            body["start_cursor"] = data["next_cursor"]
+    except Exception as e:
+        if strict:
+            raise
+        logger.error(f"Notion query failed: {e}")
+        return results
+
+
+def _notion_query_page(data_source_id, body):
+    return notion_request("notion_query", "POST", f"/data_sources/{data_source_id}/query", body)
+
+
 def notion_create_page(properties):
     data_source_id = get_data_source_id()
     if not data_source_id:
         return False
     try:
-        response = requests.post(
-            "https://api.notion.com/v1/pages",
-            headers={
-                "Authorization": f"Bearer {NOTION_TOKEN}",
-                "Notion-Version": "2025-09-03",
-                "Content-Type": "application/json"
+        notion_request("notion_create_page", "POST", "/pages", {
+            "parent": {
+                "type": "data_source_id",
+                "data_source_id": data_source_id
             },
-            json={
-                "parent": {
-                    "type": "data_source_id",
-                    "data_source_id": data_source_id
-                },
-                "properties": properties
-            }
-        )
-        if response.status_code == 200:
-            return True
-        print(f"[ERROR] Notion page creation failed: {response.text}")
-        return False
+            "properties": properties
+        })
+        return True
     except Exception as e:
-        print(f"[ERROR] Notion page creation exception: {e}")
+        logger.error(f"Notion page creation exception: {e}")
         return False
 
+# =========================
+# LLM GATEWAY
+# =========================
+# Every OpenAI call goes through chat_completion:
+# - a concurrency cap per model;
+# - the client timeout (LLM_TIMEOUT_SECONDS);
+# - retries with backoff on 429, 5xx and timeouts, honouring Retry-After;
+# - a response cache for identical requests, on by default only for
+#   temperature 0;
+# - token and estimated-cost counters per model.
+# The async variant shares the policy helpers below.
+
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 3))
+LLM_BACKOFF_BASE_SECONDS = 1.0
+LLM_BACKOFF_MAX_SECONDS = 20.0
+LLM_MODEL_CONCURRENCY = {"gpt-4o": 4, "gpt-4o-mini": 8}
+LLM_DEFAULT_CONCURRENCY = 4
+LLM_CACHE_SIZE = 2048
+LLM_CACHE_TTL_SECONDS = 24 * 3600
+LLM_PRICES_PER_MILLION = {           # USD (prompt, completion); update with OpenAI's price list
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60)
+}
+
+_llm_semaphores = {}
+_llm_semaphores_lock = threading.Lock()
+_llm_cache = OrderedDict()
+_llm_cache_lock = threading.Lock()
+
+
+def _model_semaphore(model):
+    with _llm_semaphores_lock:
+        if model not in _llm_semaphores:
+            _llm_semaphores[model] = threading.BoundedSemaphore(LLM_MODEL_CONCURRENCY.get(model, LLM_DEFAULT_CONCURRENCY))
+        return _llm_semaphores[model]
+
+
+def llm_cache_key(model, messages, temperature):
+    payload = json.dumps([model, messages, temperature], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def llm_cache_get(key):
+    now = time.monotonic()
+    with _llm_cache_lock:
+        entry = _llm_cache.get(key)
+        if entry and entry[0] <= now:
+            del _llm_cache[key]
+            entry = None
+        elif entry:
+            _llm_cache.move_to_end(key)
+    increment("llm_cache_total", 1, "LLM response cache lookups.", result="hit" if entry else "miss")
+    return entry[1] if entry else None
+
+
+def llm_cache_put(key, response):
+    with _llm_cache_lock:
+        _llm_cache[key] = (time.monotonic() + LLM_CACHE_TTL_SECONDS, response)
+        while len(_llm_cache) > LLM_CACHE_SIZE:
+            _llm_cache.popitem(last=False)
+
+
+def record_llm_usage(model, response):
+    prompt_tokens, completion_tokens = usage_tokens(response)
+    increment("llm_tokens_total", prompt_tokens, "Tokens used by LLM calls.", model=model, kind="prompt")
+    increment("llm_tokens_total", completion_tokens, "Tokens used by LLM calls.", model=model, kind="completion")
+    prices = LLM_PRICES_PER_MILLION.get(model)
+    if prices:
+        cost = (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+        increment("llm_cost_usd_total", cost, "Estimated LLM spend in USD.", model=model)
+
+
+def is_retryable_llm_error(error):
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def llm_retry_delay(error, attempt):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        retry_after = float(headers.get("retry-after", ""))
+        return min(retry_after, LLM_BACKOFF_MAX_SECONDS)
+    except ValueError:
+        return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def note_llm_retry(model, error, attempt, delay):
+    increment("llm_retries_total", 1, "LLM calls retried after a 429, 5xx or timeout.", model=model)
+    logger.warning(f"LLM call to {model} failed ({error}); retry {attempt + 1}/{LLM_MAX_RETRIES} in {delay:.1f}s")
+
+
+def chat_completion(model, messages, temperature, cache=None):
+    """Call the chat completions API through the gateway. `cache` defaults to on for temperature 0."""
+    if cache is None:
+        cache = temperature == 0
+    key = llm_cache_key(model, messages, temperature) if cache else None
+    if key:
+        cached = llm_cache_get(key)
+        if cached is not None:
+            return cached
+
+    attempt = 0
+    while True:
+        try:
+            with _model_semaphore(model):
+                with track_call("openai", "chat.completions.create"):
+                    response = llm_client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+            break
+        except Exception as e:
+            if attempt >= LLM_MAX_RETRIES or not is_retryable_llm_error(e):
+                raise
+            delay = llm_retry_delay(e, attempt)
+            note_llm_retry(model, e, attempt, delay)
+            time.sleep(delay)
+            attempt += 1
+
+    record_llm_usage(model, response)
+    if key:
+        llm_cache_put(key, response)
+    return response
+
+
+def completion_text(response):
+    return response.choices[0].message.content.strip()
+
+
+def usage_tokens(response):
+    usage = getattr(response, "usage", None)
+    if not usage:
+        return 0, 0
+    return usage.prompt_tokens or 0, usage.completion_tokens or 0
+
 # =========================
 # AI COMPANY MATCHING
 # =========================
 
-def match_company_with_ai(raw_name):
+def build_match_messages(raw_name):
     company_list = startups["startup_name"].tolist()
     companies_str = "\n".join(company_list)
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a company name matcher for a startup portfolio. "
+                "Given a name typed by a user and a list of known company names, "
+                "return the single best match from the list even if it is only a partial match. "
+                "For example 'Gamma' should match 'Gamma FinTech'. "
+                "Return ONLY the exact company name from the list, nothing else. "
+                "Only return 'Unknown' if there is truly no reasonable match at all."
+            )
+        },
+        {
+            "role": "user",
+            "content": f"Typed name: {raw_name}\n\nKnown companies:\n{companies_str}"
+        }
+    ]
+
+
+def match_company_with_ai(raw_name):
     try:
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a company name matcher for a startup portfolio. "
-                        "Given a name typed by a user and a list of known company names, "
-                        "return the single best match from the list even if it is only a partial match. "
-                        "For example 'Gamma' should match 'Gamma FinTech'. "
-                        "Return ONLY the exact company name from the list, nothing else. "
-                        "Only return 'Unknown' if there is truly no reasonable match at all."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": f"Typed name: {raw_name}\n\nKnown companies:\n{companies_str}"
-                }
-            ],
-            temperature=0
-        )
-        matched = response.choices[0].message.content.strip()
-        print(f"[DEBUG] AI matched '{raw_name}' → '{matched}'")
+        matched = completion_text(chat_completion("gpt-4o-mini", build_match_messages(raw_name), 0))
+        log_sampled(f"AI matched '{raw_name}' → '{matched}'")
         return matched if matched != "Unknown" else None
     except Exception as e:
-        print(f"[ERROR] AI matching failed: {e}")
+        logger.error(f"AI matching failed: {e}")
         return None
 
 # =========================
@@ -257,10 +1374,17 @@ def get_previous_mrr(company_name):
 
 
 def get_latest_entry_per_company(month_start):
-    pages = notion_query(
+    """Latest page per company since month_start; raises if Notion can't be read in full."""
+    pages = notion_query_all(
         filters={"property": "Date", "date": {"on_or_after": month_start}},
-        sorts=[{"property": "Date", "direction": "descending"}]
+        sorts=[{"property": "Date", "direction": "descending"}],
+        strict=True
     )
+    return latest_page_per_company(pages)
+
+
+def latest_page_per_company(pages):
+    """Keep the first page per company from a Date-descending result set."""
     seen = set()
     latest = []
     for page in pages:
@@ -277,7 +1401,12 @@ def get_latest_entry_per_company(month_start):
     return latest
 
 
-def write_to_notion(data):
+def evaluate_submission_alerts(data, previous_mrr):
+    result = evaluate_alert_rules([normalise_submission(data, previous_mrr)])[0]
+    return result["alert"], result["reasons"]
+
+
+def build_submission_properties(data, previous_mrr, alert, alert_reasons):
     company = data.get("company", "Unknown")
     founder = data.get("founder", "Unknown")
     mrr = data.get("mrr", 0)
@@ -287,26 +1416,9 @@ def write_to_notion(data):
     biggest_blocker = data.get("biggest_blocker", "")
     help_needed = data.get("help_needed", "")
 
-    previous_mrr = get_previous_mrr(company)
-
-    alert = False
-    alert_reasons = []
-
-    if runway < RUNWAY_ALERT_THRESHOLD:
-        alert = True
-        alert_reasons.append(f"Runway is only {runway} months")
-
-    if MRR_DROP_ALERT and previous_mrr is not None and mrr < previous_mrr:
-        alert = True
-        alert_reasons.append(f"MRR dropped from €{previous_mrr:,.0f} to €{mrr:,.0f}")
-
-    if help_needed and help_needed.strip().lower() not in ["no", "não", "nao", "n/a", "-", ""]:
-        alert = True
-        alert_reasons.append(f"Founder requested help: {help_needed}")
-
     alert_reason_text = " | ".join(alert_reasons) if alert_reasons else ""
 
-    properties = {
+    return {
         "Company": {"title": [{"text": {"content": company}}]},
         "Founder": {"rich_text": [{"text": {"content": founder}}]},
         "Date": {"date": {"start": datetime.now().strftime("%Y-%m-%d")}},
@@ -322,29 +1434,493 @@ def write_to_notion(data):
         "Responded": {"checkbox": True}
     }
 
+
+def write_to_notion(data):
+    company = data.get("company", "Unknown")
+    previous_mrr = get_previous_mrr(company)
+    alert, alert_reasons = evaluate_submission_alerts(data, previous_mrr)
+    properties = build_submission_properties(data, previous_mrr, alert, alert_reasons)
+
     success = notion_create_page(properties)
     if success:
-        print(f"[DEBUG] Notion row created for {company}")
+        logger.debug(f"Notion row created for {company}")
         return alert, alert_reasons
     return False, []
 
+# =========================
+# NOTION WRITE BUFFER
+# =========================
+# Typeform submissions are buffered for a short window, then written as one
+# batch: previous MRR is resolved for every company in a single OR query, pages
+# are created concurrently (still throttled to Notion's rate limit), and all
+# alerts from the window go out as one Slack message.
+# The buffer is a queue in shared state, written before the webhook is acked,
+# so a restart inside the window loses nothing. Items leave the queue only once
+# their Notion page exists; failures are retried with backoff and dropped (with
+# an error log) after NOTION_WRITE_MAX_ATTEMPTS. A crash mid-flush can write a
+# page twice, never zero times.
+
+NOTION_WRITE_WINDOW_SECONDS = 5
+NOTION_WRITE_CONCURRENCY = 3
+NOTION_WRITE_BATCH_SIZE = 200
+NOTION_WRITE_MAX_ATTEMPTS = 5
+NOTION_WRITE_RETRY_SECONDS = 60
+NOTION_FLUSH_LEASE_SECONDS = 300
+NOTION_OR_FILTER_LIMIT = 100
+NOTION_PREVIOUS_MRR_MAX_PAGES = 3
+SUBMISSION_QUEUE = "submissions"
+
+_notion_write_lock = threading.Lock()
+_notion_write_timer = None
+_notion_write_executor = ThreadPoolExecutor(max_workers=NOTION_WRITE_CONCURRENCY, thread_name_prefix="notion-write")
+
+
+def enqueue_submission(data):
+    state.push(SUBMISSION_QUEUE, {"data": data, "attempts": 0})
+    schedule_submission_flush(NOTION_WRITE_WINDOW_SECONDS)
+
+
+def schedule_submission_flush(delay):
+    global _notion_write_timer
+    with _notion_write_lock:
+        if _notion_write_timer is None:
+            _notion_write_timer = threading.Timer(delay, with_current_context(flush_submissions))
+            _notion_write_timer.daemon = True
+            _notion_write_timer.start()
+
+
+def resume_pending_submissions():
+    """Pick up submissions left queued by a worker that stopped before flushing them."""
+    if state.size(SUBMISSION_QUEUE):
+        schedule_submission_flush(0)
+
+
+def get_previous_mrr_batch(companies):
+    """Return {company: latest MRR} for many companies using OR-filtered queries.
+
+    Pages come newest first and at most NOTION_PREVIOUS_MRR_MAX_PAGES are read
+    per chunk, so long histories aren't paged through. Companies still missing
+    after that (new ones, or ones that last reported long ago) get one
+    single-row query each. Raises if Notion fails, so the caller can retry
+    instead of writing rows without a previous MRR."""
+    companies = list(companies)
+    data_source_id = get_data_source_id()
+    if not data_source_id:
+        raise NotionError("Notion data source is unavailable.")
+    previous = {}
+    for i in range(0, len(companies), NOTION_OR_FILTER_LIMIT):
+        chunk = companies[i:i + NOTION_OR_FILTER_LIMIT]
+        found = _latest_mrr_by_company(data_source_id, chunk, NOTION_PREVIOUS_MRR_MAX_PAGES)
+        for company in chunk:
+            if company not in found:
+                found.update(_latest_mrr_by_company(data_source_id, [company], 1))
+        previous.update(found)
+    return previous
+
+
+def _latest_mrr_by_company(data_source_id, chunk, max_pages):
+    filters = {"or": [{"property": "Company", "title": {"equals": c}} for c in chunk]}
+    if len(chunk) == 1:
+        filters = filters["or"][0]
+    body = {"filter": filters, "sorts": [{"property": "Date", "direction": "descending"}], "page_size": min(100, len(chunk))}
+    wanted = set(chunk)
+    found = {}
+    for _ in range(max_pages):
+        data = _notion_query_page(data_source_id, body)
+        for page in data.get("results", []):
+            props = page["properties"]
+            company = props.get("Company", {}).get("title", [{}])[0].get("text", {}).get("content", "Unknown")
+            if company in wanted and company not in found:
+                found[company] = props.get("MRR (€)", {}).get("number", None)
+        if len(found) == len(wanted) or not data.get("has_more") or not data.get("next_cursor"):
+            break
+        body["start_cursor"] = data["next_cursor"]
+        body["page_size"] = 100
+    return found
+
+
+def flush_submissions():
+    global _notion_write_timer
+    with _notion_write_lock:
+        _notion_write_timer = None
+    token = acquire_lease("submission-flush", NOTION_FLUSH_LEASE_SECONDS)
+    if token is None:
+        # Another worker is flushing; whatever it leaves behind is picked up next time.
+        schedule_submission_flush(NOTION_WRITE_WINDOW_SECONDS)
+        return
+    try:
+        entries = state.peek(SUBMISSION_QUEUE, NOTION_WRITE_BATCH_SIZE)
+        needs_retry = _write_submission_batch(entries) if entries else False
+    except Exception as e:
+        logger.error(f"Submission flush failed: {e}")
+        needs_retry = True
+    finally:
+        release_lease("submission-flush", token)
+    if needs_retry:
+        schedule_submission_flush(NOTION_WRITE_RETRY_SECONDS)
+    elif state.size(SUBMISSION_QUEUE):
+        schedule_submission_flush(0)
+
+
+def _requeue_submissions(entries):
+    """Put failed entries back at the end of the queue, or drop them after too many attempts."""
+    for item_id, entry in entries:
+        attempts = entry["attempts"] + 1
+        if attempts >= NOTION_WRITE_MAX_ATTEMPTS:
+            logger.error(f"Dropping submission after {attempts} failed Notion writes", extra={"fields": entry["data"]})
+        else:
+            state.push(SUBMISSION_QUEUE, {"data": entry["data"], "attempts": attempts})
+        state.remove(SUBMISSION_QUEUE, [item_id])
+
+
+def _write_submission_batch(entries):
+    """Write one batch of queued submissions; True if some of them have to be retried."""
+    batch = [entry["data"] for _, entry in entries]
+    try:
+        previous = get_previous_mrr_batch({data.get("company", "Unknown") for data in batch})
+    except Exception as e:
+        logger.error(f"Could not resolve previous MRR, retrying {len(batch)} submissions later: {e}")
+        _requeue_submissions(entries)
+        return True
+
+    previous_mrrs = []
+    for data in batch:
+        company = data.get("company", "Unknown")
+        previous_mrrs.append(previous.get(company))
+        # A second submission in the same window compares against the first one.
+        previous[company] = data.get("mrr", 0)
+
+    evaluations = evaluate_alert_rules([normalise_submission(d, p) for d, p in zip(batch, previous_mrrs)])
+    rows = [
+        (data, previous_mrr, evaluation["alert"], evaluation["reasons"])
+        for data, previous_mrr, evaluation in zip(batch, previous_mrrs, evaluations)
+    ]
+
+    results = list(_notion_write_executor.map(lambda row: notion_create_page(build_submission_properties(*row)), rows))
+    logger.debug(f"Notion batch written: {sum(results)}/{len(rows)} rows")
+    state.remove(SUBMISSION_QUEUE, [item_id for (item_id, _), ok in zip(entries, results) if ok])
+    _requeue_submissions([entry for entry, ok in zip(entries, results) if not ok])
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    update_latest_view([
+        row_from_submission(data, previous_mrr, today)
+        for (data, previous_mrr, _, _), ok in zip(rows, results)
+        if ok
+    ])
+    record_campaign_submissions({data.get("company", "Unknown") for data, ok in zip(batch, results) if ok})
+
+    # The rows are written and dequeued by now, so alert failures are logged rather than failing the flush.
+    alerts = []
+    for data, evaluation, ok in zip(batch, evaluations, results):
+        if not ok:
+            continue
+        company = data.get("company", "Unknown")
+        try:
+            alert_state = track_alert_state(company, evaluation)
+        except Exception as e:
+            logger.error(f"Could not track alert state for {company}, treating it as new: {e}")
+            alert_state = {"repeat": False, "escalated": False, "previous_severity": None}
+        if not evaluation["alert"] or alert_state["repeat"]:
+            continue
+        reasons = list(evaluation["reasons"])
+        if alert_state["escalated"] and alert_state["previous_severity"] != "healthy":
+            reasons.insert(0, f"Escalated from {SEVERITY_STATUS[alert_state['previous_severity']]} to {evaluation['status']}")
+        alerts.append((company, data.get("founder", "Unknown"), reasons))
+    if alerts:
+        try:
+            dispatch_alerts(alerts)
+        except Exception as e:
+            logger.error(f"Could not dispatch {len(alerts)} alerts ({', '.join(a[0] for a in alerts)}): {e}")
+    return not all(results)
+
+# =========================
+# LATEST SUBMISSION VIEW
+# =========================
+# A materialised "latest submission per company this month", updated on every
+# webhook write and kept in shared state so every worker reads the same view.
+# The digest, the investor report and /digest read it in O(companies); Notion is
+# only queried to bootstrap a cold start with no snapshot. It also keeps the
+# state of the last weekly digest so the next one can show what changed.
+# Each worker holds a copy and reloads it only when the shared version moves;
+# writers merge under a shared lock so concurrent webhooks don't drop rows.
+# Webhook writes can land before any bootstrap, so the snapshot carries a
+# "bootstrapped" flag: until a full read of the month from Notion has been merged
+# in, readers bootstrap even though the snapshot is for the current month.
+
+LATEST_VIEW_PATH = os.environ.get("LATEST_VIEW_PATH", "latest_submissions.json")  # pre-shared-state snapshot, imported once
+
+_latest_view_lock = threading.Lock()
+_latest_view = {"month": None, "rows": {}, "digest_snapshot": {}, "loaded": False, "version": None}
+
+
+def _current_month():
+    return datetime.now(pytz.timezone("Europe/Lisbon")).strftime("%Y-%m")
+
+
+def _save_latest_view():
+    snapshot = {k: _latest_view[k] for k in ("month", "rows", "digest_snapshot")}
+    snapshot["bootstrapped"] = _latest_view["loaded"]
+    state.set("latest_view", snapshot)
+    _latest_view["version"] = state.incr("latest_view:version")
+
+
+def _roll_latest_view_month():
+    month = _current_month()
+    if _latest_view["month"] != month:
+        _latest_view["month"] = month
+        _latest_view["rows"] = {}
+
+
+def _read_legacy_snapshot():
+    if not os.path.exists(LATEST_VIEW_PATH):
+        return None
+    try:
+        with open(LATEST_VIEW_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Could not read latest view snapshot: {e}")
+        return None
+
+
+def _refresh_latest_view():
+    """Pick up another worker's writes; a no-op while the shared version is unchanged."""
+    version = state.get("latest_view:version")
+    if version is not None and version == _latest_view["version"]:
+        return
+    snapshot = state.get("latest_view") if version is not None else _read_legacy_snapshot()
+    _latest_view["version"] = version
+    if not snapshot:
+        return
+    _latest_view["digest_snapshot"] = snapshot.get("digest_snapshot", {})
+    if snapshot.get("month") != _current_month():
+        return
+    _latest_view["month"] = snapshot["month"]
+    _latest_view["rows"] = snapshot.get("rows", {})
+    # The legacy file was only ever written by a bootstrapped worker.
+    _latest_view["loaded"] = snapshot.get("bootstrapped", version is None)
+
+
+def latest_view_loaded():
+    with _latest_view_lock:
+        _refresh_latest_view()
+        return _latest_view["loaded"]
+
+
+def bootstrap_latest_view(pages):
+    """Seed the view from Notion pages (Date-descending) on a cold start."""
+    with shared_lock("latest_view"), _latest_view_lock:
+        _refresh_latest_view()
+        _roll_latest_view_month()
+        for row in (row_from_page(page) for page in latest_page_per_company(pages)):
+            current = _latest_view["rows"].get(row["company"])
+            if current is None or current["date"] <= row["date"]:
+                _latest_view["rows"][row["company"]] = row
+        _latest_view["loaded"] = True
+        _save_latest_view()
+
+
+def update_latest_view(rows):
+    try:
+        with shared_lock("latest_view"), _latest_view_lock:
+            _refresh_latest_view()
+            _roll_latest_view_month()
+            for row in rows:
+                current = _latest_view["rows"].get(row["company"])
+                if current is None or current["date"] <= row["date"]:
+                    _latest_view["rows"][row["company"]] = row
+            _save_latest_view()
+    except Exception as e:
+        logger.error(f"Could not persist latest view: {e}")
+
+
+def latest_submission_rows():
+    """This month's latest row per company; raises if the view needs a bootstrap and Notion fails."""
+    if not latest_view_loaded():
+        tz = pytz.timezone("Europe/Lisbon")
+        month_start = datetime.now(tz).replace(day=1, hour=0, minute=0, second=0, microsecond=0).strftime("%Y-%m-%d")
+        bootstrap_latest_view(get_latest_entry_per_company(month_start))
+    with _latest_view_lock:
+        _refresh_latest_view()
+        _roll_latest_view_month()
+        return list(_latest_view["rows"].values())
+
+
+def advance_digest_snapshot(portfolio_data):
+    """Store this digest's per-company state and return the previous one."""
+    with shared_lock("latest_view"), _latest_view_lock:
+        _refresh_latest_view()
+        previous = _latest_view["digest_snapshot"]
+        _latest_view["digest_snapshot"] = {
+            d["company"]: {"date": d["date"], "mrr": d["mrr"], "runway": d["runway"], "status": d["status"]}
+            for d in portfolio_data
+        }
+        try:
+            _save_latest_view()
+        except Exception as e:
+            logger.error(f"Could not persist digest snapshot: {e}")
+        return previous
+
+
+def peek_digest_snapshot():
+    with _latest_view_lock:
+        _refresh_latest_view()
+        return dict(_latest_view["digest_snapshot"])
+
 # =========================
 # ALERT HELPERS
 # =========================
 
-def send_alert(company, founder, alert_reasons):
+def build_alert_message(company, founder, alert_reasons):
     reasons_text = "\n".join([f"• {r}" for r in alert_reasons])
-    message = (
+    return (
         f"🚨 *Health Check Alert — {company}*\n"
         f"Founder: {founder}\n\n"
         f"{reasons_text}\n\n"
         f"Check the Notion dashboard for full details."
     )
+
+
+def send_alert_batch(alerts):
+    """Post every alert from one write window as a single Slack message; True if it was posted."""
+    if len(alerts) == 1:
+        return send_alert(*alerts[0])
+    sections = []
+    for company, founder, alert_reasons in alerts:
+        reasons_text = "\n".join([f"    • {r}" for r in alert_reasons])
+        sections.append(f"*{company}* ({founder})\n{reasons_text}")
+    message = (
+        f"🚨 *Health Check Alerts — {len(alerts)} companies*\n\n"
+        + "\n\n".join(sections)
+        + "\n\nCheck the Notion dashboard for full details."
+    )
+    try:
+        bot_client.chat_postMessage(channel=ALERT_SLACK_CHANNEL, text=message)
+        logger.debug(f"Batched alert sent for {len(alerts)} companies")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send alert: {e}")
+        return False
+
+
+def send_alert(company, founder, alert_reasons):
+    message = build_alert_message(company, founder, alert_reasons)
     try:
         bot_client.chat_postMessage(channel=ALERT_SLACK_CHANNEL, text=message)
-        print(f"[DEBUG] Alert sent for {company}")
+        logger.debug(f"Alert sent for {company}")
+        return True
     except Exception as e:
-        print(f"[ERROR] Failed to send alert: {e}")
+        logger.error(f"Failed to send alert: {e}")
+        return False
+
+# =========================
+# ALERT DISPATCHER
+# =========================
+# Every alert goes through one dispatcher. Identical alerts (same company and
+# reasons) are dropped within a sliding window, and each company is capped per
+# hour. When more than ALERT_ROLLUP_THRESHOLD alerts fire within the rollup
+# window, they are threaded under a single summary message instead of flooding
+# the channel. The throttle windows and the open rollup live in shared state and
+# are updated under a shared lock, so the limits hold across workers. An alert
+# whose post fails gives its dedup and throttle claims back.
+
+ALERT_DEDUP_WINDOW_SECONDS = 60 * 60 * 6
+ALERT_COMPANY_THROTTLE_SECONDS = 60 * 60
+ALERT_COMPANY_MAX_PER_WINDOW = 2
+ALERT_ROLLUP_THRESHOLD = 3
+ALERT_ROLLUP_WINDOW_SECONDS = 60 * 15
+ALERT_DISPATCH_LOCK_SECONDS = 120
+
+
+def alert_fingerprint(company, alert_reasons):
+    return hashlib.sha1(json.dumps([company, sorted(alert_reasons)], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _admit_alert(company, alert_reasons, now):
+    key = f"alert-times:{company}"
+    recent = [t for t in state.get(key) or [] if now - t < ALERT_COMPANY_THROTTLE_SECONDS]
+    if len(recent) >= ALERT_COMPANY_MAX_PER_WINDOW:
+        log_sampled(f"Alert for {company} throttled ({len(recent)} in the last hour)")
+        return False
+
+    # The fingerprint is claimed in shared state so a webhook retried onto another worker stays deduped.
+    if not state.add(f"alert:{alert_fingerprint(company, alert_reasons)}", now, ttl=ALERT_DEDUP_WINDOW_SECONDS):
+        log_sampled(f"Duplicate alert for {company} suppressed")
+        return False
+
+    recent.append(now)
+    state.set(key, recent, ttl=ALERT_COMPANY_THROTTLE_SECONDS)
+    return True
+
+
+def _release_alert(company, alert_reasons, now):
+    """Undo _admit_alert for an alert that couldn't be posted, so the next occurrence isn't suppressed."""
+    state.delete(f"alert:{alert_fingerprint(company, alert_reasons)}", expected=now)
+    key = f"alert-times:{company}"
+    recent = state.get(key) or []
+    if now in recent:
+        recent.remove(now)
+        state.set(key, recent, ttl=ALERT_COMPANY_THROTTLE_SECONDS)
+
+
+def dispatch_alerts(alerts):
+    """Dedup, throttle and post (company, founder, reasons) alerts, rolling up bursts into a thread."""
+    with shared_lock("alert-dispatch", ttl=ALERT_DISPATCH_LOCK_SECONDS, timeout=ALERT_DISPATCH_LOCK_SECONDS):
+        now = time.time()
+        admitted = [a for a in alerts if _admit_alert(a[0], a[2], now)]
+        if not admitted:
+            return
+
+        recent = [t for t in state.get("alert-recent") or [] if now - t < ALERT_ROLLUP_WINDOW_SECONDS]
+        recent.extend([now] * len(admitted))
+        state.set("alert-recent", recent, ttl=ALERT_ROLLUP_WINDOW_SECONDS)
+
+        rollup = state.get("alert-rollup")
+        rollup_active = bool(rollup and rollup["ts"]) and now - rollup["started_at"] < ALERT_ROLLUP_WINDOW_SECONDS
+        if rollup_active or len(recent) > ALERT_ROLLUP_THRESHOLD:
+            failed = _post_alerts_in_rollup(admitted, now, rollup if rollup_active else None)
+        else:
+            failed = [] if send_alert_batch(admitted) else admitted
+        for company, _, alert_reasons in failed:
+            _release_alert(company, alert_reasons, now)
+
+
+def _rollup_summary_text(rollup):
+    return (
+        f"🚨 *{rollup['count']} health check alerts* since "
+        f"{datetime.fromtimestamp(rollup['started_at'], pytz.timezone('Europe/Lisbon')).strftime('%H:%M')} — details in thread."
+    )
+
+
+def _post_alerts_in_rollup(alerts, now, rollup):
+    """Thread alerts under the open rollup summary, or start one when `rollup` is None; returns the alerts not posted."""
+    if rollup is None:
+        rollup = {"ts": None, "channel": None, "started_at": now, "count": len(alerts)}
+        try:
+            response = bot_client.chat_postMessage(channel=ALERT_SLACK_CHANNEL, text=_rollup_summary_text(rollup))
+            rollup.update({"ts": response["ts"], "channel": response["channel"], "count": 0})
+        except Exception as e:
+            logger.error(f"Failed to start alert rollup: {e}")
+            return [] if send_alert_batch(alerts) else alerts
+
+    failed = []
+    for company, founder, alert_reasons in alerts:
+        try:
+            bot_client.chat_postMessage(
+                channel=rollup["channel"],
+                thread_ts=rollup["ts"],
+                text=build_alert_message(company, founder, alert_reasons)
+            )
+            rollup["count"] += 1
+        except Exception as e:
+            logger.error(f"Failed to post threaded alert for {company}: {e}")
+            failed.append((company, founder, alert_reasons))
+    state.set("alert-rollup", rollup, ttl=ALERT_ROLLUP_WINDOW_SECONDS)
+
+    try:
+        bot_client.chat_update(channel=rollup["channel"], ts=rollup["ts"], text=_rollup_summary_text(rollup))
+    except Exception as e:
+        logger.error(f"Failed to update alert rollup summary: {e}")
+    return failed
 
 # =========================
 # PDF REPORT GENERATOR
@@ -352,31 +1928,35 @@ def send_alert(company, founder, alert_reasons):
 
 def get_status_indicator(runway, mrr, previous_mrr, help_needed):
     """Return a status string based on company health."""
-    if runway < 3:
-        return "🔴 Critical"
-    if runway < 6:
-        return "🟡 Watch"
-    if previous_mrr and mrr < previous_mrr:
-        return "🟡 Watch"
-    if help_needed and help_needed.strip().lower() not in ["no", "não", "nao", "n/a", "-", ""]:
-        return "🟡 Watch"
-    return "🟢 Healthy"
+    row = normalise_submission({"mrr": mrr, "runway": runway, "help_needed": help_needed}, previous_mrr)
+    return evaluate_alert_rules([row])[0]["status"]
 
 
-def generate_ai_narrative(portfolio_data, month_str, total_mrr, avg_runway, total_headcount, pending_companies):
-    """Use GPT-4o to write the executive summary narrative."""
-    companies_summary = ""
-    for d in portfolio_data:
-        companies_summary += (
-            f"- {d['company']} (Founder: {d['founder']}): "
-            f"MRR €{d['mrr']:,.0f}, Runway {d['runway']} months, "
-            f"Headcount {d['headcount']}, "
-            f"Win: {d['biggest_win']}, "
-            f"Blocker: {d['biggest_blocker']}, "
-            f"Status: {d['status']}\n"
-        )
+def company_facts(d):
+    return (
+        f"MRR €{d['mrr']:,.0f}, Runway {d['runway']} months, "
+        f"Headcount {d['headcount']}, "
+        f"Win: {d['biggest_win']}, "
+        f"Blocker: {d['biggest_blocker']}, "
+        f"Status: {d['status']}"
+    )
+
+
+def company_fact_line(d):
+    return f"{d['company']} (Founder: {d['founder']}): {company_facts(d)}"
 
-    pending_str = ", ".join(pending_companies) if pending_companies else "None"
+
+def build_narrative_prompt(portfolio_data, month_str, total_mrr, avg_runway, total_headcount, pending_companies,
+                           company_notes=None):
+    """Final summary prompt. With `company_notes` (from the map/condense stages) the
+    raw per-company rows are left out, which keeps the prompt bounded."""
+    if company_notes is None:
+        company_notes = [company_fact_line(d) for d in portfolio_data]
+    companies_summary = "".join(f"- {note}\n" for note in company_notes)
+
+    pending_str = ", ".join(pending_companies[:NARRATIVE_PENDING_LIMIT]) if pending_companies else "None"
+    if len(pending_companies) > NARRATIVE_PENDING_LIMIT:
+        pending_str += f" and {len(pending_companies) - NARRATIVE_PENDING_LIMIT} more"
 
     prompt = f"""You are writing the executive summary for Unicorn Factory Lisboa's monthly investor update for {month_str}.
 
@@ -396,41 +1976,432 @@ Paragraph 3: How Unicorn Factory Lisboa is actively supporting the portfolio and
 
 Tone: warm but professional, like a top European VC fund. Do not use bullet points. Do not be overly positive — be candid about challenges while remaining constructive. Keep it under 250 words."""
 
+    return [
+        {"role": "system", "content": "You are an expert VC fund manager writing investor updates."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def portfolio_aggregates(portfolio_data):
+    total_mrr = sum(d["mrr"] for d in portfolio_data)
+    avg_runway = sum(d["runway"] for d in portfolio_data) / len(portfolio_data) if portfolio_data else 0
+    total_headcount = sum(d["headcount"] for d in portfolio_data)
+    return total_mrr, avg_runway, total_headcount
+
+
+# =========================
+# AI NARRATIVE
+# =========================
+# The executive summary is built map-reduce style so no prompt grows with the
+# portfolio:
+#   map       companies without a cached note are summarised in chunks of
+#             NARRATIVE_CHUNK_SIZE, concurrently, one sentence each. Notes are
+#             cached by a hash of the row, so unchanged companies are free.
+#   condense  while there are more than NARRATIVE_REDUCE_FAN_IN notes, groups
+#             of them are condensed into one paragraph each.
+#   reduce    one gpt-4o call writes the summary from the notes.
+# Each stage logs its call count, token usage and latency.
+
+NARRATIVE_MODEL = "gpt-4o"
+NARRATIVE_MAP_MODEL = os.environ.get("NARRATIVE_MAP_MODEL", "gpt-4o-mini")
+NARRATIVE_CHUNK_SIZE = 15
+NARRATIVE_REDUCE_FAN_IN = 80
+NARRATIVE_PENDING_LIMIT = 30
+NARRATIVE_CONCURRENCY = int(os.environ.get("NARRATIVE_CONCURRENCY", 4))
+NARRATIVE_CACHE_SIZE = 5000
+NARRATIVE_FALLBACK = "Executive summary unavailable this month."
+NARRATIVE_ROW_FIELDS = (
+    "company", "founder", "mrr", "previous_mrr", "runway", "headcount",
+    "biggest_win", "biggest_blocker", "help_needed", "status"
+)
+
+_narrative_executor = ThreadPoolExecutor(max_workers=NARRATIVE_CONCURRENCY, thread_name_prefix="narrative")
+_company_note_cache = OrderedDict()
+_company_note_cache_lock = threading.Lock()
+
+
+def narrative_row_key(d):
+    payload = json.dumps([NARRATIVE_MAP_MODEL] + [d.get(field) for field in NARRATIVE_ROW_FIELDS], default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def cached_company_notes(portfolio_data):
+    """Split rows into ({company: cached note}, rows still needing a note)."""
+    notes = {}
+    missing = []
+    with _company_note_cache_lock:
+        for d in portfolio_data:
+            key = narrative_row_key(d)
+            if key in _company_note_cache:
+                _company_note_cache.move_to_end(key)
+                notes[d["company"]] = _company_note_cache[key]
+            else:
+                missing.append(d)
+    return notes, missing
+
+
+def cache_company_notes(rows, notes):
+    with _company_note_cache_lock:
+        for d in rows:
+            if d["company"] in notes:
+                _company_note_cache[narrative_row_key(d)] = notes[d["company"]]
+        while len(_company_note_cache) > NARRATIVE_CACHE_SIZE:
+            _company_note_cache.popitem(last=False)
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def build_company_notes_messages(rows, month_str):
+    lines = "\n".join(f"- {company_fact_line(d)}" for d in rows)
+    return [
+        {"role": "system", "content": "You are an analyst summarising startup health checks for a VC investor update."},
+        {
+            "role": "user",
+            "content": (
+                f"For each company below, write one factual sentence (at most 30 words) for the {month_str} "
+                "investor update: momentum, the standout win or blocker, and any risk.\n"
+                "Return ONLY a JSON object mapping each exact company name to its sentence.\n\n"
+                f"{lines}"
+            )
+        }
+    ]
+
+
+def parse_company_notes(content, rows):
+    """Return {company: note} for the rows the model answered; anything unparseable is left out."""
+    start, end = content.find("{"), content.rfind("}")
     try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an expert VC fund manager writing investor updates."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7
+        parsed = json.loads(content[start:end + 1]) if start != -1 else {}
+    except ValueError:
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    wanted = {d["company"] for d in rows}
+    return {company: note.strip() for company, note in parsed.items() if company in wanted and isinstance(note, str) and note.strip()}
+
+
+def narrative_order(portfolio_data):
+    """Most severe first, then by MRR, so condensed groups keep the important names together."""
+    return sorted(portfolio_data, key=lambda d: (-SEVERITY_RANK.get(d.get("severity"), 0), -(d["mrr"] or 0)))
+
+
+def company_note_lines(portfolio_data, notes):
+    return [
+        f"{d['company']} [{d['status']}]: {notes.get(d['company']) or company_facts(d)}"
+        for d in narrative_order(portfolio_data)
+    ]
+
+
+def build_condense_messages(notes, month_str):
+    lines = "\n".join(f"- {note}" for note in notes)
+    return [
+        {"role": "system", "content": "You are an analyst summarising startup health checks for a VC investor update."},
+        {
+            "role": "user",
+            "content": (
+                f"Condense these {month_str} company notes into one paragraph of at most 120 words. "
+                "Name the companies with the most important wins and risks specifically.\n\n"
+                f"{lines}"
+            )
+        }
+    ]
+
+
+def log_narrative_stage(stage, calls, tokens, started, **fields):
+    elapsed = time.perf_counter() - started
+    observe("narrative_stage_duration_seconds", elapsed, "Latency of each narrative pipeline stage.", stage=stage)
+    logger.info(
+        f"Narrative {stage}: {calls} calls, {tokens[0]} prompt + {tokens[1]} completion tokens, {elapsed:.1f}s",
+        extra={"fields": dict(stage=stage, calls=calls, prompt_tokens=tokens[0], completion_tokens=tokens[1],
+                              seconds=round(elapsed, 2), **fields)}
+    )
+
+
+def _summarise_company_chunk(rows, month_str):
+    response = chat_completion(NARRATIVE_MAP_MODEL, build_company_notes_messages(rows, month_str), 0.3)
+    notes = parse_company_notes(completion_text(response), rows)
+    cache_company_notes(rows, notes)
+    return notes, usage_tokens(response)
+
+
+def map_company_notes(portfolio_data, month_str):
+    started = time.perf_counter()
+    notes, missing = cached_company_notes(portfolio_data)
+    chunks = chunked(missing, NARRATIVE_CHUNK_SIZE)
+    futures = [_narrative_executor.submit(with_current_context(_summarise_company_chunk), chunk, month_str) for chunk in chunks]
+    tokens = [0, 0]
+    for chunk, future in zip(chunks, futures):
+        try:
+            chunk_notes, used = future.result()
+        except Exception as e:
+            logger.error(f"Company notes failed for {len(chunk)} companies: {e}")
+            continue
+        notes.update(chunk_notes)
+        tokens = [tokens[0] + used[0], tokens[1] + used[1]]
+    log_narrative_stage("map", len(chunks), tokens, started, companies=len(portfolio_data),
+                        cached=len(portfolio_data) - len(missing))
+    return company_note_lines(portfolio_data, notes)
+
+
+def condense_notes(notes, month_str):
+    while len(notes) > NARRATIVE_REDUCE_FAN_IN:
+        started = time.perf_counter()
+        groups = chunked(notes, NARRATIVE_REDUCE_FAN_IN)
+        futures = [
+            _narrative_executor.submit(with_current_context(chat_completion), NARRATIVE_MAP_MODEL,
+                                       build_condense_messages(group, month_str), 0.3)
+            for group in groups
+        ]
+        condensed = []
+        tokens = [0, 0]
+        for group, future in zip(groups, futures):
+            try:
+                response = future.result()
+            except Exception as e:
+                # Keep the group's leading (most severe) notes so the loop still shrinks.
+                logger.error(f"Condensing {len(group)} notes failed: {e}")
+                condensed.extend(group[:NARRATIVE_CHUNK_SIZE])
+                continue
+            condensed.append(completion_text(response))
+            used = usage_tokens(response)
+            tokens = [tokens[0] + used[0], tokens[1] + used[1]]
+        log_narrative_stage("condense", len(groups), tokens, started, notes_in=len(notes), notes_out=len(condensed))
+        notes = condensed
+    return notes
+
+
+def generate_ai_narrative(portfolio_data, month_str, total_mrr, avg_runway, total_headcount, pending_companies):
+    """Use GPT-4o to write the executive summary narrative from per-company notes."""
+    try:
+        notes = condense_notes(map_company_notes(portfolio_data, month_str), month_str)
+        started = time.perf_counter()
+        response = chat_completion(
+            NARRATIVE_MODEL,
+            build_narrative_prompt(
+                portfolio_data, month_str, total_mrr,
+                avg_runway, total_headcount, pending_companies, company_notes=notes
+            ),
+            0.7
         )
-        return response.choices[0].message.content.strip()
+        log_narrative_stage("reduce", 1, usage_tokens(response), started, notes=len(notes))
+        return completion_text(response)
     except Exception as e:
-        print(f"[ERROR] GPT narrative generation failed: {e}")
-        return "Executive summary unavailable this month."
+        logger.error(f"GPT narrative generation failed: {e}")
+        return NARRATIVE_FALLBACK
+
+# =========================
+# REPORT CHARTS
+# =========================
+# MRR and runway history for the PDF. Submissions from the last
+# REPORT_HISTORY_MONTHS months are pivoted once into company x month frames,
+# then handed to build_pdf_report as plain lists (cheap to pickle into variant
+# workers). Drawings are cached by a hash of the data they plot, so a company
+# whose history hasn't changed reuses its sparkline across report runs.
 
+REPORT_HISTORY_MONTHS = int(os.environ.get("REPORT_HISTORY_MONTHS", 6))
+CHART_CACHE_SIZE = 2048
 
-def build_pdf_report(month_str, portfolio_data, pending_companies):
-    """Generate the full investor update PDF and return the file path."""
+_chart_cache = OrderedDict()
+_chart_cache_lock = threading.Lock()
+
+
+def history_start_date(months):
+    now = datetime.now()
+    index = now.year * 12 + now.month - 1 - (months - 1)
+    return f"{index // 12}-{index % 12 + 1:02d}-01"
+
+
+def fetch_report_history(portfolio_data, months=REPORT_HISTORY_MONTHS):
+    pages = notion_query_all(
+        filters={"property": "Date", "date": {"on_or_after": history_start_date(months)}},
+        sorts=[{"property": "Date", "direction": "ascending"}]
+    )
+    return build_report_history([row_from_page(page) for page in pages] + list(portfolio_data))
+
+
+def build_report_history(rows):
+    """Pivot submission rows into per-month portfolio totals and per-company series."""
+    frame = pd.DataFrame(
+        [{"company": r["company"], "date": r.get("date") or "", "mrr": r["mrr"], "runway": r["runway"]} for r in rows],
+        columns=["company", "date", "mrr", "runway"]
+    )
+    frame = frame[frame["date"].str.len() >= 7]
+    if frame.empty:
+        return None
+    frame = frame.assign(month=frame["date"].str[:7])
+    latest = frame.sort_values("date").groupby(["company", "month"]).last()
+    months = sorted(latest.index.get_level_values("month").unique())
+    mrr = latest["mrr"].unstack("month").reindex(columns=months)
+    runway = latest["runway"].unstack("month").reindex(columns=months)
+
+    def series(frame_):
+        return {
+            company: [None if pd.isna(v) else float(v) for v in values]
+            for company, values in zip(frame_.index, frame_.to_numpy().tolist())
+        }
+
+    return {
+        "months": months,
+        "total_mrr": mrr.sum(axis=0).tolist(),
+        "avg_runway": runway.mean(axis=0).round(1).fillna(0).tolist(),
+        "mrr": series(mrr),
+        "runway": series(runway)
+    }
+
+
+def _cached_drawing(kind, payload, build):
+    key = hashlib.sha1(json.dumps([kind, payload], default=str).encode("utf-8")).hexdigest()
+    with _chart_cache_lock:
+        drawing = _chart_cache.get(key)
+        if drawing is not None:
+            _chart_cache.move_to_end(key)
+    if drawing is not None:
+        increment("report_chart_cache_total", 1, "Report chart cache lookups.", result="hit")
+        return drawing
+    drawing = build()
+    with _chart_cache_lock:
+        _chart_cache[key] = drawing
+        while len(_chart_cache) > CHART_CACHE_SIZE:
+            _chart_cache.popitem(last=False)
+    increment("report_chart_cache_total", 1, "Report chart cache lookups.", result="miss")
+    return drawing
+
+
+def month_labels(months):
+    return [datetime.strptime(month, "%Y-%m").strftime("%b") for month in months]
+
+
+def sparkline(values, width, height):
+    return _cached_drawing("sparkline", [values, width, height], lambda: _build_sparkline(values, width, height))
+
+
+def _build_sparkline(values, width, height):
+    drawing = Drawing(width, height)
+    points = [(i, v) for i, v in enumerate(values) if v is not None]
+    if len(points) < 2:
+        drawing.add(String(0, height / 2 - 3, "—", fontName=REPORT_FONT, fontSize=7, fillColor=UF_GRAY))
+        return drawing
+    low = min(v for _, v in points)
+    span = (max(v for _, v in points) - low) or 1
+    step = (width - 4) / max(1, len(values) - 1)
+    coords = []
+    for i, v in points:
+        coords.extend([2 + i * step, 2 + (v - low) / span * (height - 4)])
+    color = UF_GREEN if points[-1][1] >= points[0][1] else UF_RED
+    drawing.add(PolyLine(coords, strokeColor=color, strokeWidth=1))
+    drawing.add(Circle(coords[-2], coords[-1], 1.5, fillColor=color, strokeColor=color))
+    return drawing
+
+
+def portfolio_mrr_chart(history, width, height):
+    return _cached_drawing(
+        "portfolio_mrr", [history["months"], history["total_mrr"], width, height],
+        lambda: _build_portfolio_mrr_chart(history, width, height)
+    )
+
+
+def _build_portfolio_mrr_chart(history, width, height):
+    drawing = Drawing(width, height)
+    drawing.add(String(0, height - 9, "Combined MRR", fontName=REPORT_FONT_BOLD, fontSize=8, fillColor=UF_GRAY))
+    chart = VerticalBarChart()
+    chart.x, chart.y = 28, 14
+    chart.width, chart.height = width - 32, height - 30
+    chart.data = [history["total_mrr"]]
+    chart.bars[0].fillColor = UF_ACCENT
+    chart.bars[0].strokeColor = None
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 6
+    chart.valueAxis.labelTextFormat = lambda v: f"€{v / 1000:,.0f}k"
+    chart.categoryAxis.categoryNames = month_labels(history["months"])
+    chart.categoryAxis.labels.fontSize = 6
+    drawing.add(chart)
+    return drawing
+
+
+def portfolio_runway_chart(history, width, height):
+    return _cached_drawing(
+        "portfolio_runway", [history["months"], history["avg_runway"], width, height],
+        lambda: _build_portfolio_runway_chart(history, width, height)
+    )
+
+
+def _build_portfolio_runway_chart(history, width, height):
+    drawing = Drawing(width, height)
+    drawing.add(String(0, height - 9, "Average runway (months)", fontName=REPORT_FONT_BOLD, fontSize=8, fillColor=UF_GRAY))
+    chart = HorizontalLineChart()
+    chart.x, chart.y = 20, 14
+    chart.width, chart.height = width - 24, height - 30
+    chart.data = [history["avg_runway"]]
+    chart.lines[0].strokeColor = UF_BLACK
+    chart.lines[0].strokeWidth = 1.2
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 6
+    chart.categoryAxis.categoryNames = month_labels(history["months"])
+    chart.categoryAxis.labels.fontSize = 6
+    drawing.add(chart)
+    return drawing
+
+
+def portfolio_summary_flowables(portfolio_data, width, style_body, style_small):
+    """One table row per company plus the support requests: the layout for portfolios too large for snapshots."""
+    rows = [["Company", "Founder", "MRR", "Runway", "Headcount", "Status"]]
+    for d in portfolio_data:
+        rows.append([
+            Paragraph(d["company"], style_small), Paragraph(d["founder"], style_small),
+            f"€{d['mrr']:,.0f}", f"{d['runway']} mo", str(d["headcount"]), Paragraph(d["status"], style_small)
+        ])
+    table = Table(rows, colWidths=[width*0.24, width*0.22, width*0.14, width*0.11, width*0.11, width*0.18], repeatRows=1)
+    table.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (-1, 0), REPORT_FONT_BOLD),
+        ("FONTNAME", (0, 1), (-1, -1), REPORT_FONT),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("BACKGROUND", (0, 0), (-1, 0), UF_LIGHT),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("LINEBELOW", (0, 0), (-1, -1), 0.5, colors.HexColor("#E5E7EB")),
+    ]))
+    flowables = [table]
+    help_requests = [d for d in portfolio_data if d["help_requested"]]
+    if help_requests:
+        flowables.append(Spacer(1, 5*mm))
+        flowables.append(Paragraph("<b>💬 Support Requested</b>", style_body))
+        for d in help_requests:
+            flowables.append(Paragraph(f"• <b>{d['company']}:</b> {d['help_needed']}", style_body))
+    return flowables
+
+
+def build_pdf_report(month_str, portfolio_data, pending_companies, narrative=None, variant=None,
+                     total_companies=None, history=None, detail=True):
+    """Generate the full investor update PDF and return the file path.
+
+    `variant` names a segment edition (see REPORT VARIANTS); it goes on the cover
+    and in the filename, and `total_companies` is then the segment's size.
+    `history` (from fetch_report_history) adds trend charts; without it the
+    report has none. `detail=False` replaces the per-company snapshots with one
+    summary table; the size check below switches to it when the report is too big.
+    Raises ReportTooLarge if even the smallest layout is over REPORT_MAX_BYTES.
+    """
 
     tz = pytz.timezone("Europe/Lisbon")
     now = datetime.now(tz)
     filename = f"UnicornFactory_InvestorUpdate_{now.strftime('%Y_%m')}.pdf"
+    if variant:
+        filename = f"UnicornFactory_InvestorUpdate_{now.strftime('%Y_%m')}_{report_variant_slug(variant)}.pdf"
     filepath = os.path.join(REPORT_OUTPUT_PATH, filename)
 
     # Aggregate metrics
-    total_mrr = sum(d["mrr"] for d in portfolio_data)
-    avg_runway = sum(d["runway"] for d in portfolio_data) / len(portfolio_data) if portfolio_data else 0
-    total_headcount = sum(d["headcount"] for d in portfolio_data)
-    total_companies = len(startups)
+    total_mrr, avg_runway, total_headcount = portfolio_aggregates(portfolio_data)
+    if total_companies is None:
+        total_companies = len(startups)
     responded_count = len(portfolio_data)
 
-    # Generate AI narrative
-    narrative = generate_ai_narrative(
-        portfolio_data, month_str, total_mrr,
-        avg_runway, total_headcount, pending_companies
-    )
+    # Generate AI narrative (callers that already have one, e.g. the async core, pass it in)
+    if narrative is None:
+        narrative = generate_ai_narrative(
+            portfolio_data, month_str, total_mrr,
+            avg_runway, total_headcount, pending_companies
+        )
 
     # ── Document setup ──────────────────────────────────────────────
     doc = SimpleDocTemplate(
@@ -449,7 +2420,7 @@ def build_pdf_report(month_str, portfolio_data, pending_companies):
 
     style_cover_title = ParagraphStyle(
         "CoverTitle",
-        fontName="Helvetica-Bold",
+        fontName=REPORT_FONT_BOLD,
         fontSize=32,
         leading=38,
         textColor=UF_WHITE,
@@ -458,7 +2429,7 @@ def build_pdf_report(month_str, portfolio_data, pending_companies):
     )
     style_cover_sub = ParagraphStyle(
         "CoverSub",
-        fontName="Helvetica",
+        fontName=REPORT_FONT,
         fontSize=14,
         textColor=colors.HexColor("#CCBBFF"),
         alignment=TA_LEFT,
@@ -466,14 +2437,14 @@ def build_pdf_report(month_str, portfolio_data, pending_companies):
     )
     style_cover_date = ParagraphStyle(
         "CoverDate",
-        fontName="Helvetica",
+        fontName=REPORT_FONT,
         fontSize=11,
         textColor=colors.HexColor("#999999"),
         alignment=TA_LEFT,
     )
     style_section_header = ParagraphStyle(
         "SectionHeader",
-        fontName="Helvetica-Bold",
+        fontName=REPORT_FONT_BOLD,
         fontSize=16,
         textColor=UF_BLACK,
         spaceBefore=6*mm,
@@ -481,7 +2452,7 @@ def build_pdf_report(month_str, portfolio_data, pending_companies):
     )
     style_body = ParagraphStyle(
         "Body",
-        fontName="Helvetica",
+        fontName=REPORT_FONT,
         fontSize=10,
         leading=16,
         textColor=colors.HexColor("#374151"),
@@ -489,35 +2460,35 @@ def build_pdf_report(month_str, portfolio_data, pending_companies):
     )
     style_company_name = ParagraphStyle(
         "CompanyName",
-        fontName="Helvetica-Bold",
+        fontName=REPORT_FONT_BOLD,
         fontSize=13,
         textColor=UF_BLACK,
         spaceAfter=1*mm
     )
     style_label = ParagraphStyle(
         "Label",
-        fontName="Helvetica-Bold",
+        fontName=REPORT_FONT_BOLD,
         fontSize=8,
         textColor=UF_GRAY,
         spaceAfter=0
     )
     style_value = ParagraphStyle(
         "Value",
-        fontName="Helvetica",
+        fontName=REPORT_FONT,
         fontSize=10,
         textColor=UF_BLACK,
         spaceAfter=2*mm
     )
     style_small = ParagraphStyle(
         "Small",
-        fontName="Helvetica",
+        fontName=REPORT_FONT,
         fontSize=8,
         textColor=UF_GRAY,
         spaceAfter=1*mm
     )
     style_footer = ParagraphStyle(
         "Footer",
-        fontName="Helvetica",
+        fontName=REPORT_FONT,
         fontSize=8,
         textColor=UF_GRAY,
         alignment=TA_CENTER
@@ -553,7 +2524,7 @@ def build_pdf_report(month_str, portfolio_data, pending_companies):
 
     # Cover subtitle block
     cover_info_data = [[
-        Paragraph(f"Portfolio Update", style_cover_sub),
+        Paragraph(f"Portfolio Update  ·  {variant}" if variant else "Portfolio Update", style_cover_sub),
     ], [
         Paragraph(f"{month_str}", style_cover_title),
     ], [
@@ -589,7 +2560,7 @@ def build_pdf_report(month_str, portfolio_data, pending_companies):
         ("TOPPADDING", (0, 0), (-1, -1), 5*mm),
         ("BOTTOMPADDING", (0, 0), (-1, -1), 5*mm),
         ("LEFTPADDING", (0, 0), (-1, -1), 5*mm),
-        ("FONTNAME", (0, 0), (-1, -1), "Helvetica-Bold"),
+        ("FONTNAME", (0, 0), (-1, -1), REPORT_FONT_BOLD),
         ("FONTSIZE", (0, 0), (-1, -1), 14),
         ("TEXTCOLOR", (0, 0), (-1, -1), UF_BLACK),
         ("ROWBACKGROUNDS", (0, 0), (-1, -1), [UF_LIGHT]),
@@ -599,6 +2570,19 @@ def build_pdf_report(month_str, portfolio_data, pending_companies):
     story.append(stats_table)
     story.append(Spacer(1, 5*mm))
 
+    # Portfolio trend charts
+    if history and len(history["months"]) >= 2:
+        charts_table = Table([[
+            portfolio_mrr_chart(history, W/2 - 4*mm, 45*mm),
+            portfolio_runway_chart(history, W/2 - 4*mm, 45*mm)
+        ]], colWidths=[W/2, W/2])
+        charts_table.setStyle(TableStyle([
+            ("LEFTPADDING", (0, 0), (-1, -1), 0),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+        ]))
+        story.append(charts_table)
+        story.append(Spacer(1, 4*mm))
+
     # AI narrative
     for para in narrative.split("\n\n"):
         if para.strip():
@@ -610,94 +2594,113 @@ def build_pdf_report(month_str, portfolio_data, pending_companies):
     story.append(Paragraph("Portfolio Snapshots", style_section_header))
     story.append(HRFlowable(width=W, thickness=1, color=UF_ACCENT, spaceAfter=4*mm))
 
-    for i, d in enumerate(portfolio_data):
-        status = d["status"]
-        if "🔴" in status:
-            status_color = UF_RED
-        elif "🟡" in status:
-            status_color = UF_YELLOW
-        else:
-            status_color = UF_GREEN
-
-        # Company header row
-        header_data = [[
-            Paragraph(d["company"], style_company_name),
-            Paragraph(status, ParagraphStyle(
-                "Status", fontName="Helvetica-Bold", fontSize=10,
-                textColor=status_color, alignment=TA_RIGHT
-            ))
-        ]]
-        header_table = Table(header_data, colWidths=[W*0.7, W*0.3])
-        header_table.setStyle(TableStyle([
+    if not detail:
+        story.extend(portfolio_summary_flowables(portfolio_data, W, style_body, style_small))
+    else:
+        # Styles shared by every company block, built once rather than per company.
+        status_styles = {
+            severity: ParagraphStyle(
+                f"Status-{severity}", fontName=REPORT_FONT_BOLD, fontSize=10,
+                textColor=color, alignment=TA_RIGHT
+            )
+            for severity, color in (("critical", UF_RED), ("watch", UF_YELLOW), ("healthy", UF_GREEN))
+        }
+        mrr_change_styles = {
+            up: ParagraphStyle(
+                f"MrrChange-{'up' if up else 'down'}", fontName=REPORT_FONT_BOLD, fontSize=10,
+                textColor=UF_GREEN if up else UF_RED, spaceAfter=2*mm
+            )
+            for up in (True, False)
+        }
+        header_table_style = TableStyle([
             ("TOPPADDING", (0, 0), (-1, -1), 3*mm),
             ("BOTTOMPADDING", (0, 0), (-1, -1), 1*mm),
             ("LEFTPADDING", (0, 0), (-1, -1), 0),
             ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-        ]))
-        story.append(header_table)
-        story.append(Paragraph(f"Founder: {d['founder']}", style_small))
-
-        # Metrics row
-        metrics_data = [[
-            Paragraph(f"<b>€{d['mrr']:,.0f}</b><br/><font size=7 color='#6B7280'>MRR</font>", style_body),
-            Paragraph(f"<b>{d['runway']} mo</b><br/><font size=7 color='#6B7280'>Runway</font>", style_body),
-            Paragraph(f"<b>{d['headcount']}</b><br/><font size=7 color='#6B7280'>Headcount</font>", style_body),
-            Paragraph(
-                f"<b>{'↑' if not d['previous_mrr'] or d['mrr'] >= d['previous_mrr'] else '↓'} {abs(((d['mrr'] - d['previous_mrr']) / d['previous_mrr'] * 100)) if d['previous_mrr'] else 0:.0f}%</b><br/><font size=7 color='#6B7280'>MRR Change</font>",
-                ParagraphStyle(
-                    "MrrChange",
-                    fontName="Helvetica-Bold",
-                    fontSize=10,
-                    textColor=UF_GREEN if not d['previous_mrr'] or d['mrr'] >= d['previous_mrr'] else UF_RED,
-                    spaceAfter=2*mm
-                )
-            ),
-        ]]
-        metrics_table = Table(metrics_data, colWidths=[W/4]*4)
-        metrics_table.setStyle(TableStyle([
+        ])
+        metrics_table_style = TableStyle([
             ("BACKGROUND", (0, 0), (-1, -1), UF_LIGHT),
             ("TOPPADDING", (0, 0), (-1, -1), 3*mm),
             ("BOTTOMPADDING", (0, 0), (-1, -1), 3*mm),
             ("LEFTPADDING", (0, 0), (-1, -1), 3*mm),
             ("BOX", (0, 0), (-1, -1), 0.5, colors.HexColor("#E5E7EB")),
             ("INNERGRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#E5E7EB")),
-        ]))
-        story.append(metrics_table)
-        story.append(Spacer(1, 2*mm))
-
-        # Win / Blocker
-        wb_data = [[
-            Paragraph(f"<b>🏆 Biggest Win</b><br/>{d['biggest_win']}", style_body),
-            Paragraph(f"<b>🚧 Current Blocker</b><br/>{d['biggest_blocker']}", style_body),
-        ]]
-        wb_table = Table(wb_data, colWidths=[W/2, W/2])
-        wb_table.setStyle(TableStyle([
+        ])
+        wb_table_style = TableStyle([
             ("TOPPADDING", (0, 0), (-1, -1), 3*mm),
             ("BOTTOMPADDING", (0, 0), (-1, -1), 3*mm),
             ("LEFTPADDING", (0, 0), (-1, -1), 3*mm),
             ("BOX", (0, 0), (-1, -1), 0.5, colors.HexColor("#E5E7EB")),
             ("INNERGRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#E5E7EB")),
-        ]))
-        story.append(wb_table)
+        ])
+        help_table_style = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#FEF3C7")),
+            ("TOPPADDING", (0, 0), (-1, -1), 2*mm),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 2*mm),
+            ("LEFTPADDING", (0, 0), (-1, -1), 3*mm),
+            ("BOX", (0, 0), (-1, -1), 0.5, UF_YELLOW),
+        ])
 
-        # Help needed (only if flagged)
-        if d["help_needed"] and d["help_needed"].strip().lower() not in ["no", "não", "nao", "n/a", "-", ""]:
-            story.append(Spacer(1, 1*mm))
-            help_data = [[
-                Paragraph(f"<b>💬 Support Requested:</b> {d['help_needed']}", style_body)
+        for i, d in enumerate(portfolio_data):
+            status = d["status"]
+            mrr_up = not d['previous_mrr'] or d['mrr'] >= d['previous_mrr']
+
+            # Company header row
+            header_data = [[
+                Paragraph(d["company"], style_company_name),
+                Paragraph(status, status_styles.get(d["severity"], status_styles["healthy"]))
+            ]]
+            header_table = Table(header_data, colWidths=[W*0.7, W*0.3])
+            header_table.setStyle(header_table_style)
+            story.append(header_table)
+            story.append(Paragraph(f"Founder: {d['founder']}", style_small))
+
+            # Metrics row
+            metrics_data = [[
+                Paragraph(f"<b>€{d['mrr']:,.0f}</b><br/><font size=7 color='#6B7280'>MRR</font>", style_body),
+                Paragraph(f"<b>{d['runway']} mo</b><br/><font size=7 color='#6B7280'>Runway</font>", style_body),
+                Paragraph(f"<b>{d['headcount']}</b><br/><font size=7 color='#6B7280'>Headcount</font>", style_body),
+                Paragraph(
+                    f"<b>{'↑' if mrr_up else '↓'} {abs(((d['mrr'] - d['previous_mrr']) / d['previous_mrr'] * 100)) if d['previous_mrr'] else 0:.0f}%</b><br/><font size=7 color='#6B7280'>MRR Change</font>",
+                    mrr_change_styles[mrr_up]
+                ),
             ]]
-            help_table = Table(help_data, colWidths=[W])
-            help_table.setStyle(TableStyle([
-                ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#FEF3C7")),
-                ("TOPPADDING", (0, 0), (-1, -1), 2*mm),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 2*mm),
-                ("LEFTPADDING", (0, 0), (-1, -1), 3*mm),
-                ("BOX", (0, 0), (-1, -1), 0.5, UF_YELLOW),
-            ]))
-            story.append(help_table)
-
-        story.append(Spacer(1, 5*mm))
-        story.append(HRFlowable(width=W, thickness=0.5, color=colors.HexColor("#E5E7EB"), spaceAfter=4*mm))
+            metrics_widths = [W/4]*4
+            if history and d["company"] in history["mrr"]:
+                trend_width = W*0.24
+                metrics_widths = [(W - trend_width)/4]*4 + [trend_width]
+                metrics_data[0].append([
+                    sparkline(history["mrr"][d["company"]], trend_width - 6*mm, 7*mm),
+                    Paragraph(f"MRR · last {len(history['months'])} mo", style_small),
+                    sparkline(history["runway"][d["company"]], trend_width - 6*mm, 7*mm),
+                    Paragraph("Runway", style_small),
+                ])
+            metrics_table = Table(metrics_data, colWidths=metrics_widths)
+            metrics_table.setStyle(metrics_table_style)
+            story.append(metrics_table)
+            story.append(Spacer(1, 2*mm))
+
+            # Win / Blocker
+            wb_data = [[
+                Paragraph(f"<b>🏆 Biggest Win</b><br/>{d['biggest_win']}", style_body),
+                Paragraph(f"<b>🚧 Current Blocker</b><br/>{d['biggest_blocker']}", style_body),
+            ]]
+            wb_table = Table(wb_data, colWidths=[W/2, W/2])
+            wb_table.setStyle(wb_table_style)
+            story.append(wb_table)
+
+            # Help needed (only if flagged)
+            if d["help_requested"]:
+                story.append(Spacer(1, 1*mm))
+                help_data = [[
+                    Paragraph(f"<b>💬 Support Requested:</b> {d['help_needed']}", style_body)
+                ]]
+                help_table = Table(help_data, colWidths=[W])
+                help_table.setStyle(help_table_style)
+                story.append(help_table)
+
+            story.append(Spacer(1, 5*mm))
+            story.append(HRFlowable(width=W, thickness=0.5, color=colors.HexColor("#E5E7EB"), spaceAfter=4*mm))
 
     # ── LAST PAGE — PENDING + CLOSING ────────────────────────────────
     if pending_companies:
@@ -726,54 +2729,92 @@ def build_pdf_report(month_str, portfolio_data, pending_companies):
         style_footer
     ))
 
-    doc.build(story)
-    print(f"[DEBUG] PDF generated: {filepath}")
-    return filepath
+    doc.build(story)
+    size = os.path.getsize(filepath)
+    logger.debug(f"PDF generated: {filepath} ({size:,} bytes)")
+
+    if REPORT_MAX_BYTES and size > REPORT_MAX_BYTES:
+        increment("report_size_budget_exceeded_total", 1, "Reports built over REPORT_MAX_BYTES.")
+        if history or detail:
+            logger.warning(
+                f"{filename} is {size:,} bytes, over the {REPORT_MAX_BYTES:,} byte budget; "
+                f"rebuilding {'without charts' if history else 'as a summary table'}."
+            )
+            return build_pdf_report(
+                month_str, portfolio_data, pending_companies, narrative=narrative,
+                variant=variant, total_companies=total_companies, detail=detail if history else False
+            )
+        os.remove(filepath)
+        raise ReportTooLarge(f"{filename} is {size:,} bytes even as a summary, over the {REPORT_MAX_BYTES:,} byte budget")
+    return filepath
+
+
+def fetch_portfolio_data_for_report():
+    """Read this month's latest submission per company from the local view and format it for the PDF."""
+    return portfolio_data_from_rows(latest_submission_rows())
+
+
+def row_from_page(page):
+    props = page["properties"]
+    return {
+        "company": props.get("Company", {}).get("title", [{}])[0].get("text", {}).get("content", "Unknown"),
+        "founder": props.get("Founder", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "Unknown"),
+        "date": (props.get("Date", {}).get("date") or {}).get("start", ""),
+        "mrr": props.get("MRR (€)", {}).get("number", 0) or 0,
+        "previous_mrr": props.get("Previous MRR (€)", {}).get("number", 0) or 0,
+        "runway": props.get("Runway (months)", {}).get("number", 0) or 0,
+        "headcount": props.get("Headcount", {}).get("number", 0) or 0,
+        "biggest_win": props.get("Biggest Win", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "—"),
+        "biggest_blocker": props.get("Biggest Blocker", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "—"),
+        "help_needed": props.get("Help Needed", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "")
+    }
+
 
+def row_from_submission(data, previous_mrr, date):
+    return {
+        "company": data.get("company", "Unknown"),
+        "founder": data.get("founder", "Unknown"),
+        "date": date,
+        "mrr": data.get("mrr", 0) or 0,
+        "previous_mrr": previous_mrr or 0,
+        "runway": data.get("runway", 0) or 0,
+        "headcount": data.get("headcount", 0) or 0,
+        "biggest_win": data.get("biggest_win", "") or "—",
+        "biggest_blocker": data.get("biggest_blocker", "") or "—",
+        "help_needed": data.get("help_needed", "") or ""
+    }
 
-def fetch_portfolio_data_for_report():
-    """Pull this month's data from Notion and format it for the PDF."""
-    tz = pytz.timezone("Europe/Lisbon")
-    now = datetime.now(tz)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).strftime("%Y-%m-%d")
 
-    pages = get_latest_entry_per_company(month_start)
+def portfolio_data_from_pages(pages):
+    return portfolio_data_from_rows([row_from_page(page) for page in pages])
 
-    portfolio_data = []
-    responded_companies = set()
 
-    for page in pages:
-        props = page["properties"]
-        company = props.get("Company", {}).get("title", [{}])[0].get("text", {}).get("content", "Unknown")
-        founder = props.get("Founder", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "Unknown")
-        mrr = props.get("MRR (€)", {}).get("number", 0) or 0
-        previous_mrr = props.get("Previous MRR (€)", {}).get("number", 0) or 0
-        runway = props.get("Runway (months)", {}).get("number", 0) or 0
-        headcount = props.get("Headcount", {}).get("number", 0) or 0
-        biggest_win = props.get("Biggest Win", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "—")
-        biggest_blocker = props.get("Biggest Blocker", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "—")
-        help_needed = props.get("Help Needed", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "")
-
-        status = get_status_indicator(runway, mrr, previous_mrr, help_needed)
-
-        responded_companies.add(company)
-        portfolio_data.append({
-            "company": company,
-            "founder": founder,
-            "mrr": mrr,
-            "previous_mrr": previous_mrr,
-            "runway": runway,
-            "headcount": headcount,
-            "biggest_win": biggest_win,
-            "biggest_blocker": biggest_blocker,
-            "help_needed": help_needed,
-            "status": status
-        })
+def portfolio_data_from_rows(latest_rows):
+    portfolio_data = [dict(row) for row in latest_rows]
+
+    rows = [normalise_submission(d, d["previous_mrr"]) for d in portfolio_data]
+    for d, row, evaluation in zip(portfolio_data, rows, evaluate_alert_rules(rows)):
+        d["help_requested"] = row["help_requested"]
+        d["severity"] = evaluation["severity"]
+        d["status"] = evaluation["status"]
+        d["alert_reasons"] = evaluation["reasons"]
+
+    return portfolio_data, pending_companies_from_rows(latest_rows)
 
-    all_companies = set(startups["startup_name"].tolist())
-    pending_companies = sorted(all_companies - responded_companies)
 
-    return portfolio_data, pending_companies
+def pending_companies_from_rows(latest_rows):
+    """Roster companies with no submission among the latest rows — the digest's "still waiting on" list."""
+    responded_companies = {row["company"] for row in latest_rows}
+    return sorted(set(startups["startup_name"].tolist()) - responded_companies)
+
+
+def build_report_comment(month_str, portfolio_data, pending_companies):
+    return (
+        f"📊 *Investor Update — {month_str}* is ready for your review.\n\n"
+        f"*{len(portfolio_data)}/{len(startups)} companies* reported this month. "
+        f"{'*⚠️ ' + str(len(pending_companies)) + ' companies pending.*' if pending_companies else '✅ All companies reported.'}\n\n"
+        f"Review the PDF above, then forward it to your investors when ready."
+    )
 
 
 def generate_and_send_report(user_id):
@@ -788,7 +2829,7 @@ def generate_and_send_report(user_id):
             text=f"⏳ Generating investor update for *{month_str}*... this takes about 30 seconds."
         )
     except Exception as e:
-        print(f"[ERROR] Could not notify admin: {e}")
+        logger.error(f"Could not notify admin: {e}")
 
     portfolio_data, pending_companies = fetch_portfolio_data_for_report()
 
@@ -799,10 +2840,22 @@ def generate_and_send_report(user_id):
                 text="⚠️ No health check data found for this month. Ask founders to fill the form first."
             )
         except Exception as e:
-            print(f"[ERROR] {e}")
+            logger.error(f"Could not notify admin: {e}")
         return
 
-    filepath = build_pdf_report(month_str, portfolio_data, pending_companies)
+    history = fetch_report_history(portfolio_data)
+    try:
+        filepath = build_pdf_report(month_str, portfolio_data, pending_companies, history=history)
+    except ReportTooLarge as e:
+        logger.error(f"Investor update not sent: {e}")
+        try:
+            bot_client.chat_postMessage(
+                channel=user_id,
+                text=f"⚠️ The investor update wasn't sent: {e}. Raise REPORT_MAX_BYTES or split it into report variants."
+            )
+        except Exception as e:
+            logger.error(f"Could not notify admin: {e}")
+        return
 
     # Upload PDF to Slack
     try:
@@ -815,16 +2868,250 @@ def generate_and_send_report(user_id):
                 channel=dm_channel_id,
                 file=f,
                 filename=os.path.basename(filepath),
-                initial_comment=(
-                    f"📊 *Investor Update — {month_str}* is ready for your review.\n\n"
-                    f"*{len(portfolio_data)}/{len(startups)} companies* reported this month. "
-                    f"{'*⚠️ ' + str(len(pending_companies)) + ' companies pending.*' if pending_companies else '✅ All companies reported.'}\n\n"
-                    f"Review the PDF above, then forward it to your investors when ready."
-                )
+                initial_comment=build_report_comment(month_str, portfolio_data, pending_companies)
+            )
+        logger.info("PDF sent to admin via Slack.")
+    except Exception as e:
+        logger.error(f"Failed to upload PDF to Slack: {e}")
+
+# =========================
+# REPORT VARIANTS
+# =========================
+# Tailored investor updates (per fund, cohort, LP...) are described by segment
+# specs in REPORT_VARIANTS_PATH, e.g.
+#   [{"name": "Fund II", "where": {"fund": "Fund II"}},
+#    {"name": "Cohort 2024", "where": {"cohort": ["2024A", "2024B"]}},
+#    {"name": "LP Banco X", "companies": ["AlphaAI", "BetaHealth"], "shared_narrative": false}]
+# "where" keys are roster CSV columns or portfolio fields (e.g. "severity"), and
+# values may be one value or a list. Portfolio data and the AI narrative are
+# fetched once and shared; each variant gets its own intro paragraph. Layout is
+# CPU-bound and holds the GIL, so variants are rendered on a process pool. The
+# pool lives as long as the worker, so each of its processes keeps its chart
+# cache between report runs.
+
+REPORT_VARIANTS_PATH = os.environ.get("REPORT_VARIANTS_PATH", "report_variants.json")
+REPORT_PROCESS_WORKERS = int(os.environ.get("REPORT_PROCESS_WORKERS", os.cpu_count() or 2))
+
+_report_pool = None
+_report_pool_lock = threading.Lock()
+
+
+def report_pool():
+    # spawn, not fork: this process has live threads (dispatcher, timers, log
+    # listener) whose locks a forked child could inherit mid-acquire.
+    global _report_pool
+    with _report_pool_lock:
+        if _report_pool is None:
+            _report_pool = ProcessPoolExecutor(max_workers=REPORT_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _report_pool
+
+
+def reset_report_pool(pool):
+    """Drop a pool whose processes died so the next run starts a fresh one."""
+    global _report_pool
+    with _report_pool_lock:
+        if _report_pool is pool:
+            _report_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def load_report_variants(path=None):
+    path = path or REPORT_VARIANTS_PATH
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        specs = json.load(f)
+    if not isinstance(specs, list) or not all(isinstance(spec, dict) and spec.get("name") for spec in specs):
+        raise ValueError(f"{path} must be a list of segment specs, each with a name.")
+    return specs
+
+
+def report_variant_slug(name):
+    return "".join(c if c.isalnum() else "_" for c in name).strip("_")
+
+
+def roster_attributes():
+    """Roster CSV columns per company, as strings, for segment matching."""
+    attributes = {}
+    for row in startups.to_dict("records"):
+        attributes.setdefault(str(row["startup_name"]), {k: "" if pd.isna(v) else str(v) for k, v in row.items()})
+    return attributes
+
+
+def segment_matches(spec, company, attributes, row=None):
+    """Pending companies have no row, so they only match specs on roster columns."""
+    if spec.get("companies") is not None and company not in spec["companies"]:
+        return False
+    for key, expected in (spec.get("where") or {}).items():
+        if key in attributes:
+            value = attributes[key]
+        elif row is not None and key in row:
+            value = row[key]
+        else:
+            return False
+        allowed = expected if isinstance(expected, list) else [expected]
+        if str(value) not in {str(v) for v in allowed}:
+            return False
+    return True
+
+
+def segment_portfolio(spec, portfolio_data, pending_companies, attributes=None):
+    if attributes is None:
+        attributes = roster_attributes()
+    rows = [d for d in portfolio_data if segment_matches(spec, d["company"], attributes.get(d["company"], {}), d)]
+    pending = [c for c in pending_companies if segment_matches(spec, c, attributes.get(c, {}))]
+    return rows, pending
+
+
+def segment_narrative(spec, rows, pending, narrative):
+    total_mrr, avg_runway, _ = portfolio_aggregates(rows)
+    intro = (
+        f"This edition covers {spec['name']}: {len(rows)} of {len(rows) + len(pending)} companies reported, "
+        f"with combined MRR of €{total_mrr:,.0f} and an average runway of {avg_runway:.1f} months."
+    )
+    if not spec.get("shared_narrative", True):
+        return intro
+    return intro + "\n\n" + narrative
+
+
+def _render_report_variant(month_str, rows, pending, narrative, variant, total_companies, history):
+    # Runs in a pool process: everything it needs arrives as arguments.
+    return build_pdf_report(
+        month_str, rows, pending, narrative=narrative, variant=variant,
+        total_companies=total_companies, history=history
+    )
+
+
+def segment_history(history, rows):
+    """Restrict history to the segment's companies and recompute the portfolio series."""
+    if not history:
+        return None
+    companies = {d["company"] for d in rows}
+    mrr = {c: v for c, v in history["mrr"].items() if c in companies}
+    runway = {c: v for c, v in history["runway"].items() if c in companies}
+    months = len(history["months"])
+    return {
+        "months": history["months"],
+        "total_mrr": [sum(v[i] or 0 for v in mrr.values()) for i in range(months)],
+        "avg_runway": [
+            round(sum(values) / len(values), 1) if values else 0
+            for values in ([v[i] for v in runway.values() if v[i] is not None] for i in range(months))
+        ],
+        "mrr": mrr,
+        "runway": runway
+    }
+
+
+def build_report_variants(month_str, specs, portfolio_data=None, pending_companies=None, narrative=None, history=None):
+    """Render one PDF per segment spec. Returns [(name, filepath or None)] in spec order."""
+    if portfolio_data is None:
+        portfolio_data, pending_companies = fetch_portfolio_data_for_report()
+    if history is None:
+        history = fetch_report_history(portfolio_data)
+    if narrative is None:
+        narrative = generate_ai_narrative(
+            portfolio_data, month_str, *portfolio_aggregates(portfolio_data), pending_companies
+        )
+
+    attributes = roster_attributes()
+    tasks = []
+    for spec in specs:
+        rows, pending = segment_portfolio(spec, portfolio_data, pending_companies, attributes)
+        if not rows:
+            logger.info(f"Report variant {spec['name']} has no submissions this month, skipping.")
+            tasks.append((spec["name"], None))
+            continue
+        tasks.append((spec["name"], (
+            month_str, rows, pending, segment_narrative(spec, rows, pending, narrative),
+            spec["name"], len(rows) + len(pending), segment_history(history, rows)
+        )))
+
+    runnable = [args for _, args in tasks if args]
+    if not runnable:
+        return [(name, None) for name, _ in tasks]
+
+    results = []
+    pool = report_pool()
+    futures = [(name, pool.submit(_render_report_variant, *args) if args else None) for name, args in tasks]
+    for index, (name, future) in enumerate(futures):
+        if future is None:
+            results.append((name, None))
+            continue
+        if job_cancelled():
+            future.cancel()
+        try:
+            results.append((name, future.result()))
+        except BrokenProcessPool as e:
+            logger.error(f"Report variant {name} failed, restarting the report pool: {e}")
+            reset_report_pool(pool)
+            results.append((name, None))
+        except Exception as e:
+            logger.error(f"Report variant {name} failed: {e}")
+            results.append((name, None))
+        report_job_progress(index + 1, len(futures))
+    return results
+
+
+def generate_and_send_report_variants(user_id):
+    """Build every configured report variant and DM them to the admin."""
+    tz = pytz.timezone("Europe/Lisbon")
+    month_str = datetime.now(tz).strftime("%B %Y")
+
+    try:
+        specs = load_report_variants()
+    except (ValueError, OSError) as e:
+        specs = None
+        error = f"⚠️ Report variants could not be loaded: {e}"
+    else:
+        error = None if specs else f"⚠️ No report variants configured in `{REPORT_VARIANTS_PATH}`."
+    if error:
+        try:
+            bot_client.chat_postMessage(channel=user_id, text=error)
+        except Exception as e:
+            logger.error(f"Could not notify admin: {e}")
+        return
+
+    portfolio_data, pending_companies = fetch_portfolio_data_for_report()
+    if not portfolio_data:
+        try:
+            bot_client.chat_postMessage(
+                channel=user_id,
+                text="⚠️ No health check data found for this month. Ask founders to fill the form first."
             )
-        print(f"[DEBUG] PDF sent to admin via Slack.")
+        except Exception as e:
+            logger.error(f"Could not notify admin: {e}")
+        return
+
+    results = build_report_variants(month_str, specs, portfolio_data, pending_companies)
+
+    try:
+        dm_channel_id = bot_client.conversations_open(users=user_id)["channel"]["id"]
     except Exception as e:
-        print(f"[ERROR] Failed to upload PDF to Slack: {e}")
+        logger.error(f"Could not open DM for report variants: {e}")
+        return
+    skipped = []
+    for name, filepath in results:
+        if job_cancelled():
+            break
+        if not filepath:
+            skipped.append(name)
+            continue
+        try:
+            with open(filepath, "rb") as f:
+                bot_client.files_upload_v2(
+                    channel=dm_channel_id,
+                    file=f,
+                    filename=os.path.basename(filepath),
+                    initial_comment=f"📊 *Investor Update — {month_str}* · {name}"
+                )
+        except Exception as e:
+            logger.error(f"Failed to upload report variant {name}: {e}")
+            skipped.append(name)
+    if skipped:
+        try:
+            bot_client.chat_postMessage(channel=user_id, text=f"⚠️ No PDF for: {', '.join(skipped)}")
+        except Exception as e:
+            logger.error(f"Could not notify admin: {e}")
 
 
 # =========================
@@ -851,9 +3138,10 @@ def schedule_monthly_investor_update():
             target = next_run_time()
             now = datetime.now(tz)
             delay = (target - now).total_seconds()
-            print(f"[CRON] Next investor update scheduled for {target.strftime('%d %b %Y at %H:%M %Z')} (in {delay:.0f}s)")
+            logger.info(f"Next investor update scheduled for {target.strftime('%d %b %Y at %H:%M %Z')} (in {delay:.0f}s)")
             time.sleep(delay)
-            generate_and_send_report(ADMIN_USER_ID)
+            if claim_once(f"cron:investor-update:{target.isoformat()}", ttl=CRON_CLAIM_TTL_SECONDS):
+                submit_job_or_notify("report", "Monthly investor update", ADMIN_USER_ID, generate_and_send_report, ADMIN_USER_ID)
 
     thread = threading.Thread(target=run, daemon=True)
     thread.start()
@@ -862,7 +3150,7 @@ def schedule_monthly_investor_update():
 # TYPEFORM WEBHOOK
 # =========================
 
-def parse_typeform_response(payload):
+def extract_typeform_fields(payload):
     answers = payload.get("form_response", {}).get("answers", [])
     definition = payload.get("form_response", {}).get("definition", {})
     fields = {f["id"]: f["title"] for f in definition.get("fields", [])}
@@ -894,9 +3182,10 @@ def parse_typeform_response(payload):
         elif "help" in field_title or "unicorn" in field_title:
             data["help_needed"] = value or ""
 
-    raw_company = data.get("company", "")
-    matched_company = match_company_with_ai(raw_company) if raw_company else None
+    return data
 
+
+def apply_company_match(data, matched_company):
     if matched_company:
         data["company"] = matched_company
         match = startups[startups["startup_name"] == matched_company]
@@ -910,59 +3199,216 @@ def parse_typeform_response(payload):
     return data
 
 
+def parse_typeform_response(payload):
+    data = extract_typeform_fields(payload)
+    raw_company = data.get("company", "")
+    matched_company = match_company_with_ai(raw_company) if raw_company else None
+    return apply_company_match(data, matched_company)
+
+
 @app.route("/typeform/webhook", methods=["POST"])
 def typeform_webhook():
-    secret = request.args.get("secret", "")
-    if secret != TYPEFORM_WEBHOOK_SECRET:
-        return jsonify({"error": "Unauthorized"}), 401
-
     payload = request.json
     if not payload:
         return jsonify({"error": "No payload"}), 400
 
     data = parse_typeform_response(payload)
-    print(f"[DEBUG] Parsed Typeform response: {data}")
+    logger.debug("Parsed Typeform response", extra={"fields": data})
 
-    alert, alert_reasons = write_to_notion(data)
-    if alert:
-        send_alert(data.get("company", "Unknown"), data.get("founder", "Unknown"), alert_reasons)
+    enqueue_submission(data)
 
     return jsonify({"status": "ok"}), 200
 
 # =========================
-# HEALTH CHECK BLAST
+# CAMPAIGN ANALYTICS
 # =========================
+# Every blast and health check ping is a campaign. Each DM's channel and ts is
+# recorded per recipient in the shared state backend (so the reply, the form open
+# and the submission count whichever node they land on), and the funnel fills in
+# from events as they arrive, so the Home tab never rescans Slack history:
+#   pinged    – chat.postMessage succeeded
+#   replied   – the founder answered in the bot DM (message.im event)
+#   opened    – the founder followed the tracked form link (needs CAMPAIGN_LINK_BASE_URL)
+#   submitted – a Typeform submission for the founder's startup arrived after the ping
+# Each stage is a shared counter per campaign, and a per-delivery claim keeps a
+# founder from being counted twice. A reply is credited to the latest ping in
+# that DM.
+# Slack has no read receipts, so "opened" means the form link, not the DM.
+# Replies to DMs sent with the user token land in the admin's own DMs, which
+# the bot can't see; those campaigns show no replies.
+
+CAMPAIGN_LINK_BASE_URL = os.environ.get("CAMPAIGN_LINK_BASE_URL", "").rstrip("/")
+CAMPAIGN_HOME_LIMIT = 5
+CAMPAIGN_RECENT_SIZE = 20
+CAMPAIGN_RETENTION_SECONDS = 180 * 24 * 3600
+CAMPAIGN_STAGES = ("pinged", "replied", "opened", "submitted")
+
+
+def start_campaign(kind, label):
+    campaign_id = uuid.uuid4().hex[:12]
+    try:
+        state.set(f"campaign:{campaign_id}", {"id": campaign_id, "kind": kind, "label": label, "created_at": time.time()})
+        with shared_lock("campaigns:recent"):
+            recent = state.get("campaigns:recent") or []
+            state.set("campaigns:recent", [campaign_id] + recent[:CAMPAIGN_RECENT_SIZE - 1])
+    except Exception as e:
+        logger.error(f"Could not record campaign {label}: {e}")
+    return campaign_id
 
-def send_health_check_pings(user_id):
-    if user_id != ADMIN_USER_ID:
+
+def delivery_token(campaign_id, slack_id):
+    return hashlib.sha256(f"{campaign_id}:{slack_id}".encode("utf-8")).hexdigest()[:20]
+
+
+def campaign_form_link(campaign_id, slack_id):
+    """Per-founder tracked link to the form, or the plain form URL when tracking is off."""
+    if not CAMPAIGN_LINK_BASE_URL:
+        return TYPEFORM_URL
+    return f"{CAMPAIGN_LINK_BASE_URL}/f/{delivery_token(campaign_id, slack_id)}"
+
+
+def _campaign_month_start():
+    return datetime.now(pytz.timezone("Europe/Lisbon")).replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+def _count_campaign_event(campaign_id, stage, amount=1):
+    state.incr(f"campaign:{campaign_id}:{stage}", amount)
+    increment("campaign_events_total", amount, "Campaign funnel events.", stage=stage)
+
+
+def record_delivery(campaign_id, slack_id, response):
+    position = roster_index["position"].get(slack_id)
+    startup = roster_index["entries"][position]["startup_name"] if position is not None else None
+    token = delivery_token(campaign_id, slack_id)
+    delivery = {"token": token, "campaign_id": campaign_id, "ts": response.get("ts") or "", "sent_at": time.time()}
+    try:
+        if not state.add(f"campaign-delivery:{token}", delivery, ttl=CAMPAIGN_RETENTION_SECONDS):
+            return
+        _count_campaign_event(campaign_id, "pinged")
+        state.set(f"campaign-dm:{response.get('channel') or slack_id}", delivery, ttl=CAMPAIGN_RETENTION_SECONDS)
+        if startup:
+            key = f"campaign-startup:{startup}"
+            month_start = _campaign_month_start()
+            with shared_lock(key):
+                pinged = [d for d in state.get(key) or [] if d["sent_at"] >= month_start]
+                state.set(key, pinged + [delivery], ttl=CAMPAIGN_RETENTION_SECONDS)
+    except Exception as e:
+        logger.error(f"Could not record delivery to {slack_id}: {e}")
+
+
+def record_campaign_reply(channel, ts):
+    """Attribute a DM reply to the latest ping in that channel, once."""
+    try:
+        latest = state.get(f"campaign-dm:{channel}")
+        if not latest or latest["ts"] > ts:
+            return
+        if not state.add(f"campaign-replied:{latest['token']}", True, ttl=CAMPAIGN_RETENTION_SECONDS):
+            return
+        _count_campaign_event(latest["campaign_id"], "replied")
+    except Exception as e:
+        logger.error(f"Could not record campaign reply: {e}")
         return
+    publish_home_view(ADMIN_USER_ID)
 
-    total_sent = 0
-    for _, row in startups.iterrows():
-        slack_id = str(row.get("slack_user_id", ""))
-        if not slack_id or slack_id == "nan":
+
+def record_form_open(token):
+    delivery = state.get(f"campaign-delivery:{token}")
+    if delivery and state.add(f"campaign-opened:{token}", True, ttl=CAMPAIGN_RETENTION_SECONDS):
+        _count_campaign_event(delivery["campaign_id"], "opened")
+
+
+def record_campaign_submissions(companies):
+    """Mark this month's pings to these startups as submitted."""
+    companies = [c for c in companies if c]
+    if not companies:
+        return
+    month_start = _campaign_month_start()
+    updated = 0
+    try:
+        for company in companies:
+            for delivery in state.get(f"campaign-startup:{company}") or []:
+                if delivery["sent_at"] < month_start:
+                    continue
+                if state.add(f"campaign-submitted:{delivery['token']}", True, ttl=CAMPAIGN_RETENTION_SECONDS):
+                    _count_campaign_event(delivery["campaign_id"], "submitted")
+                    updated += 1
+    except Exception as e:
+        logger.error(f"Could not record campaign submissions: {e}")
+    if updated:
+        publish_home_view(ADMIN_USER_ID)
+
+
+def campaign_funnels(limit=CAMPAIGN_HOME_LIMIT):
+    """Per-campaign funnel counts for the most recent campaigns, newest first."""
+    funnels = []
+    for campaign_id in (state.get("campaigns:recent") or [])[:limit]:
+        campaign = state.get(f"campaign:{campaign_id}")
+        if not campaign:
             continue
+        funnels.append(dict(campaign, **{stage: state.get(f"campaign:{campaign_id}:{stage}") or 0 for stage in CAMPAIGN_STAGES}))
+    return funnels
+
+
+@app.route("/f/<token>")
+def campaign_form_redirect(token):
+    try:
+        record_form_open(token)
+    except Exception as e:
+        logger.error(f"Could not record form open: {e}")
+    return redirect(TYPEFORM_URL, code=302)
+
+# =========================
+# HEALTH CHECK BLAST
+# =========================
+
+def pending_founder_ids(latest_rows):
+    """Slack ids of founders whose company hasn't submitted this month."""
+    by_startup = roster_index["by_startup"]
+    return {slack_id for company in pending_companies_from_rows(latest_rows) for slack_id in by_startup.get(company, ())}
 
-        message = HEALTH_CHECK_MESSAGE_TEMPLATE.format(
-            founder_name=row.get("founder_name", "Founder"),
-            startup_name=row.get("startup_name", "Startup"),
-            typeform_url=TYPEFORM_URL
-        )
 
+def send_health_check_pings(user_id, pending_only=False):
+    """Ping every founder, or with pending_only just the ones the digest lists as still waiting on."""
+    if user_id != ADMIN_USER_ID:
+        return
+
+    selected_ids = pending_founder_ids(latest_submission_rows()) if pending_only else None
+    if selected_ids is not None and not selected_ids:
+        try:
+            bot_client.chat_postMessage(channel=user_id, text="✅ Every founder has already responded this month — no reminders sent.")
+        except Exception as e:
+            logger.error(f"Could not notify admin: {e}")
+        return
+
+    total_sent = 0
+    kind = "Health check reminders" if pending_only else "Health check pings"
+    campaign_id = start_campaign("reminder" if pending_only else "health_check", kind)
+    messages = render_for_roster(
+        HEALTH_CHECK_MESSAGE_TEMPLATE, selected_ids=selected_ids, extra={"typeform_url": TYPEFORM_URL},
+        extra_for=lambda slack_id: {"typeform_url": campaign_form_link(campaign_id, slack_id)}
+    )
+    for index, (slack_id, message) in enumerate(messages):
+        if job_cancelled():
+            break
         try:
-            bot_client.chat_postMessage(channel=slack_id, text=message)
+            response = bot_client.chat_postMessage(channel=slack_id, text=message)
+            record_delivery(campaign_id, slack_id, response)
             total_sent += 1
-            time.sleep(1)
+            time.sleep(SEND_INTERVAL_SECONDS)
         except Exception as e:
-            print(f"[ERROR] Failed to send health check ping to {slack_id}: {e}")
+            logger.error(f"Failed to send health check ping to {slack_id}: {e}")
+        report_job_progress(index + 1, len(messages))
 
+    summary = f"✅ {kind} sent to {total_sent} founders."
+    if job_cancelled():
+        summary = f"⏹️ {kind} cancelled after {total_sent} founders."
     try:
         bot_client.chat_postMessage(
             channel=user_id,
-            text=f"✅ Health check pings sent to {total_sent} founders."
+            text=summary
         )
     except Exception as e:
-        print(f"[ERROR] Could not notify admin: {e}")
+        logger.error(f"Could not notify admin: {e}")
 
 # =========================
 # MONTHLY CRON SCHEDULER
@@ -987,9 +3433,10 @@ def schedule_monthly_health_check():
             target = next_run_time()
             now = datetime.now(tz)
             delay = (target - now).total_seconds()
-            print(f"[CRON] Next health check ping scheduled for {target.strftime('%d %b %Y at %H:%M %Z')} (in {delay:.0f}s)")
+            logger.info(f"Next health check ping scheduled for {target.strftime('%d %b %Y at %H:%M %Z')} (in {delay:.0f}s)")
             time.sleep(delay)
-            send_health_check_pings(ADMIN_USER_ID)
+            if claim_once(f"cron:health-check:{target.isoformat()}", ttl=CRON_CLAIM_TTL_SECONDS):
+                submit_job_or_notify("blast", "Monthly health check pings", ADMIN_USER_ID, send_health_check_pings, ADMIN_USER_ID)
 
     thread = threading.Thread(target=run, daemon=True)
     thread.start()
@@ -998,49 +3445,51 @@ def schedule_monthly_health_check():
 # WEEKLY DIGEST
 # =========================
 
-def send_weekly_digest():
-    tz = pytz.timezone("Europe/Lisbon")
-    now = datetime.now(tz)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).strftime("%Y-%m-%d")
-
-    pages = get_latest_entry_per_company(month_start)
+EMPTY_DIGEST_TEXT = "📋 *Weekly Portfolio Digest* — No health check responses received this month yet."
 
-    if not pages:
-        try:
-            bot_client.chat_postMessage(
-                channel=ALERT_SLACK_CHANNEL,
-                text="📋 *Weekly Portfolio Digest* — No health check responses received this month yet."
-            )
-        except Exception as e:
-            print(f"[ERROR] Failed to send empty digest: {e}")
-        return
 
+def build_digest_changes(portfolio_data, previous_snapshot):
+    changes = []
+    for d in sorted(portfolio_data, key=lambda d: d["company"]):
+        before = previous_snapshot.get(d["company"])
+        if before is None:
+            changes.append(f"• 🆕 *{d['company']}* submitted — MRR: €{d['mrr']:,.0f} | Runway: {d['runway']}mo")
+            continue
+        if before["date"] == d["date"]:
+            continue
+        details = []
+        if before["mrr"] != d["mrr"]:
+            details.append(f"MRR €{before['mrr']:,.0f} → €{d['mrr']:,.0f}")
+        if before["runway"] != d["runway"]:
+            details.append(f"Runway {before['runway']}mo → {d['runway']}mo")
+        if before["status"] != d["status"]:
+            details.append(f"{before['status']} → {d['status']}")
+        changes.append(f"• 🔄 *{d['company']}* resubmitted" + (f" — {' | '.join(details)}" if details else ""))
+    return changes
+
+
+def build_digest_text(latest_rows, now, previous_snapshot=None):
+    portfolio_data, pending_companies = portfolio_data_from_rows(latest_rows)
     responded = []
     alerts = []
     responded_companies = set()
 
-    for page in pages:
-        props = page["properties"]
-        company = props.get("Company", {}).get("title", [{}])[0].get("text", {}).get("content", "Unknown")
-        founder = props.get("Founder", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "Unknown")
-        mrr = props.get("MRR (€)", {}).get("number", 0) or 0
-        runway = props.get("Runway (months)", {}).get("number", 0) or 0
-        alert = props.get("Alert", {}).get("checkbox", False)
-        alert_reason = props.get("Alert Reason", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "")
-
-        responded_companies.add(company)
-        responded.append(f"• *{company}* ({founder}) — MRR: €{mrr:,.0f} | Runway: {runway}mo")
-        if alert:
-            alerts.append(f"• 🚨 *{company}* — {alert_reason}")
+    for d in portfolio_data:
+        responded_companies.add(d["company"])
+        responded.append(f"• *{d['company']}* ({d['founder']}) — MRR: €{d['mrr']:,.0f} | Runway: {d['runway']}mo")
+        if d["alert_reasons"]:
+            alerts.append(f"• 🚨 *{d['company']}* — {' | '.join(d['alert_reasons'])}")
 
     all_companies = set(startups["startup_name"].tolist())
-    pending_companies = all_companies - responded_companies
     total_startups = len(all_companies)
     responded_count = len(responded_companies)
     missing_count = len(pending_companies)
 
     digest = f"📋 *Weekly Portfolio Digest — {now.strftime('%B %Y')}*\n\n"
     digest += f"*{responded_count}/{total_startups} founders have responded* ({missing_count} still pending)\n\n"
+    if previous_snapshot is not None:
+        changes = build_digest_changes(portfolio_data, previous_snapshot)
+        digest += "*Since last week:*\n" + ("\n".join(changes) if changes else "_No new submissions._") + "\n\n"
     if responded:
         digest += "*Responses this month:*\n" + "\n".join(responded) + "\n\n"
     if alerts:
@@ -1048,13 +3497,36 @@ def send_weekly_digest():
     if pending_companies:
         pending_list = "\n".join([f"• {c}" for c in sorted(pending_companies)])
         digest += f"*Still waiting on:*\n{pending_list}\n\n"
-        digest += "_Run `/healthcheck` to re-ping founders who haven't responded yet._"
+        digest += "_Run `/healthcheck pending` to re-ping founders who haven't responded yet._"
+
+    return digest
+
+
+def send_weekly_digest(advance_snapshot=False):
+    """Post the digest. The scheduled weekly run advances the "since last week" baseline; on-demand runs don't."""
+    tz = pytz.timezone("Europe/Lisbon")
+    now = datetime.now(tz)
+
+    rows = latest_submission_rows()
+    if advance_snapshot:
+        previous_snapshot = advance_digest_snapshot(portfolio_data_from_rows(rows)[0])
+    else:
+        previous_snapshot = peek_digest_snapshot()
+
+    if not rows:
+        try:
+            bot_client.chat_postMessage(channel=ALERT_SLACK_CHANNEL, text=EMPTY_DIGEST_TEXT)
+        except Exception as e:
+            logger.error(f"Failed to send empty digest: {e}")
+        return
+
+    digest = build_digest_text(rows, now, previous_snapshot or None)
 
     try:
         bot_client.chat_postMessage(channel=ALERT_SLACK_CHANNEL, text=digest)
-        print("[DEBUG] Weekly digest sent.")
+        logger.debug("Weekly digest sent.")
     except Exception as e:
-        print(f"[ERROR] Failed to send weekly digest: {e}")
+        logger.error(f"Failed to send weekly digest: {e}")
 
 
 def schedule_weekly_digest():
@@ -1071,80 +3543,431 @@ def schedule_weekly_digest():
             target = next_monday()
             now = datetime.now(tz)
             delay = (target - now).total_seconds()
-            print(f"[CRON] Next weekly digest scheduled for {target.strftime('%d %b %Y at %H:%M %Z')} (in {delay:.0f}s)")
+            logger.info(f"Next weekly digest scheduled for {target.strftime('%d %b %Y at %H:%M %Z')} (in {delay:.0f}s)")
             time.sleep(delay)
-            send_weekly_digest()
+            if claim_once(f"cron:weekly-digest:{target.isoformat()}", ttl=CRON_CLAIM_TTL_SECONDS):
+                submit_job_or_notify("digest", "Weekly digest", ADMIN_USER_ID, send_weekly_digest, True)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+# =========================
+# CORE MESSAGE PROCESSING
+# =========================
+
+def process_messages(user_id, client_type="user", selected_ids=None, message_template=None):
+    if user_id != ADMIN_USER_ID:
+        return
+
+    total_sent = 0
+    client = user_client if client_type == "user" else bot_client
+    source = "USER" if client_type == "user" else "BOT"
+    template = message_template or DEFAULT_MESSAGE_TEMPLATE
+
+    try:
+        messages = render_for_roster(template, selected_ids=selected_ids)
+    except TemplateError as e:
+        messages = []
+        logger.error(f"Message template is invalid, nothing sent: {e}")
+        try:
+            client.chat_postMessage(channel=user_id, text=f"⚠️ Nothing sent — the message template is invalid: {e}")
+        except Exception as notify_error:
+            logger.error(f"Could not notify admin: {notify_error}")
+
+    campaign_id = start_campaign("blast", f"Message blast ({source.lower()})") if messages else None
+    for index, (slack_id, message) in enumerate(messages):
+        if job_cancelled():
+            break
+        try:
+            response = client.chat_postMessage(channel=slack_id, text=message)
+            record_delivery(campaign_id, slack_id, response)
+            total_sent += 1
+            time.sleep(SEND_INTERVAL_SECONDS)
+        except Exception as e:
+            logger.error(f"Failed to send to {slack_id}: {e}")
+        report_job_progress(index + 1, len(messages))
+
+    summary = f"Done! Sent {total_sent} messages as {source}."
+    if job_cancelled():
+        summary = f"Cancelled. Sent {total_sent} of {len(messages)} messages as {source}."
+    try:
+        client.chat_postMessage(channel=user_id, text=summary)
+    except Exception as e:
+        logger.error(f"Could not notify admin: {e}")
+
+    publish_home_view(user_id)
+
+
+# The scheduled send is stored in the shared session; the timer lives in one
+# worker. Whichever worker's timer fires first claims the send, and a send that
+# was cancelled or replaced from another worker is skipped. Workers re-arm a
+# pending send on startup (restore_scheduled_send), so a restart doesn't lose it.
+
+def schedule_messages(user_id, scheduled_dt_utc, client_type="bot", selected_ids=None, message_template=None):
+    cancel_scheduled_send(notify=False)
+    send = {
+        "id": uuid.uuid4().hex, "user_id": user_id, "client_type": client_type,
+        "selected_ids": selected_ids, "message_template": message_template
+    }
+    admin_session["scheduled_send"] = send
+    admin_session["scheduled_time"] = scheduled_dt_utc
+    _arm_scheduled_send(send, scheduled_dt_utc)
+
+
+def _arm_scheduled_send(send, scheduled_dt_utc):
+    delay_seconds = max(0, (scheduled_dt_utc - datetime.now(pytz.utc)).total_seconds())
+    timer = threading.Timer(delay_seconds, with_current_context(_fire_scheduled_send), args=(send,))
+    timer.daemon = True
+    timer.start()
+    admin_session["scheduled_timer"] = timer
+
+
+def _fire_scheduled_send(send):
+    current = admin_session["scheduled_send"]
+    if not current or current["id"] != send["id"] or not claim_once(f"scheduled-send:{send['id']}", ttl=7 * 24 * 3600):
+        return
+    admin_session["scheduled_send"] = None
+    admin_session["scheduled_time"] = None
+    admin_session["scheduled_timer"] = None
+    submit_job_or_notify("blast", "Scheduled send", send["user_id"], process_messages,
+                         send["user_id"], send["client_type"], send["selected_ids"], send["message_template"])
+
+
+def restore_scheduled_send():
+    send = admin_session["scheduled_send"]
+    scheduled_dt_utc = admin_session["scheduled_time"]
+    if send and scheduled_dt_utc and not admin_session["scheduled_timer"]:
+        _arm_scheduled_send(send, scheduled_dt_utc)
+
+
+def cancel_scheduled_send(notify=True):
+    timer = admin_session.get("scheduled_timer")
+    if timer:
+        timer.cancel()
+    admin_session["scheduled_timer"] = None
+    admin_session["scheduled_send"] = None
+    admin_session["scheduled_time"] = None
+    if notify:
+        try:
+            bot_client.chat_postMessage(channel=ADMIN_USER_ID, text="⏹️ Scheduled send cancelled.")
+        except Exception as e:
+            logger.error(f"Could not notify admin of cancellation: {e}")
+
+# =========================
+# REQUEST VERIFICATION
+# =========================
+
+SLACK_SIGNED_PATHS = {
+    "/slack/events", "/slack/interactions", "/slack/options",
+    "/sendmessages", "/healthcheck", "/digest", "/investorupdate", "/syncroster"
+}
+TYPEFORM_SIGNED_PATHS = {"/typeform/webhook"}
+SLACK_TIMESTAMP_TOLERANCE_SECONDS = 60 * 5
+
+# Keyed HMAC objects are built once and copied per request, so the secret is never re-hashed.
+_slack_hmac_base = hmac.new(SLACK_SIGNING_SECRET.encode("utf-8"), digestmod=hashlib.sha256)
+_typeform_hmac_base = hmac.new(TYPEFORM_WEBHOOK_SECRET.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+def verify_slack_signature(headers, body):
+    timestamp = headers.get("X-Slack-Request-Timestamp", "")
+    signature = headers.get("X-Slack-Signature", "")
+    if not timestamp or not signature.startswith("v0="):
+        return False
+    try:
+        if abs(time.time() - int(timestamp)) > SLACK_TIMESTAMP_TOLERANCE_SECONDS:
+            return False
+    except ValueError:
+        return False
+    mac = _slack_hmac_base.copy()
+    mac.update(b"v0:" + timestamp.encode("utf-8") + b":" + body)
+    # Bytes, not str: compare_digest raises on non-ASCII str, which a junk header can carry.
+    return hmac.compare_digest(("v0=" + mac.hexdigest()).encode("utf-8"), signature.encode("utf-8"))
+
+
+def verify_typeform_signature(headers, body):
+    signature = headers.get("Typeform-Signature", "")
+    if not signature.startswith("sha256="):
+        return False
+    mac = _typeform_hmac_base.copy()
+    mac.update(body)
+    expected = "sha256=" + base64.b64encode(mac.digest()).decode("ascii")
+    return hmac.compare_digest(expected.encode("utf-8"), signature.encode("utf-8"))
+
+
+@app.before_request
+def verify_request_signature():
+    """Reject unsigned traffic before any JSON/form decoding or handler work happens."""
+    if request.method != "POST":
+        return None
+    if request.path in SLACK_SIGNED_PATHS:
+        if not verify_slack_signature(request.headers, request.get_data(cache=True)):
+            return jsonify({"error": "Invalid signature"}), 401
+    elif request.path in TYPEFORM_SIGNED_PATHS:
+        if not verify_typeform_signature(request.headers, request.get_data(cache=True)):
+            return jsonify({"error": "Unauthorized"}), 401
+    return None
+
+# =========================
+# JOB EXECUTOR
+# =========================
+# Long-running work (blasts, pings, digests, reports) runs on one fixed pool.
+# Each job type has a concurrency cap, so a double-clicked "Send Now" is
+# rejected instead of messaging every founder twice. Jobs report progress and
+# check for cancellation through the current job, a context variable so that
+# coroutines awaited on a job's behalf (async_app) see it too.
+# A job runs on the worker that accepted it, but its slot is a lease in shared
+# state, so the caps hold across workers; other workers see it on the Home tab
+# and can cancel it through a flag the job polls. The slot lease is short and the
+# running job keeps renewing it (from its progress loop, and from a heartbeat
+# thread between progress updates), so a worker that dies frees its slot within
+# JOB_LEASE_SECONDS and its job is shown as failed.
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+JOB_TYPE_LIMITS = {"blast": 1, "report": 1, "digest": 1, "roster": 1}
+JOB_HISTORY_SIZE = 20
+JOB_PROGRESS_PUBLISH_EVERY = 10
+JOB_LEASE_SECONDS = 120
+JOB_HEARTBEAT_SECONDS = 30
+JOB_SUMMARY_SECONDS = 24 * 3600
+
+_job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_jobs_lock = threading.Lock()
+_jobs = OrderedDict()
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+JOB_ACTIVE_STATUSES = ("queued", "running")
+
+
+def submit_job(job_type, label, user_id, func, *args):
+    """Queue a job, or return (None, reason) when that job type is already at its limit."""
+    with _jobs_lock:
+        job = {
+            "id": uuid.uuid4().hex[:8],
+            "type": job_type,
+            "label": label,
+            "user_id": user_id,
+            "status": "queued",
+            "done": 0,
+            "total": None,
+            "created_at": time.time(),
+            "finished_at": None,
+            "cancel_event": threading.Event()
+        }
+        job["lease"] = _acquire_job_slot(job)
+        if job["lease"] is False:
+            holder = state.get(f"lease:job:{job_type}:0") or {}
+            return None, f"{holder.get('label', 'Another job')} is already running. Check the Home tab for progress."
+        _jobs[job["id"]] = job
+        _prune_jobs()
+
+    job["future"] = _job_executor.submit(with_current_context(_run_job), job, func, args)
+    _publish_job_change(job)
+    return job, None
+
+
+def _acquire_job_slot(job):
+    """Take one of the job type's slots across all workers: (name, token), None if uncapped, False if full."""
+    limit = JOB_TYPE_LIMITS.get(job["type"])
+    if limit is None:
+        return None
+    for slot in range(limit):
+        name = f"job:{job['type']}:{slot}"
+        token = acquire_lease(name, JOB_LEASE_SECONDS, {"job_id": job["id"], "label": job["label"]})
+        if token:
+            # Remembered past the lease so an abandoned job can still be found and marked failed.
+            state.set(f"job-slot:{name}", job["id"], ttl=JOB_SUMMARY_SECONDS)
+            return name, token
+    return False
+
+
+def _prune_jobs():
+    finished = [job_id for job_id, j in _jobs.items() if j["status"] not in JOB_ACTIVE_STATUSES]
+    for job_id in finished[:max(0, len(finished) - JOB_HISTORY_SIZE)]:
+        del _jobs[job_id]
+
+
+def _run_job(job, func, args):
+    if job["cancel_event"].is_set():
+        _finish_job(job, "cancelled")
+        return
+    job["status"] = "running"
+    job["started_at"] = time.time()
+    _publish_job_change(job)
+    _current_job.set(job)
+    stop_heartbeat = threading.Event()
+    if job.get("lease"):
+        threading.Thread(target=_job_heartbeat, args=(job, stop_heartbeat), daemon=True, name=f"job-heartbeat-{job['id']}").start()
+    try:
+        func(*args)
+        _finish_job(job, "cancelled" if job["cancel_event"].is_set() else "done")
+    except Exception as e:
+        logger.error(f"Job {job['id']} ({job['label']}) failed: {e}")
+        _finish_job(job, "failed")
+    finally:
+        stop_heartbeat.set()
+        _current_job.set(None)
 
-    thread = threading.Thread(target=run, daemon=True)
-    thread.start()
 
-# =========================
-# CORE MESSAGE PROCESSING
-# =========================
+def _job_heartbeat(job, stop):
+    while not stop.wait(JOB_HEARTBEAT_SECONDS):
+        _renew_job_lease(job)
 
-def process_messages(user_id, client_type="user", selected_ids=None, message_template=None):
-    if user_id != ADMIN_USER_ID:
+
+def _renew_job_lease(job):
+    """Keep the job's slot; if the lease was lost (e.g. the worker stalled past JOB_LEASE_SECONDS), cancel the job."""
+    now = time.monotonic()
+    if not job.get("lease") or now - job.get("heartbeat_at", 0) < JOB_HEARTBEAT_SECONDS:
         return
+    job["heartbeat_at"] = now
+    if not renew_lease(*job["lease"], JOB_LEASE_SECONDS):
+        logger.error(f"Job {job['id']} ({job['label']}) lost its slot lease, cancelling it")
+        job["cancel_event"].set()
+
+
+def _finish_job(job, status):
+    job["status"] = status
+    job["finished_at"] = time.time()
+    if job.get("lease"):
+        release_lease(*job["lease"])
+        state.delete(f"job-cancel:{job['id']}")
+    if job.get("started_at"):
+        observe("job_duration_seconds", job["finished_at"] - job["started_at"],
+                "Wall time of background jobs.", type=job["type"], status=status)
+    _publish_job_change(job)
+
+
+def _publish_job_change(job):
+    if job.get("lease"):
+        summary = {k: job[k] for k in ("id", "type", "label", "user_id", "status", "done", "total", "created_at", "finished_at")}
+        summary["slot"] = job["lease"][0]
+        state.set(f"job:{job['id']}", summary, ttl=JOB_SUMMARY_SECONDS)
+    if job.get("user_id") == ADMIN_USER_ID:
+        publish_home_view(job["user_id"])
+
+
+def _remote_active_jobs():
+    """Capped jobs running on other workers, read from their slot leases; abandoned ones are marked failed."""
+    jobs = []
+    for job_type, limit in JOB_TYPE_LIMITS.items():
+        for slot in range(limit):
+            name = f"job:{job_type}:{slot}"
+            holder = state.get(f"lease:{name}")
+            job_id = holder["job_id"] if holder else state.get(f"job-slot:{name}")
+            if not job_id or job_id in _jobs:
+                continue
+            summary = state.get(f"job:{job_id}")
+            if not summary or summary["status"] not in JOB_ACTIVE_STATUSES:
+                continue
+            if holder:
+                jobs.append(summary)
+            else:
+                _fail_abandoned_job(summary)
+    return jobs
 
-    total_sent = 0
-    client = user_client if client_type == "user" else bot_client
-    source = "USER" if client_type == "user" else "BOT"
-    template = message_template or DEFAULT_MESSAGE_TEMPLATE
 
-    for _, row in startups.iterrows():
-        slack_id = str(row.get("slack_user_id", ""))
-        if not slack_id or slack_id == "nan":
-            continue
-        if selected_ids is not None and slack_id not in selected_ids:
-            continue
-        message = template.format(
-            founder_name=row.get("founder_name", "Founder"),
-            startup_name=row.get("startup_name", "Startup")
-        )
-        try:
-            client.chat_postMessage(channel=slack_id, text=message)
-            total_sent += 1
-            time.sleep(1)
-        except Exception as e:
-            print(f"Failed to send to {slack_id}: {e}")
+def _job_lease_alive(summary):
+    holder = state.get(f"lease:{summary.get('slot')}")
+    return bool(holder) and holder.get("job_id") == summary["id"]
 
-    admin_session["scheduled_time"] = None
-    admin_session["scheduled_timer"] = None
 
-    try:
-        client.chat_postMessage(channel=user_id, text=f"Done! Sent {total_sent} messages as {source}.")
-    except Exception as e:
-        print(f"Could not notify admin: {e}")
+def _fail_abandoned_job(summary):
+    """Mark a remote job whose worker stopped heartbeating as failed; its slot lease has already expired."""
+    logger.warning(f"Job {summary['id']} ({summary['label']}) stopped heartbeating, marking it failed")
+    state.set(f"job:{summary['id']}", dict(summary, status="failed", finished_at=time.time()), ttl=JOB_SUMMARY_SECONDS)
+    state.delete(f"job-cancel:{summary['id']}")
 
-    try:
-        bot_client.views_publish(user_id=user_id, view=build_admin_home_view())
-    except Exception as e:
-        print(f"Failed to refresh Home tab post-send: {e}")
 
+def current_job():
+    return _current_job.get()
 
-def schedule_messages(user_id, scheduled_dt_utc, client_type="bot", selected_ids=None, message_template=None):
-    cancel_scheduled_send(notify=False)
-    delay_seconds = (scheduled_dt_utc - datetime.now(pytz.utc)).total_seconds()
-    if delay_seconds < 0:
-        delay_seconds = 0
-    timer = threading.Timer(delay_seconds, process_messages, args=(user_id, client_type, selected_ids, message_template))
-    timer.daemon = True
-    timer.start()
-    admin_session["scheduled_time"] = scheduled_dt_utc
-    admin_session["scheduled_timer"] = timer
 
+def bind_current_job(job):
+    """Make `job` the current job for the rest of this context (e.g. an asyncio task running on its behalf)."""
+    _current_job.set(job)
 
-def cancel_scheduled_send(notify=True):
-    timer = admin_session.get("scheduled_timer")
-    if timer:
-        timer.cancel()
-    admin_session["scheduled_timer"] = None
-    admin_session["scheduled_time"] = None
-    if notify:
+
+def job_cancelled():
+    job = current_job()
+    if not job:
+        return False
+    _renew_job_lease(job)
+    if not job["cancel_event"].is_set() and job.get("lease") and state.get(f"job-cancel:{job['id']}"):
+        job["cancel_event"].set()
+    return job["cancel_event"].is_set()
+
+
+def report_job_progress(done, total):
+    job = current_job()
+    if not job:
+        return
+    job["done"] = done
+    job["total"] = total
+    _renew_job_lease(job)
+    if done == total or done % JOB_PROGRESS_PUBLISH_EVERY == 0:
+        _publish_job_change(job)
+
+
+def cancel_job(job_id):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if not job:
+        summary = state.get(f"job:{job_id}")
+        if not summary or summary["status"] not in JOB_ACTIVE_STATUSES:
+            return False
+        if not _job_lease_alive(summary):
+            _fail_abandoned_job(summary)
+            return True
+        state.set(f"job-cancel:{job_id}", True, ttl=JOB_SUMMARY_SECONDS)
+        return True
+    if job["status"] not in JOB_ACTIVE_STATUSES:
+        return False
+    job["cancel_event"].set()
+    if job.get("future") and job["future"].cancel():
+        _finish_job(job, "cancelled")
+    return True
+
+
+def list_jobs(limit=5):
+    """Active jobs first, then the most recently finished ones."""
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    active = [j for j in jobs if j["status"] in JOB_ACTIVE_STATUSES] + _remote_active_jobs()
+    finished = sorted((j for j in jobs if j["status"] not in JOB_ACTIVE_STATUSES), key=lambda j: j["finished_at"], reverse=True)
+    return (active + finished)[:limit]
+
+
+def submit_job_or_notify(job_type, label, user_id, func, *args):
+    job, reason = submit_job(job_type, label, user_id, func, *args)
+    if not job:
         try:
-            bot_client.chat_postMessage(channel=ADMIN_USER_ID, text="⏹️ Scheduled send cancelled.")
+            bot_client.chat_postMessage(channel=user_id, text=f"⚠️ {reason}")
         except Exception as e:
-            print(f"Could not notify admin of cancellation: {e}")
+            logger.error(f"Could not notify admin: {e}")
+    return job
+
+# =========================
+# METRICS ENDPOINT
+# =========================
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+register_gauge("dispatch_queue_depth", "Pending interaction tasks per dispatcher shard.",
+               lambda: {(("shard", i),): q.qsize() for i, q in enumerate(_dispatch_queues)})
+register_gauge("notion_write_buffer_depth", "Typeform submissions waiting to be written to Notion.",
+               lambda: state.size(SUBMISSION_QUEUE))
+register_gauge("jobs_active", "Background jobs by type and status.",
+               lambda: {
+                   (("status", status), ("type", job_type)): sum(1 for j in list(_jobs.values()) if j["type"] == job_type and j["status"] == status)
+                   for job_type in JOB_TYPE_LIMITS for status in JOB_ACTIVE_STATUSES
+               })
+
+
+@app.route("/metrics")
+def metrics():
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return "", 401
+    return app.response_class(render_metrics(), mimetype="text/plain; version=0.0.4")
 
 # =========================
 # ROOT
@@ -1163,7 +3986,9 @@ def send_messages():
     user_id = request.form.get("user_id")
     if user_id != ADMIN_USER_ID:
         return jsonify({"response_type": "ephemeral", "text": "You are not allowed to use this command."}), 200
-    threading.Thread(target=process_messages, args=(user_id, "user", admin_session["selected_startup_ids"], admin_session["message_template"])).start()
+    job, reason = submit_job("blast", "Message blast", user_id, process_messages, user_id, "user", admin_session["selected_startup_ids"], admin_session["message_template"])
+    if not job:
+        return jsonify({"response_type": "ephemeral", "text": f"⚠️ {reason}"}), 200
     return jsonify({"response_type": "ephemeral", "text": "Blasting messages now. Check your DMs for a confirmation when it's done."}), 200
 
 
@@ -1172,7 +3997,14 @@ def trigger_health_check_slash():
     user_id = request.form.get("user_id")
     if user_id != ADMIN_USER_ID:
         return jsonify({"response_type": "ephemeral", "text": "You are not allowed to use this command."}), 200
-    threading.Thread(target=send_health_check_pings, args=(user_id,)).start()
+    if request.form.get("text", "").strip().lower() == "pending":
+        job, reason = submit_job("blast", "Health check reminders", user_id, send_health_check_pings, user_id, True)
+        if not job:
+            return jsonify({"response_type": "ephemeral", "text": f"⚠️ {reason}"}), 200
+        return jsonify({"response_type": "ephemeral", "text": "Reminding founders who haven't responded yet. You'll get a DM when it's done."}), 200
+    job, reason = submit_job("blast", "Health check pings", user_id, send_health_check_pings, user_id)
+    if not job:
+        return jsonify({"response_type": "ephemeral", "text": f"⚠️ {reason}"}), 200
     return jsonify({"response_type": "ephemeral", "text": "Sending health check pings now. You'll get a DM when it's done."}), 200
 
 
@@ -1181,7 +4013,9 @@ def trigger_digest_slash():
     user_id = request.form.get("user_id")
     if user_id != ADMIN_USER_ID:
         return jsonify({"response_type": "ephemeral", "text": "You are not allowed to use this command."}), 200
-    threading.Thread(target=send_weekly_digest).start()
+    job, reason = submit_job("digest", "Weekly digest", user_id, send_weekly_digest)
+    if not job:
+        return jsonify({"response_type": "ephemeral", "text": f"⚠️ {reason}"}), 200
     return jsonify({"response_type": "ephemeral", "text": "Generating digest now. Check your Slack channel in a moment."}), 200
 
 
@@ -1190,9 +4024,360 @@ def trigger_investor_update_slash():
     user_id = request.form.get("user_id")
     if user_id != ADMIN_USER_ID:
         return jsonify({"response_type": "ephemeral", "text": "You are not allowed to use this command."}), 200
-    threading.Thread(target=generate_and_send_report, args=(user_id,)).start()
+    if request.form.get("text", "").strip().lower() == "variants":
+        job, reason = submit_job("report", "Investor update variants", user_id, generate_and_send_report_variants, user_id)
+        if not job:
+            return jsonify({"response_type": "ephemeral", "text": f"⚠️ {reason}"}), 200
+        return jsonify({"response_type": "ephemeral", "text": "⏳ Generating investor update variants... you'll receive each PDF as a DM."}), 200
+    job, reason = submit_job("report", "Investor update", user_id, generate_and_send_report, user_id)
+    if not job:
+        return jsonify({"response_type": "ephemeral", "text": f"⚠️ {reason}"}), 200
     return jsonify({"response_type": "ephemeral", "text": "⏳ Generating investor update PDF... you'll receive it as a DM in about 30 seconds."}), 200
 
+@app.route("/syncroster", methods=["POST"])
+def trigger_roster_sync_slash():
+    user_id = request.form.get("user_id")
+    if user_id != ADMIN_USER_ID:
+        return jsonify({"response_type": "ephemeral", "text": "You are not allowed to use this command."}), 200
+    options = set(request.form.get("text", "").lower().split())
+    job, reason = submit_job("roster", "Roster sync", user_id, sync_roster, user_id, "prune" in options, "dry-run" in options)
+    if not job:
+        return jsonify({"response_type": "ephemeral", "text": f"⚠️ {reason}"}), 200
+    return jsonify({"response_type": "ephemeral", "text": "Syncing the roster from the founders channel. You'll get a DM with the changes."}), 200
+
+# =========================
+# ROSTER INDEX
+# =========================
+
+ROSTER_PAGE_SIZE = 10          # Slack caps checkbox groups at 10 options
+ROSTER_SEARCH_LIMIT = 100      # Slack caps external select responses at 100 options
+
+
+def roster_entry(row):
+    founder = str(row.get("founder_name", "?"))
+    startup = str(row.get("startup_name", "?"))
+    return {
+        "slack_user_id": str(row.get("slack_user_id", "")),
+        "founder_name": founder,
+        "startup_name": startup,
+        "label": f"{founder}  —  {startup}"[:75],
+        "search_key": f"{founder} {startup}".lower()
+    }
+
+
+def build_roster_index(df):
+    """Index the roster once so the Home tab and search never iterate the DataFrame."""
+    entries = []
+    position = {}
+    for _, row in df.iterrows():
+        slack_id = str(row.get("slack_user_id", ""))
+        if not slack_id or slack_id == "nan" or slack_id in position:
+            continue
+        position[slack_id] = len(entries)
+        entries.append(roster_entry(row))
+    return {"entries": entries, "position": position, "by_startup": index_by_startup(entries)}
+
+
+def index_by_startup(entries):
+    by_startup = {}
+    for entry in entries:
+        by_startup.setdefault(entry["startup_name"], []).append(entry["slack_user_id"])
+    return by_startup
+
+
+roster_index = build_roster_index(startups)
+
+
+def reload_roster_index():
+    global roster_index
+    roster_index = build_roster_index(startups)
+    _roster_page_options.cache_clear()
+
+
+# Once /syncroster has run, the roster lives in shared state: the worker that
+# synced bumps "roster:version", and every other worker (on any node, whose CSV
+# may be stale) reloads the DataFrame and index from state when it sees a
+# version it hasn't loaded. Until the first sync, the CSV is the roster.
+
+_roster_version = None
+_roster_reload_lock = threading.Lock()
+
+
+def publish_roster(df):
+    """Store the roster in shared state; returns the new roster version."""
+    rows = df.astype(object).where(df.notna(), None).to_dict("records")
+    state.set("roster", {"columns": [str(c) for c in df.columns], "rows": rows})
+    return state.incr("roster:version")
+
+
+def ensure_roster_fresh():
+    """Reload the roster if another worker synced a newer one."""
+    global startups, _roster_version
+    version = state.get("roster:version")
+    if version is None or version == _roster_version:
+        return
+    with _roster_reload_lock:
+        if version == _roster_version:
+            return
+        roster = state.get("roster")
+        if roster is None:
+            return
+        startups = pd.DataFrame(roster["rows"], columns=roster["columns"])
+        _roster_version = version
+        reload_roster_index()
+        logger.info(f"Roster reloaded from shared state (version {version}, {len(roster_index['entries'])} founders)")
+
+
+@app.before_request
+def refresh_roster():
+    ensure_roster_fresh()
+
+
+def update_roster_index(added_rows, removed_ids=()):
+    """Apply a roster diff to the index without re-reading the DataFrame; readers see the old or the new index, never a mix."""
+    global roster_index
+    removed_ids = set(removed_ids)
+    if removed_ids:
+        entries = [e for e in roster_index["entries"] if e["slack_user_id"] not in removed_ids]
+        position = {e["slack_user_id"]: i for i, e in enumerate(entries)}
+        by_startup = index_by_startup(entries)
+    else:
+        entries = list(roster_index["entries"])
+        position = dict(roster_index["position"])
+        by_startup = {k: list(v) for k, v in roster_index["by_startup"].items()}
+    for row in added_rows:
+        entry = roster_entry(row)
+        if entry["slack_user_id"] in position:
+            continue
+        position[entry["slack_user_id"]] = len(entries)
+        entries.append(entry)
+        by_startup.setdefault(entry["startup_name"], []).append(entry["slack_user_id"])
+    roster_index = {"entries": entries, "position": position, "by_startup": by_startup}
+    _roster_page_options.cache_clear()
+
+
+def roster_page_count():
+    return max(1, -(-len(roster_index["entries"]) // ROSTER_PAGE_SIZE))
+
+
+def roster_option(entry):
+    return {"text": {"type": "plain_text", "text": entry["label"], "emoji": False}, "value": entry["slack_user_id"]}
+
+
+@functools.lru_cache(maxsize=256)
+def _roster_page_options(page):
+    start = page * ROSTER_PAGE_SIZE
+    return tuple(roster_option(e) for e in roster_index["entries"][start:start + ROSTER_PAGE_SIZE])
+
+
+def roster_page_ids(page):
+    return {opt["value"] for opt in _roster_page_options(page)}
+
+
+def search_roster(query, limit=ROSTER_SEARCH_LIMIT):
+    """Return roster entries matching the query, word-prefix matches first."""
+    query = (query or "").strip().lower()
+    entries = roster_index["entries"]
+    if not query:
+        return entries[:limit]
+    prefix_matches = []
+    other_matches = []
+    for entry in entries:
+        key = entry["search_key"]
+        if query not in key:
+            continue
+        if key.startswith(query) or f" {query}" in key:
+            prefix_matches.append(entry)
+        else:
+            other_matches.append(entry)
+        if len(prefix_matches) >= limit:
+            break
+    return (prefix_matches + other_matches)[:limit]
+
+
+def selected_startup_count():
+    selected_ids = admin_session["selected_startup_ids"]
+    return len(roster_index["entries"]) if selected_ids is None else len(selected_ids)
+
+
+def update_page_selection(page, chosen_ids):
+    """Replace the selection for one roster page while keeping every other page untouched."""
+    page_ids = roster_page_ids(page)
+    selected_ids = admin_session["selected_startup_ids"]
+    current = set(roster_index["position"]) if selected_ids is None else set(selected_ids)
+    current = (current - page_ids) | (set(chosen_ids) & page_ids)
+    admin_session["selected_startup_ids"] = None if len(current) == len(roster_index["entries"]) else current
+
+
+def toggle_startup_selection(slack_id):
+    if slack_id not in roster_index["position"]:
+        return
+    selected_ids = admin_session["selected_startup_ids"]
+    current = set(roster_index["position"]) if selected_ids is None else set(selected_ids)
+    current ^= {slack_id}
+    admin_session["selected_startup_ids"] = None if len(current) == len(roster_index["entries"]) else current
+    admin_session["roster_page"] = roster_index["position"][slack_id] // ROSTER_PAGE_SIZE
+
+# =========================
+# ROSTER SYNC
+# =========================
+# /syncroster rebuilds the roster from the founders channel instead of editing the
+# CSV by hand. Channel members are streamed with cursor pagination and matched
+# against users.list (200 users per page, so a 200-founder cohort is a handful
+# of calls). Then:
+# - members not in the roster are added; their startup comes from the Slack
+#   profile field ROSTER_SYNC_STARTUP_FIELD (the profile "title" by default);
+# - roster rows without a slack_user_id are resolved by founder name;
+# - rows for people who left the channel are only dropped with "prune".
+# "dry-run" reports the diff without writing. The CSV is replaced atomically, the
+# roster is published to shared state for the other workers, and the local index
+# is patched with the diff rather than rebuilt.
+
+ROSTER_SYNC_CHANNEL = os.environ.get("ROSTER_SYNC_CHANNEL")
+ROSTER_SYNC_STARTUP_FIELD = os.environ.get("ROSTER_SYNC_STARTUP_FIELD", "title")
+ROSTER_SYNC_PAGE_SIZE = 200
+ROSTER_SYNC_REPORT_LIMIT = 20
+
+_roster_write_lock = threading.Lock()
+
+
+def slack_paginate(method, key, **kwargs):
+    """Yield every item of a cursor-paginated Slack list method."""
+    cursor = None
+    while True:
+        response = method(cursor=cursor, limit=ROSTER_SYNC_PAGE_SIZE, **kwargs)
+        yield from response.get(key, [])
+        cursor = (response.get("response_metadata") or {}).get("next_cursor")
+        if not cursor:
+            return
+
+
+def fetch_channel_founders(channel):
+    """Map user id -> Slack profile for every human member of the channel."""
+    member_ids = set(slack_paginate(bot_client.conversations_members, "members", channel=channel))
+    founders = {}
+    for user in slack_paginate(bot_client.users_list, "members"):
+        if user.get("id") not in member_ids or user.get("is_bot") or user.get("deleted") or user.get("id") == "USLACKBOT":
+            continue
+        founders[user["id"]] = user.get("profile") or {}
+        if len(founders) == len(member_ids):
+            break
+    return founders
+
+
+def founder_display_name(profile):
+    return (profile.get("real_name") or profile.get("display_name") or "").strip()
+
+
+def _name_key(name):
+    return " ".join(str(name).lower().split())
+
+
+def diff_roster(df, founders, prune=False):
+    """Return (rows_to_add, resolved {row_index: slack_id}, removed_ids, skipped_names)."""
+    known_ids = {str(v) for v in df["slack_user_id"] if pd.notna(v) and str(v)}
+    unresolved = {}
+    for i, row in df.iterrows():
+        if pd.isna(row["slack_user_id"]) or not str(row["slack_user_id"]).strip():
+            unresolved.setdefault(_name_key(row["founder_name"]), i)
+
+    added, resolved, skipped = [], {}, []
+    for slack_id, profile in founders.items():
+        if slack_id in known_ids:
+            continue
+        name = founder_display_name(profile)
+        row_index = unresolved.pop(_name_key(name), None)
+        if row_index is not None:
+            resolved[row_index] = slack_id
+            continue
+        startup = (profile.get(ROSTER_SYNC_STARTUP_FIELD) or "").strip()
+        if not name or not startup:
+            skipped.append(name or slack_id)
+            continue
+        added.append({"startup_name": startup, "founder_name": name, "slack_user_id": slack_id})
+
+    removed = sorted(known_ids - set(founders)) if prune else []
+    return added, resolved, removed, skipped
+
+
+def write_roster_csv(df):
+    tmp_path = f"{CSV_PATH}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, CSV_PATH)
+
+
+def apply_roster_diff(added, resolved, removed):
+    """Write the new roster, publish it to the other workers and patch the in-memory copies; returns the new DataFrame."""
+    global startups, _roster_version
+    df = startups.copy()
+    if resolved:
+        df["slack_user_id"] = df["slack_user_id"].astype(object)
+        for row_index, slack_id in resolved.items():
+            df.at[row_index, "slack_user_id"] = slack_id
+    # `resolved` holds labels of the current frame; read those rows before dropping or renumbering any.
+    indexed = [df.loc[i].to_dict() for i in resolved] + added
+    if removed:
+        df = df[~df["slack_user_id"].astype(str).isin(removed)]
+    if added:
+        df = pd.concat([df, pd.DataFrame(added, columns=["startup_name", "founder_name", "slack_user_id"])], ignore_index=True)
+    df = df.reset_index(drop=True)
+    write_roster_csv(df)
+    startups = df
+    _roster_version = publish_roster(df)
+
+    update_roster_index(indexed, removed)
+    selected_ids = admin_session["selected_startup_ids"]
+    if selected_ids is not None and removed:
+        admin_session["selected_startup_ids"] = set(selected_ids) - set(removed)
+    return df
+
+
+def _roster_sync_names(items):
+    names = list(items)
+    text = ", ".join(names[:ROSTER_SYNC_REPORT_LIMIT])
+    if len(names) > ROSTER_SYNC_REPORT_LIMIT:
+        text += f" and {len(names) - ROSTER_SYNC_REPORT_LIMIT} more"
+    return text
+
+
+def sync_roster(user_id, prune=False, dry_run=False):
+    if not ROSTER_SYNC_CHANNEL:
+        summary = "⚠️ ROSTER_SYNC_CHANNEL is not set, so there is no founders channel to sync from."
+    else:
+        started = time.perf_counter()
+        founders = fetch_channel_founders(ROSTER_SYNC_CHANNEL)
+        # Diff against the latest shared roster so two syncs on different workers can't drop each other's rows.
+        with shared_lock("roster-sync", ttl=60, timeout=30), _roster_write_lock:
+            ensure_roster_fresh()
+            added, resolved, removed, skipped = diff_roster(startups, founders, prune=prune)
+            resolved_names = [str(startups.at[i, "founder_name"]) for i in resolved]
+            if not dry_run and (added or resolved or removed):
+                apply_roster_diff(added, resolved, removed)
+        logger.info(
+            f"Roster sync: {len(added)} added, {len(resolved)} resolved, {len(removed)} removed, {len(skipped)} skipped",
+            extra={"fields": dict(members=len(founders), dry_run=dry_run, seconds=round(time.perf_counter() - started, 2))}
+        )
+
+        verb = "would be" if dry_run else "were"
+        lines = [f"{'🔎 Roster sync preview' if dry_run else '✅ Roster synced'} from <#{ROSTER_SYNC_CHANNEL}> ({len(founders)} members)."]
+        if added:
+            lines.append(f"*{len(added)} added:* {_roster_sync_names(r['founder_name'] for r in added)}")
+        if resolved:
+            lines.append(f"*{len(resolved)} matched to existing rows:* {_roster_sync_names(resolved_names)}")
+        if removed:
+            lines.append(f"*{len(removed)} {verb} removed* (no longer in the channel).")
+        if skipped:
+            lines.append(f"*{len(skipped)} skipped* — set their Slack profile {ROSTER_SYNC_STARTUP_FIELD} to the startup name: {_roster_sync_names(skipped)}")
+        if not (added or resolved or removed or skipped):
+            lines.append("The roster was already up to date.")
+        summary = "\n".join(lines)
+    try:
+        bot_client.chat_postMessage(channel=user_id, text=summary)
+    except Exception as e:
+        logger.error(f"Could not notify admin: {e}")
+    if not dry_run:
+        publish_home_view(user_id)
+
 # =========================
 # HOME TAB VIEWS
 # =========================
@@ -1203,24 +4388,102 @@ def format_scheduled_time_local(dt_utc):
     return local_dt.strftime("%d %b %Y at %H:%M (%Z)")
 
 
-def build_admin_home_view():
-    startup_count = len(startups)
+def build_roster_blocks():
+    """Render one roster page plus search and paging controls — constant size for any roster."""
     selected_ids = admin_session["selected_startup_ids"]
+    total = len(roster_index["entries"])
+    page_count = roster_page_count()
+    page = min(max(admin_session.get("roster_page", 0), 0), page_count - 1)
+    admin_session["roster_page"] = page
+
+    options = list(_roster_page_options(page))
+    initial_options = [opt for opt in options if selected_ids is None or opt["value"] in selected_ids]
+
+    checkboxes = {"type": "checkboxes", "action_id": "startup_selector", "options": options}
+    if initial_options:
+        checkboxes["initial_options"] = initial_options
+
+    start = page * ROSTER_PAGE_SIZE
+    paging_elements = []
+    if page > 0:
+        paging_elements.append({"type": "button", "text": {"type": "plain_text", "text": "‹ Previous", "emoji": False}, "action_id": "roster_prev_page"})
+    if page < page_count - 1:
+        paging_elements.append({"type": "button", "text": {"type": "plain_text", "text": "Next ›", "emoji": False}, "action_id": "roster_next_page"})
+    paging_elements.append({"type": "button", "text": {"type": "plain_text", "text": "Select all", "emoji": False}, "action_id": "roster_select_all"})
+    paging_elements.append({"type": "button", "text": {"type": "plain_text", "text": "Select none", "emoji": False}, "action_id": "roster_select_none"})
+
+    blocks = [
+        {"type": "actions", "elements": [{
+            "type": "external_select", "action_id": "roster_search", "min_query_length": 1,
+            "placeholder": {"type": "plain_text", "text": "Search founders or startups to toggle...", "emoji": False}
+        }]}
+    ]
+    if options:
+        # The page travels with the action, so a tick on a stale Home tab applies to the page it was shown on.
+        blocks.append({"type": "actions", "block_id": f"roster_page:{page}", "elements": [checkboxes]})
+    blocks.append({"type": "context", "elements": [{"type": "mrkdwn", "text": f"Showing {start + 1 if total else 0}–{min(start + ROSTER_PAGE_SIZE, total)} of {total}  ·  Page {page + 1}/{page_count}"}]})
+    blocks.append({"type": "actions", "elements": paging_elements})
+    return blocks
+
+
+JOB_STATUS_LABELS = {
+    "queued": "⏳ Queued",
+    "running": "▶️ Running",
+    "done": "✅ Done",
+    "failed": "❌ Failed",
+    "cancelled": "⏹️ Cancelled"
+}
+
+
+def build_job_blocks():
+    jobs = list_jobs()
+    if not jobs:
+        return []
+    blocks = [{"type": "header", "text": {"type": "plain_text", "text": "Background jobs", "emoji": False}}]
+    for job in jobs:
+        progress = f"  ·  {job['done']}/{job['total']}" if job["total"] else ""
+        block = {"type": "section", "text": {"type": "mrkdwn", "text": f"*{job['label']}*  ·  {JOB_STATUS_LABELS[job['status']]}{progress}"}}
+        if job["status"] in JOB_ACTIVE_STATUSES:
+            block["accessory"] = {
+                "type": "button", "text": {"type": "plain_text", "text": "Cancel", "emoji": False},
+                "action_id": "cancel_job", "value": job["id"], "style": "danger"
+            }
+        blocks.append(block)
+    blocks.append({"type": "divider"})
+    return blocks
+
+
+def build_campaign_blocks():
+    try:
+        funnels = campaign_funnels()
+    except Exception as e:
+        logger.error(f"Could not load campaign analytics: {e}")
+        return []
+    if not funnels:
+        return []
+
+    def rate(count, total):
+        return f"{count} ({count / total:.0%})" if total else "0"
+
+    blocks = [{"type": "header", "text": {"type": "plain_text", "text": "Recent Campaigns", "emoji": False}}]
+    for f in funnels:
+        sent_on = datetime.fromtimestamp(f["created_at"], pytz.timezone(admin_session["timezone"])).strftime("%d %b %H:%M")
+        stages = [f"{f['pinged']} pinged", f"{rate(f['replied'], f['pinged'])} replied"]
+        if CAMPAIGN_LINK_BASE_URL and f["kind"] != "blast":
+            stages.append(f"{rate(f['opened'], f['pinged'])} opened the form")
+        stages.append(f"{rate(f['submitted'], f['pinged'])} submitted")
+        blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": f"*{f['label']}*  ·  {sent_on}\n{'  →  '.join(stages)}"}})
+    blocks.append({"type": "divider"})
+    return blocks
+
+
+def build_admin_home_view():
+    startup_count = len(roster_index["entries"])
     current_template = admin_session["message_template"]
     scheduled_time = admin_session["scheduled_time"]
-    selected_count = startup_count if selected_ids is None else len(selected_ids)
+    selected_count = selected_startup_count()
     skipped_count = startup_count - selected_count
 
-    startup_options = []
-    initial_options = []
-    for _, row in startups.iterrows():
-        slack_id = str(row.get("slack_user_id", ""))
-        label = f"{row.get('founder_name', '?')}  —  {row.get('startup_name', '?')}"
-        option = {"text": {"type": "plain_text", "text": label[:75], "emoji": False}, "value": slack_id}
-        startup_options.append(option)
-        if selected_ids is None or slack_id in selected_ids:
-            initial_options.append(option)
-
     scheduled_status_blocks = []
     if scheduled_time:
         scheduled_status_blocks = [
@@ -1250,6 +4513,7 @@ def build_admin_home_view():
             {"type": "section", "text": {"type": "mrkdwn", "text": "Outreach that hits different. Select your founders, craft your message, blast it out."}},
             {"type": "divider"},
             *scheduled_status_blocks,
+            *build_job_blocks(),
             {"type": "section", "fields": [
                 {"type": "mrkdwn", "text": f"*{startup_count}*\nFounders in the roster"},
                 {"type": "mrkdwn", "text": f"*{selected_count}*\nSelected to receive"},
@@ -1259,7 +4523,7 @@ def build_admin_home_view():
             {"type": "divider"},
             {"type": "header", "text": {"type": "plain_text", "text": "Who's getting this?", "emoji": False}},
             {"type": "section", "text": {"type": "mrkdwn", "text": "Uncheck anyone you want to skip. Everyone else gets the message."}},
-            {"type": "actions", "elements": [{"type": "checkboxes", "action_id": "startup_selector", "options": startup_options, "initial_options": initial_options}]},
+            *build_roster_blocks(),
             {"type": "divider"},
             {"type": "header", "text": {"type": "plain_text", "text": "The message", "emoji": False}},
             {
@@ -1267,7 +4531,7 @@ def build_admin_home_view():
                 "text": {"type": "mrkdwn", "text": f"_{current_template}_"},
                 "accessory": {"type": "button", "text": {"type": "plain_text", "text": "Edit", "emoji": False}, "action_id": "open_message_editor", "style": "primary"}
             },
-            {"type": "context", "elements": [{"type": "mrkdwn", "text": "Live preview  —  " + current_template.format(founder_name="Maria", startup_name="Acme")}]},
+            {"type": "context", "elements": [{"type": "mrkdwn", "text": "Live preview  —  " + template_preview(current_template)}]},
             {"type": "divider"},
             {"type": "header", "text": {"type": "plain_text", "text": "Ready to launch?", "emoji": False}},
             {"type": "section", "text": {"type": "mrkdwn", "text": f"You're about to reach *{selected_count} founder(s)*. You'll get a DM the moment it's done."}},
@@ -1299,10 +4563,21 @@ def build_admin_home_view():
                         "deny": {"type": "plain_text", "text": "Not yet"}
                     }
                 },
+                {
+                    "type": "button", "text": {"type": "plain_text", "text": "Remind Non-respondents", "emoji": False},
+                    "action_id": "send_health_check_reminder_button",
+                    "confirm": {
+                        "title": {"type": "plain_text", "text": "Send reminders?"},
+                        "text": {"type": "mrkdwn", "text": "This will DM only the founders who haven't submitted this month's health check."},
+                        "confirm": {"type": "plain_text", "text": "Send them"},
+                        "deny": {"type": "plain_text", "text": "Not yet"}
+                    }
+                },
                 {"type": "button", "text": {"type": "plain_text", "text": "Generate Digest", "emoji": False}, "action_id": "send_digest_button"}
             ]},
             {"type": "context", "elements": [{"type": "mrkdwn", "text": "Health checks go out automatically on the 1st of each month. Digest posts every Monday at 08:00."}]},
             {"type": "divider"},
+            *build_campaign_blocks(),
             {"type": "header", "text": {"type": "plain_text", "text": "Investor Update", "emoji": False}},
             {"type": "section", "text": {"type": "mrkdwn", "text": "Generate a professional PDF investor update from this month's health check data. Auto-runs on the 10th of each month."}},
             {"type": "actions", "elements": [
@@ -1330,7 +4605,7 @@ def build_message_editor_modal():
         "submit": {"type": "plain_text", "text": "Save", "emoji": False},
         "close": {"type": "plain_text", "text": "Cancel", "emoji": False},
         "blocks": [
-            {"type": "section", "text": {"type": "mrkdwn", "text": "*Make it yours.*\nUse `{founder_name}` and `{startup_name}` as dynamic placeholders."}},
+            {"type": "section", "text": {"type": "mrkdwn", "text": "*Make it yours.*\nUse `{founder_name}`, `{startup_name}` or any other roster column as a placeholder. Wrap text in `{?column}...{/column}` to include it only when that column is filled in."}},
             {"type": "divider"},
             {
                 "type": "input", "block_id": "message_editor_block",
@@ -1377,28 +4652,282 @@ def build_guest_home_view():
         ]
     }
 
+# =========================
+# HOME TAB PUBLISHER
+# =========================
+
+HOME_PUBLISH_DEBOUNCE_SECONDS = 0.75
+
+_home_publish_lock = threading.Lock()
+_home_publish_state = {}
+
+
+def _home_state_for(user_id):
+    state = _home_publish_state.get(user_id)
+    if state is None:
+        state = {"timer": None, "content_hash": None, "slack_hash": None, "lock": threading.Lock()}
+        _home_publish_state[user_id] = state
+    return state
+
+
+def render_home_view(user_id):
+    ensure_roster_fresh()
+    return build_admin_home_view() if user_id == ADMIN_USER_ID else build_guest_home_view()
+
+
+def record_home_view(user_id, view):
+    """Remember the hash of the view Slack currently holds (e.g. from app_home_opened)."""
+    with _home_publish_lock:
+        state = _home_state_for(user_id)
+        if view and view.get("hash"):
+            state["slack_hash"] = view["hash"]
+        else:
+            # Slack has no Home view for this user yet, so the next flush must publish.
+            state["slack_hash"] = None
+            state["content_hash"] = None
+
+
+def publish_home_view(user_id, delay=HOME_PUBLISH_DEBOUNCE_SECONDS):
+    """Coalesce Home tab refreshes per user into a single publish after a short debounce window."""
+    with _home_publish_lock:
+        state = _home_state_for(user_id)
+        if state["timer"]:
+            state["timer"].cancel()
+        timer = threading.Timer(delay, with_current_context(_flush_home_view), args=(user_id,))
+        timer.daemon = True
+        state["timer"] = timer
+        timer.start()
+
+
+def _flush_home_view(user_id):
+    with _home_publish_lock:
+        state = _home_state_for(user_id)
+        state["timer"] = None
+
+    # Serialise flushes per user so two publishes never race on the same Slack hash.
+    with state["lock"]:
+        view = render_home_view(user_id)
+        content_hash = hashlib.sha1(json.dumps(view, sort_keys=True).encode("utf-8")).hexdigest()
+
+        with _home_publish_lock:
+            if state["content_hash"] == content_hash:
+                return
+            slack_hash = state["slack_hash"]
+
+        kwargs = {"user_id": user_id, "view": view}
+        if slack_hash:
+            kwargs["hash"] = slack_hash
+
+        try:
+            response = bot_client.views_publish(**kwargs)
+        except SlackApiError as e:
+            if e.response.get("error") == "hash_conflict":
+                # Someone else published since our last render — drop the stale hash and re-render.
+                log_sampled(f"Home tab hash conflict for {user_id}, re-rendering.")
+                with _home_publish_lock:
+                    state["slack_hash"] = None
+                    state["content_hash"] = None
+                publish_home_view(user_id, delay=0)
+            else:
+                logger.error(f"Failed to publish Home tab: {e}")
+            return
+        except Exception as e:
+            logger.error(f"Failed to publish Home tab: {e}")
+            return
+
+        with _home_publish_lock:
+            state["content_hash"] = content_hash
+            state["slack_hash"] = (response.get("view") or {}).get("hash")
+
+# =========================
+# EVENT DISPATCHER
+# =========================
+# Slack expects an ack within 3 seconds, so request handlers only validate and
+# enqueue. Work is sharded by user onto a fixed set of workers, each with its own
+# bounded queue, which keeps one user's actions in order and pushes back (503)
+# instead of piling up threads when Slack or the APIs are slow.
+
+DISPATCH_WORKERS = int(os.environ.get("DISPATCH_WORKERS", 8))
+DISPATCH_QUEUE_SIZE = int(os.environ.get("DISPATCH_QUEUE_SIZE", 100))
+DISPATCH_ENQUEUE_TIMEOUT_SECONDS = 0.5
+DELIVERY_DEDUP_TTL_SECONDS = 60 * 10
+
+_dispatch_lock = threading.Lock()
+_dispatch_queues = []
+
+
+def _dispatch_worker(work_queue):
+    while True:
+        func, args, context = work_queue.get()
+        try:
+            context.run(func, *args)
+        except Exception as e:
+            logger.error(f"Dispatched task {func.__name__} failed: {e}")
+        finally:
+            work_queue.task_done()
+
+
+def _ensure_dispatcher():
+    # Started lazily so each gunicorn worker spawns its own pool after fork.
+    with _dispatch_lock:
+        if not _dispatch_queues:
+            for _ in range(DISPATCH_WORKERS):
+                work_queue = queue.Queue(maxsize=DISPATCH_QUEUE_SIZE)
+                threading.Thread(target=_dispatch_worker, args=(work_queue,), daemon=True).start()
+                _dispatch_queues.append(work_queue)
+    return _dispatch_queues
+
+
+def dispatch(key, func, *args):
+    """Enqueue work for a user. Returns False when that user's worker queue is full."""
+    queues = _ensure_dispatcher()
+    shard = int(hashlib.md5(str(key).encode("utf-8")).hexdigest(), 16) % len(queues)
+    try:
+        queues[shard].put((func, args, contextvars.copy_context()), timeout=DISPATCH_ENQUEUE_TIMEOUT_SECONDS)
+        return True
+    except queue.Full:
+        logger.error(f"Dispatch queue {shard} full, rejecting {func.__name__} for {key}")
+        return False
+
+
+def is_duplicate_delivery(delivery_id):
+    """Record a delivery id and report whether it was already seen within the TTL, by any worker."""
+    if not delivery_id:
+        return False
+    return not state.add(f"delivery:{delivery_id}", WORKER_ID, ttl=DELIVERY_DEDUP_TTL_SECONDS)
+
+
+def forget_delivery(delivery_id):
+    """Undo is_duplicate_delivery when the work couldn't be queued, so Slack's retry is processed."""
+    if delivery_id:
+        state.delete(f"delivery:{delivery_id}", expected=WORKER_ID)
+
 # =========================
 # SLACK EVENTS
 # =========================
 
+def handle_app_home_opened(user_id, view):
+    record_home_view(user_id, view)
+    publish_home_view(user_id, delay=0)
+
+
 @app.route("/slack/events", methods=["POST"])
 def slack_events():
     data = request.json
     if data.get("type") == "url_verification":
         return jsonify({"challenge": data["challenge"]})
-    if data.get("event", {}).get("type") == "app_home_opened":
-        user_id = data["event"]["user"]
-        try:
-            view = build_admin_home_view() if user_id == ADMIN_USER_ID else build_guest_home_view()
-            bot_client.views_publish(user_id=user_id, view=view)
-        except Exception as e:
-            print(f"Failed to publish Home tab: {e}")
+    if is_duplicate_delivery(data.get("event_id")):
+        log_sampled(f"Dropping redelivered event {data.get('event_id')} (retry {request.headers.get('X-Slack-Retry-Num', '0')})")
+        return "", 200
+    event = data.get("event", {})
+    queued = True
+    if event.get("type") == "app_home_opened":
+        user_id = event["user"]
+        queued = dispatch(user_id, handle_app_home_opened, user_id, event.get("view"))
+    elif is_founder_dm_reply(event):
+        queued = dispatch(event["user"], record_campaign_reply, event["channel"], event.get("thread_ts") or event["ts"])
+    if not queued:
+        forget_delivery(data.get("event_id"))
+        return "", 503
     return "", 200
 
+
+def is_founder_dm_reply(event):
+    return (
+        event.get("type") == "message" and event.get("channel_type") == "im"
+        and not event.get("subtype") and not event.get("bot_id")
+        and event.get("user") in roster_index["position"]
+    )
+
 # =========================
 # INTERACTIONS
 # =========================
 
+def handle_message_editor_submission(user_id, new_text):
+    if new_text:
+        admin_session["message_template"] = new_text
+    publish_home_view(user_id)
+
+
+def handle_schedule_submission(user_id, utc_dt, tz_str):
+    admin_session["timezone"] = tz_str
+    schedule_messages(user_id=user_id, scheduled_dt_utc=utc_dt, client_type="bot", selected_ids=admin_session["selected_startup_ids"], message_template=admin_session["message_template"])
+
+    try:
+        bot_client.chat_postMessage(channel=user_id, text=f"✅ Scheduled! Your message goes out on *{format_scheduled_time_local(utc_dt)}*.")
+    except Exception as e:
+        logger.error(f"Could not send schedule confirmation: {e}")
+
+    publish_home_view(user_id)
+
+
+# trigger_id expires 3 seconds after the click, so modals are opened in the
+# request handler rather than behind the dispatcher queue.
+MODAL_ACTIONS = {
+    "open_message_editor": build_message_editor_modal,
+    "open_schedule_modal": build_schedule_modal
+}
+
+
+def open_modal_for_action(action_id, trigger_id):
+    try:
+        bot_client.views_open(trigger_id=trigger_id, view=MODAL_ACTIONS[action_id]())
+    except Exception as e:
+        logger.error(f"Failed to open modal for {action_id}: {e}")
+
+
+def roster_page_from_block(block_id):
+    """Page number from a roster checkbox block_id ("roster_page:3"), else the session's current page."""
+    prefix, _, page = (block_id or "").partition(":")
+    if prefix == "roster_page" and page.isdigit():
+        return int(page)
+    return admin_session["roster_page"]
+
+
+def handle_block_action(user_id, payload):
+    actions = payload.get("actions", [])
+    if not actions:
+        return
+
+    action_id = actions[0]["action_id"]
+
+    if action_id == "startup_selector":
+        selected = actions[0].get("selected_options", [])
+        update_page_selection(roster_page_from_block(actions[0].get("block_id")), [opt["value"] for opt in selected])
+    elif action_id == "roster_search":
+        selected_option = actions[0].get("selected_option") or {}
+        toggle_startup_selection(selected_option.get("value", ""))
+    elif action_id == "roster_prev_page":
+        admin_session["roster_page"] = max(admin_session["roster_page"] - 1, 0)
+    elif action_id == "roster_next_page":
+        admin_session["roster_page"] = min(admin_session["roster_page"] + 1, roster_page_count() - 1)
+    elif action_id == "roster_select_all":
+        admin_session["selected_startup_ids"] = None
+    elif action_id == "roster_select_none":
+        admin_session["selected_startup_ids"] = set()
+    elif action_id == "send_messages_button":
+        submit_job_or_notify("blast", "Message blast", user_id, process_messages, user_id, "bot", admin_session["selected_startup_ids"], admin_session["message_template"])
+    elif action_id == "cancel_schedule_button":
+        cancel_scheduled_send(notify=True)
+    elif action_id == "reset_defaults_button":
+        cancel_scheduled_send(notify=False)
+        admin_session["selected_startup_ids"] = None
+        admin_session["roster_page"] = 0
+        admin_session["message_template"] = DEFAULT_MESSAGE_TEMPLATE
+    elif action_id == "send_health_check_button":
+        submit_job_or_notify("blast", "Health check pings", user_id, send_health_check_pings, user_id)
+    elif action_id == "send_health_check_reminder_button":
+        submit_job_or_notify("blast", "Health check reminders", user_id, send_health_check_pings, user_id, True)
+    elif action_id == "send_digest_button":
+        submit_job_or_notify("digest", "Weekly digest", user_id, send_weekly_digest)
+    elif action_id == "generate_investor_update_button":
+        submit_job_or_notify("report", "Investor update", user_id, generate_and_send_report, user_id)
+    elif action_id == "cancel_job":
+        cancel_job(actions[0].get("value", ""))
+
+    publish_home_view(user_id)
+
+
 @app.route("/slack/interactions", methods=["POST"])
 def slack_interactions():
     payload = json.loads(request.form["payload"])
@@ -1411,14 +4940,18 @@ def slack_interactions():
     if payload_type == "view_submission":
         callback_id = payload["view"]["callback_id"]
 
+        # Modal validation stays inline because Slack only shows errors returned in the ack.
         if callback_id == "message_editor_modal":
             new_text = (
                 payload.get("view", {}).get("state", {}).get("values", {})
                 .get("message_editor_block", {}).get("message_editor", {}).get("value", "") or ""
             ).strip()
             if new_text:
-                admin_session["message_template"] = new_text
-            threading.Thread(target=lambda: bot_client.views_publish(user_id=user_id, view=build_admin_home_view())).start()
+                error = validate_template(new_text)
+                if error:
+                    return jsonify({"response_action": "errors", "errors": {"message_editor_block": error}}), 200
+            if not dispatch(user_id, handle_message_editor_submission, user_id, new_text):
+                return "", 503
             return "", 200
 
         if callback_id == "schedule_modal":
@@ -1436,84 +4969,86 @@ def slack_interactions():
                 local_dt = tz.localize(datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M"))
                 utc_dt = local_dt.astimezone(pytz.utc)
             except Exception as e:
-                print(f"[ERROR] Failed to parse schedule datetime: {e}")
+                logger.error(f"Failed to parse schedule datetime: {e}")
                 return "", 200
 
             if utc_dt <= datetime.now(pytz.utc):
                 return jsonify({"response_action": "errors", "errors": {"schedule_date_block": "The scheduled time must be in the future."}}), 200
 
-            admin_session["timezone"] = tz_str
-            schedule_messages(user_id=user_id, scheduled_dt_utc=utc_dt, client_type="bot", selected_ids=admin_session["selected_startup_ids"], message_template=admin_session["message_template"])
-
-            try:
-                bot_client.chat_postMessage(channel=user_id, text=f"✅ Scheduled! Your message goes out on *{format_scheduled_time_local(utc_dt)}*.")
-            except Exception as e:
-                print(f"Could not send schedule confirmation: {e}")
-
-            threading.Thread(target=lambda: bot_client.views_publish(user_id=user_id, view=build_admin_home_view())).start()
+            if not dispatch(user_id, handle_schedule_submission, user_id, utc_dt, tz_str):
+                return "", 503
             return "", 200
 
     if payload_type == "block_actions":
         actions = payload.get("actions", [])
-        if not actions:
-            return "", 200
-
-        action_id = actions[0]["action_id"]
-
-        if action_id == "open_message_editor":
-            try:
-                bot_client.views_open(trigger_id=payload["trigger_id"], view=build_message_editor_modal())
-            except Exception as e:
-                print(f"Failed to open modal: {e}")
+        if actions and actions[0]["action_id"] in MODAL_ACTIONS:
+            open_modal_for_action(actions[0]["action_id"], payload["trigger_id"])
             return "", 200
+        if not dispatch(user_id, handle_block_action, user_id, payload):
+            return "", 503
 
-        if action_id == "open_schedule_modal":
-            try:
-                bot_client.views_open(trigger_id=payload["trigger_id"], view=build_schedule_modal())
-            except Exception as e:
-                print(f"Failed to open schedule modal: {e}")
-            return "", 200
+    return "", 200
 
-        if action_id == "startup_selector":
-            selected = actions[0].get("selected_options", [])
-            admin_session["selected_startup_ids"] = ({opt["value"] for opt in selected} if selected else set())
-        elif action_id == "send_messages_button":
-            threading.Thread(target=process_messages, args=(user_id, "bot", admin_session["selected_startup_ids"], admin_session["message_template"])).start()
-        elif action_id == "cancel_schedule_button":
-            cancel_scheduled_send(notify=True)
-        elif action_id == "reset_defaults_button":
-            cancel_scheduled_send(notify=False)
-            admin_session["selected_startup_ids"] = None
-            admin_session["message_template"] = DEFAULT_MESSAGE_TEMPLATE
-        elif action_id == "send_health_check_button":
-            threading.Thread(target=send_health_check_pings, args=(user_id,)).start()
-        elif action_id == "send_digest_button":
-            threading.Thread(target=send_weekly_digest).start()
-        elif action_id == "generate_investor_update_button":
-            threading.Thread(target=generate_and_send_report, args=(user_id,)).start()
+# =========================
+# EXTERNAL SELECT OPTIONS
+# =========================
 
-        try:
-            bot_client.views_publish(user_id=user_id, view=build_admin_home_view())
-        except Exception as e:
-            print(f"Failed to refresh Home tab: {e}")
+@app.route("/slack/options", methods=["POST"])
+def slack_options():
+    payload = json.loads(request.form["payload"])
+    if payload.get("user", {}).get("id") != ADMIN_USER_ID:
+        return jsonify({"options": []}), 200
+    if payload.get("type") != "block_suggestion" or payload.get("action_id") != "roster_search":
+        return jsonify({"options": []}), 200
 
-    return "", 200
+    selected_ids = admin_session["selected_startup_ids"]
+    options = []
+    for entry in search_roster(payload.get("value", "")):
+        is_selected = selected_ids is None or entry["slack_user_id"] in selected_ids
+        label = f"{'✓' if is_selected else '○'} {entry['label']}"[:75]
+        options.append({"text": {"type": "plain_text", "text": label, "emoji": False}, "value": entry["slack_user_id"]})
+    return jsonify({"options": options}), 200
 
 # =========================
 # HELPERS
 # =========================
 
 def startup_count_for_session():
-    selected_ids = admin_session["selected_startup_ids"]
-    return len(startups) if selected_ids is None else len(selected_ids)
+    return selected_startup_count()
 
 # =========================
 # RUN APP
 # =========================
 
-if __name__ == "__main__":
+# =========================
+# SCHEDULERS
+# =========================
+# Every worker may run the schedulers: each cron run and scheduled send is
+# claimed in shared state, so it fires once however many workers are up.
+# gunicorn never runs __main__, so set START_SCHEDULERS=1 there. Report variant
+# workers (spawned, so they re-import this module) never start them: a cron or
+# scheduled send claimed in a short-lived pool child would be lost with it.
+
+_schedulers_started = False
+
+
+def start_schedulers():
+    global _schedulers_started
+    if _schedulers_started:
+        return
+    _schedulers_started = True
     schedule_monthly_health_check()
     schedule_weekly_digest()
     schedule_monthly_investor_update()
+    restore_scheduled_send()
+    resume_pending_submissions()
+
+
+if os.environ.get("START_SCHEDULERS") == "1" and multiprocessing.parent_process() is None:
+    start_schedulers()
+
+
+if __name__ == "__main__":
+    start_schedulers()
     port = int(os.environ.get("PORT", 3000))
     app.run(host="0.0.0.0", port=port)
\ No newline at end of file
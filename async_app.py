@@ -0,0 +1,600 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import httpx
+import pytz
+from a2wsgi import WSGIMiddleware
+from openai import AsyncOpenAI
+from slack_sdk.http_retry.builtin_async_handlers import AsyncRateLimitErrorRetryHandler
+from slack_sdk.web.async_client import AsyncWebClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+
+import app as core
+
+logger = core.logger
+
+# =========================
+# CONFIGURATION
+# =========================
+# Async variant of the bot for ASGI servers, e.g.
+#   uvicorn async_app:asgi_app --host 0.0.0.0 --port 3000
+# The long-running outbound paths (blasts, pings, digest, investor update and
+# the Typeform company match) run as coroutines on one event loop with bounded
+# concurrency per integration. The slash commands go through core's job
+# executor, so they share its per-type limits, progress and cancellation. Home tab, events and interactions are served by
+# the existing Flask app mounted underneath.
+
+SLACK_CONCURRENCY = int(os.environ.get("ASYNC_SLACK_CONCURRENCY", 20))
+NOTION_CONCURRENCY = int(os.environ.get("ASYNC_NOTION_CONCURRENCY", 3))
+OPENAI_CONCURRENCY = int(os.environ.get("ASYNC_OPENAI_CONCURRENCY", 8))
+
+NOTION_API_URL = core.NOTION_API_URL
+NOTION_VERSION = core.NOTION_VERSION
+
+user_client = AsyncWebClient(token=core.USER_TOKEN, base_url=core.SLACK_API_URL, retry_handlers=[AsyncRateLimitErrorRetryHandler(max_retry_count=3)])
+bot_client = AsyncWebClient(token=core.BOT_TOKEN, base_url=core.SLACK_API_URL, retry_handlers=[AsyncRateLimitErrorRetryHandler(max_retry_count=3)])
+openai_client = AsyncOpenAI(
+    api_key=core.OPENAI_API_KEY, base_url=core.LLM_BASE_URL,
+    timeout=core.LLM_TIMEOUT_SECONDS, max_retries=0
+)
+notion_http = httpx.AsyncClient(
+    base_url=NOTION_API_URL,
+    headers={
+        "Authorization": f"Bearer {core.NOTION_TOKEN}",
+        "Notion-Version": NOTION_VERSION,
+        "Content-Type": "application/json"
+    },
+    timeout=30,
+    limits=httpx.Limits(max_connections=NOTION_CONCURRENCY * 2)
+)
+
+slack_semaphore = asyncio.Semaphore(SLACK_CONCURRENCY)
+notion_semaphore = asyncio.Semaphore(NOTION_CONCURRENCY)
+openai_semaphore = asyncio.Semaphore(OPENAI_CONCURRENCY)
+
+_background_tasks = set()
+
+# =========================
+# BACKGROUND TASKS
+# =========================
+
+def submit_job(job_type, label, user_id, coro_fn, *args):
+    """Run a coroutine as a core job: same per-type slot lease, id, progress and cancellation as the Flask app.
+
+    Returns the reason the job was rejected, or None. The job's pool thread waits
+    while the coroutine runs on this event loop with the job as its current job."""
+    loop = asyncio.get_running_loop()
+
+    async def run_on_loop(job):
+        _background_tasks.add(asyncio.current_task())
+        core.bind_current_job(job)
+        try:
+            await coro_fn(*args)
+        finally:
+            _background_tasks.discard(asyncio.current_task())
+
+    def run():
+        asyncio.run_coroutine_threadsafe(run_on_loop(core.current_job()), loop).result()
+
+    job, reason = core.submit_job(job_type, label, user_id, run)
+    return None if job else reason
+
+# =========================
+# SLACK HELPERS
+# =========================
+
+async def post_message(client, channel, text):
+    async with slack_semaphore:
+        with core.track_call("slack", "chat.postMessage"):
+            return await client.chat_postMessage(channel=channel, text=text)
+
+# =========================
+# NOTION HELPERS
+# =========================
+
+async def notion_request(operation, method, path, json_body=None):
+    """Async twin of core.notion_request: retries 429s and 5xx, raises on any other non-2xx."""
+    for attempt in range(core.NOTION_MAX_RETRIES + 1):
+        async with notion_semaphore:
+            with core.track_call("notion", operation) as call:
+                response = await notion_http.request(method, path, json=json_body)
+                call["status"] = response.status_code
+        if response.is_success:
+            return response.json()
+        if (response.status_code != 429 and response.status_code < 500) or attempt == core.NOTION_MAX_RETRIES:
+            raise core.NotionError(f"Notion {operation} failed with {response.status_code}: {response.text[:300]}")
+        try:
+            delay = float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            delay = 2 ** attempt
+        core.increment("outbound_retries_total", 1, "Outbound API calls retried after a 429.", integration="notion")
+        logger.warning(f"Notion {operation} got {response.status_code}; retry {attempt + 1}/{core.NOTION_MAX_RETRIES} in {delay:.1f}s")
+        await asyncio.sleep(min(delay, core.NOTION_RETRY_MAX_SECONDS))
+
+
+# Same policy as core.LazyResource: one fetch on a cold start however many
+# coroutines ask, failures cached for a cooldown, the id refreshed after its TTL
+# (serving the old one if the refresh fails).
+_data_source_id = {"value": None, "expires_at": 0.0, "retry_at": 0.0}
+_data_source_id_lock = asyncio.Lock()
+
+
+async def get_data_source_id():
+    if _data_source_id["value"] and time.monotonic() < _data_source_id["expires_at"]:
+        return _data_source_id["value"]
+    async with _data_source_id_lock:
+        now = time.monotonic()
+        if (_data_source_id["value"] and now < _data_source_id["expires_at"]) or now < _data_source_id["retry_at"]:
+            return _data_source_id["value"]
+        try:
+            data_source_id = core.state.get("cache:notion_data_source_id")
+            if not data_source_id:
+                data = await notion_request("get_database", "GET", f"/databases/{core.NOTION_DATABASE_ID}")
+                data_sources = data.get("data_sources", [])
+                if not data_sources:
+                    raise Exception("No data sources found for this database.")
+                data_source_id = data_sources[0]["id"]
+                core.state.set("cache:notion_data_source_id", data_source_id, ttl=core.DATA_SOURCE_ID_TTL_SECONDS)
+                logger.debug(f"Fetched data_source_id: {data_source_id}")
+            _data_source_id.update(value=data_source_id, expires_at=now + core.DATA_SOURCE_ID_TTL_SECONDS, retry_at=0.0)
+        except Exception as e:
+            _data_source_id["retry_at"] = now + core.LAZY_FAILURE_COOLDOWN_SECONDS
+            core.increment("lazy_init_failures_total", 1, "Failed lazy initialisations (clients, cached ids).", resource="notion_data_source_id")
+            logger.error(f"Failed to fetch data_source_id: {e} (next attempt in {core.LAZY_FAILURE_COOLDOWN_SECONDS}s)")
+        return _data_source_id["value"]
+
+
+async def notion_query_all(filters=None, sorts=None, strict=False):
+    """Like notion_query, but follows next_cursor until every matching page is fetched.
+
+    With `strict`, failures raise instead of returning what was read so far."""
+    data_source_id = await get_data_source_id()
+    if not data_source_id:
+        if strict:
+            raise core.NotionError("No Notion data source available")
+        return []
+    body = {"page_size": 100}
+    if filters:
+        body["filter"] = filters
+    if sorts:
+        body["sorts"] = sorts
+    results = []
+    try:
+        while True:
+            data = await notion_request("notion_query", "POST", f"/data_sources/{data_source_id}/query", body)
+            results.extend(data.get("results", []))
+            if not data.get("has_more") or not data.get("next_cursor"):
+                return results
+            body["start_cursor"] = data["next_cursor"]
+    except Exception as e:
+        if strict:
+            raise
+        logger.error(f"Notion query failed: {e}")
+        return results
+
+
+async def fetch_report_history(portfolio_data):
+    pages = await notion_query_all(
+        filters={"property": "Date", "date": {"on_or_after": core.history_start_date(core.REPORT_HISTORY_MONTHS)}},
+        sorts=[{"property": "Date", "direction": "ascending"}]
+    )
+    return core.build_report_history([core.row_from_page(page) for page in pages] + list(portfolio_data))
+
+
+async def get_latest_entry_per_company(month_start):
+    pages = await notion_query_all(
+        filters={"property": "Date", "date": {"on_or_after": month_start}},
+        sorts=[{"property": "Date", "direction": "descending"}],
+        strict=True
+    )
+    return core.latest_page_per_company(pages)
+
+
+async def latest_submission_rows(month_start):
+    # The shared view only needs Notion on a cold start with no snapshot on disk.
+    # The view helpers do blocking state I/O (and may wait on a shared lock), so
+    # they run in a thread rather than on the event loop.
+    if not await asyncio.to_thread(core.latest_view_loaded):
+        await asyncio.to_thread(core.bootstrap_latest_view, await get_latest_entry_per_company(month_start))
+    return await asyncio.to_thread(core.latest_submission_rows)
+
+# =========================
+# OPENAI HELPERS
+# =========================
+
+_model_semaphores = {}
+
+
+def model_semaphore(model):
+    if model not in _model_semaphores:
+        _model_semaphores[model] = asyncio.Semaphore(core.LLM_MODEL_CONCURRENCY.get(model, core.LLM_DEFAULT_CONCURRENCY))
+    return _model_semaphores[model]
+
+
+async def chat_completion(model, messages, temperature, cache=None):
+    """Async twin of core.chat_completion, with the same cache, retry and accounting policy."""
+    if cache is None:
+        cache = temperature == 0
+    key = core.llm_cache_key(model, messages, temperature) if cache else None
+    if key:
+        cached = core.llm_cache_get(key)
+        if cached is not None:
+            return cached
+
+    attempt = 0
+    while True:
+        try:
+            async with openai_semaphore, model_semaphore(model):
+                with core.track_call("openai", "chat.completions.create"):
+                    response = await openai_client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+            break
+        except Exception as e:
+            if attempt >= core.LLM_MAX_RETRIES or not core.is_retryable_llm_error(e):
+                raise
+            delay = core.llm_retry_delay(e, attempt)
+            core.note_llm_retry(model, e, attempt, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    core.record_llm_usage(model, response)
+    if key:
+        core.llm_cache_put(key, response)
+    return response
+
+
+async def match_company_with_ai(raw_name):
+    try:
+        matched = core.completion_text(await chat_completion("gpt-4o-mini", core.build_match_messages(raw_name), 0))
+        core.log_sampled(f"AI matched '{raw_name}' → '{matched}'")
+        return matched if matched != "Unknown" else None
+    except Exception as e:
+        logger.error(f"AI matching failed: {e}")
+        return None
+
+
+async def summarise_company_chunk(rows, month_str):
+    response = await chat_completion(core.NARRATIVE_MAP_MODEL, core.build_company_notes_messages(rows, month_str), 0.3)
+    notes = core.parse_company_notes(core.completion_text(response), rows)
+    core.cache_company_notes(rows, notes)
+    return notes, core.usage_tokens(response)
+
+
+async def map_company_notes(portfolio_data, month_str):
+    started = time.perf_counter()
+    notes, missing = core.cached_company_notes(portfolio_data)
+    chunks = core.chunked(missing, core.NARRATIVE_CHUNK_SIZE)
+    results = await asyncio.gather(*(summarise_company_chunk(chunk, month_str) for chunk in chunks), return_exceptions=True)
+    tokens = [0, 0]
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, Exception):
+            logger.error(f"Company notes failed for {len(chunk)} companies: {result}")
+            continue
+        chunk_notes, used = result
+        notes.update(chunk_notes)
+        tokens = [tokens[0] + used[0], tokens[1] + used[1]]
+    core.log_narrative_stage("map", len(chunks), tokens, started, companies=len(portfolio_data),
+                             cached=len(portfolio_data) - len(missing))
+    return core.company_note_lines(portfolio_data, notes)
+
+
+async def condense_notes(notes, month_str):
+    while len(notes) > core.NARRATIVE_REDUCE_FAN_IN:
+        started = time.perf_counter()
+        groups = core.chunked(notes, core.NARRATIVE_REDUCE_FAN_IN)
+        results = await asyncio.gather(
+            *(chat_completion(core.NARRATIVE_MAP_MODEL, core.build_condense_messages(group, month_str), 0.3) for group in groups),
+            return_exceptions=True
+        )
+        condensed = []
+        tokens = [0, 0]
+        for group, result in zip(groups, results):
+            if isinstance(result, Exception):
+                logger.error(f"Condensing {len(group)} notes failed: {result}")
+                condensed.extend(group[:core.NARRATIVE_CHUNK_SIZE])
+                continue
+            condensed.append(core.completion_text(result))
+            used = core.usage_tokens(result)
+            tokens = [tokens[0] + used[0], tokens[1] + used[1]]
+        core.log_narrative_stage("condense", len(groups), tokens, started, notes_in=len(notes), notes_out=len(condensed))
+        notes = condensed
+    return notes
+
+
+async def generate_ai_narrative(portfolio_data, month_str, pending_companies):
+    total_mrr, avg_runway, total_headcount = core.portfolio_aggregates(portfolio_data)
+    try:
+        notes = await condense_notes(await map_company_notes(portfolio_data, month_str), month_str)
+        messages = core.build_narrative_prompt(
+            portfolio_data, month_str, total_mrr,
+            avg_runway, total_headcount, pending_companies, company_notes=notes
+        )
+        started = time.perf_counter()
+        response = await chat_completion(core.NARRATIVE_MODEL, messages, 0.7)
+        core.log_narrative_stage("reduce", 1, core.usage_tokens(response), started, notes=len(notes))
+        return core.completion_text(response)
+    except Exception as e:
+        logger.error(f"GPT narrative generation failed: {e}")
+        return core.NARRATIVE_FALLBACK
+
+# =========================
+# JOBS
+# =========================
+
+class JobProgress:
+    """Count finished sends out of gather() and report them to the current job."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+
+    def step(self):
+        self.done += 1
+        core.report_job_progress(self.done, self.total)
+
+
+async def process_messages(user_id, client_type="user", selected_ids=None, message_template=None):
+    if user_id != core.ADMIN_USER_ID:
+        return
+
+    client = user_client if client_type == "user" else bot_client
+    source = "USER" if client_type == "user" else "BOT"
+    template = message_template or core.DEFAULT_MESSAGE_TEMPLATE
+
+    try:
+        messages = core.render_for_roster(template, selected_ids=selected_ids)
+    except core.TemplateError as e:
+        logger.error(f"Message template is invalid, nothing sent: {e}")
+        await post_message(client, user_id, f"⚠️ Nothing sent — the message template is invalid: {e}")
+        return
+
+    campaign_id = await asyncio.to_thread(core.start_campaign, "blast", f"Message blast ({source.lower()})")
+    progress = JobProgress(len(messages))
+
+    async def send(slack_id, message):
+        if core.job_cancelled():
+            return False
+        try:
+            response = await post_message(client, slack_id, message)
+            await asyncio.to_thread(core.record_delivery, campaign_id, slack_id, response)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to send to {slack_id}: {e}")
+            return False
+        finally:
+            progress.step()
+
+    results = await asyncio.gather(*(send(slack_id, message) for slack_id, message in messages))
+    total_sent = sum(results)
+
+    try:
+        stopped = " Cancelled before the end." if core.job_cancelled() else ""
+        await post_message(client, user_id, f"Done! Sent {total_sent} messages as {source}.{stopped}")
+    except Exception as e:
+        logger.error(f"Could not notify admin: {e}")
+
+    core.publish_home_view(user_id)
+
+
+async def send_health_check_pings(user_id, pending_only=False):
+    if user_id != core.ADMIN_USER_ID:
+        return
+
+    selected_ids = None
+    if pending_only:
+        month_start = datetime.now(pytz.timezone("Europe/Lisbon")).replace(day=1, hour=0, minute=0, second=0, microsecond=0).strftime("%Y-%m-%d")
+        selected_ids = core.pending_founder_ids(await latest_submission_rows(month_start))
+    campaign_id = await asyncio.to_thread(
+        core.start_campaign, "reminder" if pending_only else "health_check", f"Health check {'reminders' if pending_only else 'pings'}"
+    )
+    messages = core.render_for_roster(
+        core.HEALTH_CHECK_MESSAGE_TEMPLATE, selected_ids=selected_ids, extra={"typeform_url": core.TYPEFORM_URL},
+        extra_for=lambda slack_id: {"typeform_url": core.campaign_form_link(campaign_id, slack_id)}
+    )
+
+    progress = JobProgress(len(messages))
+
+    async def send(slack_id, message):
+        if core.job_cancelled():
+            return False
+        try:
+            response = await post_message(bot_client, slack_id, message)
+            await asyncio.to_thread(core.record_delivery, campaign_id, slack_id, response)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to send health check ping to {slack_id}: {e}")
+            return False
+        finally:
+            progress.step()
+
+    total_sent = sum(await asyncio.gather(*(send(slack_id, message) for slack_id, message in messages)))
+
+    try:
+        await post_message(bot_client, user_id, f"✅ Health check {'reminders' if pending_only else 'pings'} sent to {total_sent} founders.")
+    except Exception as e:
+        logger.error(f"Could not notify admin: {e}")
+
+
+async def send_weekly_digest():
+    now = datetime.now(pytz.timezone("Europe/Lisbon"))
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).strftime("%Y-%m-%d")
+
+    rows = await latest_submission_rows(month_start)
+    previous_snapshot = await asyncio.to_thread(core.peek_digest_snapshot) if rows else None
+    text = core.build_digest_text(rows, now, previous_snapshot or None) if rows else core.EMPTY_DIGEST_TEXT
+
+    try:
+        await post_message(bot_client, core.ALERT_SLACK_CHANNEL, text)
+        logger.debug("Weekly digest sent.")
+    except Exception as e:
+        logger.error(f"Failed to send weekly digest: {e}")
+
+
+async def generate_and_send_report(user_id):
+    now = datetime.now(pytz.timezone("Europe/Lisbon"))
+    month_str = now.strftime("%B %Y")
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).strftime("%Y-%m-%d")
+
+    try:
+        await post_message(bot_client, user_id, f"⏳ Generating investor update for *{month_str}*... this takes about 30 seconds.")
+    except Exception as e:
+        logger.error(f"Could not notify admin: {e}")
+
+    portfolio_data, pending_companies = core.portfolio_data_from_rows(await latest_submission_rows(month_start))
+
+    if not portfolio_data:
+        try:
+            await post_message(bot_client, user_id, "⚠️ No health check data found for this month. Ask founders to fill the form first.")
+        except Exception as e:
+            logger.error(f"Could not notify admin: {e}")
+        return
+
+    narrative, history = await asyncio.gather(
+        generate_ai_narrative(portfolio_data, month_str, pending_companies),
+        fetch_report_history(portfolio_data)
+    )
+    # reportlab layout is CPU-bound, so keep it off the event loop.
+    try:
+        filepath = await asyncio.to_thread(
+            core.build_pdf_report, month_str, portfolio_data, pending_companies, narrative, history=history
+        )
+    except core.ReportTooLarge as e:
+        logger.error(f"Investor update not sent: {e}")
+        try:
+            await post_message(bot_client, user_id, f"⚠️ The investor update wasn't sent: {e}. Raise REPORT_MAX_BYTES or split it into report variants.")
+        except Exception as e:
+            logger.error(f"Could not notify admin: {e}")
+        return
+
+    try:
+        async with slack_semaphore:
+            with core.track_call("slack", "conversations.open"):
+                dm = await bot_client.conversations_open(users=user_id)
+            with core.track_call("slack", "files_upload_v2"):
+                await bot_client.files_upload_v2(
+                    channel=dm["channel"]["id"],
+                    file=filepath,
+                    filename=os.path.basename(filepath),
+                    initial_comment=core.build_report_comment(month_str, portfolio_data, pending_companies)
+                )
+        logger.info("PDF sent to admin via Slack.")
+    except Exception as e:
+        logger.error(f"Failed to upload PDF to Slack: {e}")
+
+
+async def handle_typeform_submission(payload):
+    data = core.extract_typeform_fields(payload)
+    raw_company = data.get("company", "")
+    matched_company = await match_company_with_ai(raw_company) if raw_company else None
+    data = core.apply_company_match(data, matched_company)
+    logger.debug("Parsed Typeform response", extra={"fields": data})
+
+    # Writes go through the shared batch buffer so both entrypoints coalesce alerts the same way.
+    await asyncio.to_thread(core.enqueue_submission, data)
+
+# =========================
+# ROUTES
+# =========================
+
+def ephemeral(text):
+    return JSONResponse({"response_type": "ephemeral", "text": text})
+
+
+async def read_slash_command(request):
+    """Verify the Slack signature and return the form, or None if the caller is not the admin."""
+    body = await request.body()
+    if not core.verify_slack_signature(request.headers, body):
+        return None, Response(status_code=401)
+    form = await request.form()
+    if form.get("user_id") != core.ADMIN_USER_ID:
+        return None, ephemeral("You are not allowed to use this command.")
+    return form, None
+
+
+async def send_messages(request):
+    form, rejection = await read_slash_command(request)
+    if rejection:
+        return rejection
+    session = core.admin_session
+    rejected = submit_job("blast", "Message blast", form["user_id"], process_messages,
+                          form["user_id"], "user", session["selected_startup_ids"], session["message_template"])
+    return ephemeral(f"⚠️ {rejected}" if rejected else "Blasting messages now. Check your DMs for a confirmation when it's done.")
+
+
+async def trigger_health_check_slash(request):
+    form, rejection = await read_slash_command(request)
+    if rejection:
+        return rejection
+    if form.get("text", "").strip().lower() == "pending":
+        rejected = submit_job("blast", "Health check reminders", form["user_id"], send_health_check_pings, form["user_id"], True)
+        return ephemeral(f"⚠️ {rejected}" if rejected else "Reminding founders who haven't responded yet. You'll get a DM when it's done.")
+    rejected = submit_job("blast", "Health check pings", form["user_id"], send_health_check_pings, form["user_id"])
+    return ephemeral(f"⚠️ {rejected}" if rejected else "Sending health check pings now. You'll get a DM when it's done.")
+
+
+async def trigger_digest_slash(request):
+    form, rejection = await read_slash_command(request)
+    if rejection:
+        return rejection
+    rejected = submit_job("digest", "Weekly digest", form["user_id"], send_weekly_digest)
+    return ephemeral(f"⚠️ {rejected}" if rejected else "Generating digest now. Check your Slack channel in a moment.")
+
+
+async def trigger_investor_update_slash(request):
+    form, rejection = await read_slash_command(request)
+    if rejection:
+        return rejection
+    rejected = submit_job("report", "Investor update", form["user_id"], generate_and_send_report, form["user_id"])
+    return ephemeral(f"⚠️ {rejected}" if rejected else "⏳ Generating investor update PDF... you'll receive it as a DM in about 30 seconds.")
+
+
+async def typeform_webhook(request):
+    body = await request.body()
+    if not core.verify_typeform_signature(request.headers, body):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+    if not payload:
+        return JSONResponse({"error": "No payload"}, status_code=400)
+    # Enqueued before the ack (as in the Flask route): Typeform doesn't retry a 200.
+    await handle_typeform_submission(payload)
+    return JSONResponse({"status": "ok"})
+
+# =========================
+# RUN APP
+# =========================
+
+@asynccontextmanager
+async def lifespan(_app):
+    yield
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+    await notion_http.aclose()
+
+
+asgi_app = Starlette(
+    routes=[
+        Route("/sendmessages", send_messages, methods=["POST"]),
+        Route("/healthcheck", trigger_health_check_slash, methods=["POST"]),
+        Route("/digest", trigger_digest_slash, methods=["POST"]),
+        Route("/investorupdate", trigger_investor_update_slash, methods=["POST"]),
+        Route("/typeform/webhook", typeform_webhook, methods=["POST"]),
+        Mount("/", app=WSGIMiddleware(core.app)),
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    core.start_schedulers()
+    port = int(os.environ.get("PORT", 3000))
+    uvicorn.run(asgi_app, host="0.0.0.0", port=port)
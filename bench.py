@@ -0,0 +1,689 @@
+"""
+Offline benchmarks for the send engine, Typeform ingestion and the PDF report.
+
+Slack, Notion and OpenAI are replaced by local HTTP stand-ins, and app.py is
+pointed at them through SLACK_API_URL / NOTION_API_URL / OPENAI_BASE_URL, so
+the real code paths (slack_sdk retry handlers, Notion throttle and pagination,
+OpenAI SDK) run unmodified. Nothing leaves the machine.
+
+    python bench.py                       # every scenario, each in its own process
+    python bench.py --scenario blast --founders 2000
+    python bench.py --json results.json
+    python bench.py --sizes 100,1000,5000
+
+Scenarios:
+    blast    process_messages() DMing every founder in the roster
+    webhook  a burst of signed Typeform webhooks, timed until every row is in Notion
+    pdf      narrative + build_pdf_report() + Slack upload for a large portfolio
+    scale    Home tab, AI matcher (latency and accuracy), digest and PDF at one
+             portfolio size; --sizes 100,1000,5000 repeats it per size
+
+Roster, Typeform payloads and Notion history come from synthetic.py, so runs
+with the same --seed see the same data.
+
+Each scenario reports throughput, p50/p99 latency and the peak RSS of its process.
+"""
+
+import argparse
+import base64
+import difflib
+import hashlib
+import hmac
+import json
+import math
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import synthetic
+
+SCENARIOS = ("blast", "webhook", "pdf", "scale")
+
+# =========================
+# MEASUREMENT
+# =========================
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class LatencyRecorder:
+    """Wrap a callable and record how long each call takes, retries included."""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def wrap(self, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.samples.append(elapsed)
+        return timed
+
+
+def scenario_result(name, ops, seconds, samples, **extra):
+    result = {
+        "scenario": name,
+        "ops": ops,
+        "seconds": round(seconds, 3),
+        "throughput_per_s": round(ops / seconds, 2) if seconds else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+    result.update(extra)
+    return result
+
+# =========================
+# FAKE SERVERS
+# =========================
+
+class TokenBucket:
+    """Allow `rate` requests per second with bursts up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Return 0 if a token was taken, else the seconds until one is available."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class FakeServer:
+    """Run a handler class on a local port in a daemon thread."""
+
+    def __init__(self, handler_class):
+        handler = type(handler_class.__name__, (handler_class,), {"fake": self})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def stop(self):
+        self.httpd.shutdown()
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def read_params(self):
+        body = self.read_body()
+        if "json" in (self.headers.get("Content-Type") or ""):
+            return json.loads(body or b"{}")
+        params = {k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()}
+        params.update({k: v[0] for k, v in parse_qs(self.path.partition("?")[2]).items()})
+        return params
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# Slack Web API tiers, in requests per minute. Real limits would make a 5k-founder
+# run take hours, so the bench multiplies them by --slack-speedup.
+SLACK_TIER_LIMITS = {1: 1, 2: 20, 3: 50, 4: 100}
+SLACK_METHOD_TIERS = {
+    "conversations.open": 3,
+    "conversations.members": 4,
+    "users.list": 2,
+    "views.publish": 4,
+    "chat.update": 3,
+    "files.getUploadURLExternal": 4,
+    "files.completeUploadExternal": 4
+}
+
+
+class FakeSlackHandler(FakeHandler):
+    """Slack Web API stand-in with per-tier 429s and chat.postMessage's special limit."""
+
+    def do_POST(self):
+        fake = self.fake
+        path = self.path.partition("?")[0]
+        if path.startswith("/upload/"):
+            fake.count("upload_bytes", len(self.read_body()))
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"OK")
+            return
+
+        method = path.rsplit("/", 1)[-1]
+        params = self.read_params()
+        wait = fake.limiter(method, params.get("channel"))
+        if wait:
+            fake.count("rate_limited")
+            fake.count(f"rate_limited:{method}")
+            self.send_json(429, {"ok": False, "error": "ratelimited"}, {"Retry-After": str(max(1, math.ceil(wait)))})
+            return
+        fake.count(method)
+
+        if method == "chat.postMessage":
+            self.send_json(200, {"ok": True, "channel": params.get("channel"), "ts": f"{time.time():.6f}"})
+        elif method == "conversations.open":
+            self.send_json(200, {"ok": True, "channel": {"id": "D" + str(params.get("users", "X"))[1:]}})
+        elif method == "files.getUploadURLExternal":
+            file_id = "F" + uuid.uuid4().hex[:10].upper()
+            self.send_json(200, {"ok": True, "upload_url": f"{fake.url}/upload/{file_id}", "file_id": file_id})
+        elif method == "files.completeUploadExternal":
+            files = json.loads(params.get("files") or "[]")
+            self.send_json(200, {"ok": True, "files": [{"id": f.get("id"), "title": f.get("title")} for f in files]})
+        else:
+            self.send_json(200, {"ok": True})
+
+
+def start_fake_slack(speedup, post_rate):
+    fake = FakeServer(FakeSlackHandler)
+    buckets = {}
+    buckets_lock = threading.Lock()
+
+    def bucket(key, rate):
+        with buckets_lock:
+            if key not in buckets:
+                buckets[key] = TokenBucket(rate)
+            return buckets[key]
+
+    def limiter(method, channel):
+        if method == "chat.postMessage":
+            # One message per second per channel, plus a workspace-wide ceiling.
+            return max(bucket(("channel", channel), speedup).take() if channel else 0.0,
+                       bucket("chat.postMessage", post_rate).take())
+        tier = SLACK_METHOD_TIERS.get(method, 3)
+        return bucket(method, SLACK_TIER_LIMITS[tier] / 60.0 * speedup).take()
+
+    fake.limiter = limiter
+    fake.url_for_client = fake.url + "/api/"
+    return fake
+
+
+def notion_title(page, prop):
+    values = page["properties"].get(prop, {})
+    for kind in ("title", "rich_text"):
+        if kind in values:
+            return "".join(v.get("text", {}).get("content", "") for v in values[kind])
+    return None
+
+
+def notion_matches(page, condition):
+    if not condition:
+        return True
+    if "or" in condition:
+        return any(notion_matches(page, c) for c in condition["or"])
+    if "and" in condition:
+        return all(notion_matches(page, c) for c in condition["and"])
+    prop = condition.get("property")
+    if "title" in condition or "rich_text" in condition:
+        expected = (condition.get("title") or condition.get("rich_text")).get("equals")
+        return notion_title(page, prop) == expected
+    if "date" in condition:
+        start = (page["properties"].get(prop, {}).get("date") or {}).get("start") or ""
+        after = condition["date"].get("on_or_after")
+        return not after or start >= after
+    if "checkbox" in condition:
+        return page["properties"].get(prop, {}).get("checkbox") == condition["checkbox"].get("equals")
+    return True
+
+
+class FakeNotionHandler(FakeHandler):
+    """Notion API stand-in: data source lookup, paginated queries, page creation, 3 rps."""
+
+    def throttled(self):
+        wait = self.fake.bucket.take()
+        if wait:
+            self.fake.count("rate_limited")
+            self.send_json(429, {"object": "error", "status": 429, "code": "rate_limited"},
+                           {"Retry-After": str(max(1, math.ceil(wait)))})
+            return True
+        return False
+
+    def do_GET(self):
+        if self.throttled():
+            return
+        self.fake.count("get_database")
+        self.send_json(200, {"object": "database", "data_sources": [{"id": "ds-bench", "name": "Health checks"}]})
+
+    def do_POST(self):
+        fake = self.fake
+        body = json.loads(self.read_body() or b"{}")
+        if self.throttled():
+            return
+        path = self.path.partition("?")[0]
+        if path.endswith("/pages"):
+            fake.count("create_page")
+            page = {"object": "page", "id": str(uuid.uuid4()), "properties": body.get("properties", {})}
+            with fake.pages_lock:
+                fake.pages.append(page)
+            self.send_json(200, page)
+            return
+
+        fake.count("query")
+        with fake.pages_lock:
+            matched = [p for p in fake.pages if notion_matches(p, body.get("filter"))]
+        for sort in reversed(body.get("sorts") or []):
+            prop = sort.get("property")
+            matched.sort(
+                key=lambda p: (p["properties"].get(prop, {}).get("date") or {}).get("start") or "",
+                reverse=sort.get("direction") == "descending"
+            )
+        start = int(body.get("start_cursor") or 0)
+        size = min(int(body.get("page_size") or 100), 100)
+        chunk = matched[start:start + size]
+        has_more = start + size < len(matched)
+        self.send_json(200, {
+            "object": "list",
+            "results": chunk,
+            "has_more": has_more,
+            "next_cursor": str(start + size) if has_more else None
+        })
+
+
+def start_fake_notion(pages=None, rate=3.0):
+    fake = FakeServer(FakeNotionHandler)
+    fake.bucket = TokenBucket(rate, burst=rate)
+    fake.pages = list(pages or [])
+    fake.pages_lock = threading.Lock()
+    fake.url_for_client = fake.url + "/v1"
+    return fake
+
+
+class FakeOpenAIHandler(FakeHandler):
+    """Chat completions stand-in: fuzzy company matching, JSON company notes, canned prose, fixed latency."""
+
+    def do_POST(self):
+        fake = self.fake
+        body = json.loads(self.read_body() or b"{}")
+        fake.count("chat.completions")
+        time.sleep(max(0.0, random.gauss(fake.latency, fake.latency / 10)))
+
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        if prompt.startswith("Typed name:"):
+            typed, _, known = prompt.partition("\n\nKnown companies:\n")
+            candidates = known.splitlines()
+            match = difflib.get_close_matches(typed[len("Typed name:"):].strip(), candidates, n=1, cutoff=0.5)
+            content = match[0] if match else "Unknown"
+        elif "Return ONLY a JSON object" in prompt:
+            companies = [line[2:].split(" (Founder:")[0] for line in prompt.splitlines() if line.startswith("- ")]
+            content = json.dumps({company: f"{company} held steady this month." for company in companies})
+        elif prompt.startswith("Condense"):
+            content = "Several companies grew while a few need attention on runway."
+        else:
+            content = "\n\n".join(["The portfolio kept growing this month. " * 8] * 3)
+
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+        completion_tokens = len(content) // 4
+        self.send_json(200, {
+            "id": "chatcmpl-" + uuid.uuid4().hex[:12],
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+
+def start_fake_openai(latency):
+    fake = FakeServer(FakeOpenAIHandler)
+    fake.latency = latency
+    fake.url_for_client = fake.url + "/v1"
+    return fake
+
+# =========================
+# ENVIRONMENT
+# =========================
+
+def prepare_app(args, workdir, slack, notion, openai_fake):
+    """Point app.py at the fakes and a scratch directory, then import it."""
+    os.environ.update({
+        "SLACK_TOKEN": "xoxp-bench",
+        "BOT_TOKEN": "xoxb-bench",
+        "NOTION_TOKEN": "secret_bench",
+        "NOTION_DATABASE_ID": "db-bench",
+        "TYPEFORM_WEBHOOK_SECRET": "bench-typeform-secret",
+        "SLACK_SIGNING_SECRET": "bench-signing-secret",
+        "ALERT_SLACK_CHANNEL": "C0BENCH",
+        "OPENAI_API_KEY": "sk-bench",
+        "SLACK_API_URL": slack.url_for_client,
+        "NOTION_API_URL": notion.url_for_client,
+        "OPENAI_BASE_URL": openai_fake.url_for_client,
+        "ROSTER_CSV_PATH": os.path.join(workdir, "roster.csv"),
+        "LATEST_VIEW_PATH": os.path.join(workdir, "latest_submissions.json"),
+        "STATE_BACKEND_URL": "sqlite:///" + os.path.join(workdir, "app_state.db"),
+        "CAMPAIGN_DB_PATH": os.path.join(workdir, "campaigns.db"),
+        "REPORT_OUTPUT_PATH": os.path.join(workdir, "reports"),
+        "SEND_INTERVAL_SECONDS": str(args.send_interval),
+        "LOG_LEVEL": args.log_level
+    })
+    import app
+    return app
+
+
+def sign_typeform(secret, body):
+    mac = hmac.new(secret.encode("utf-8"), body, hashlib.sha256)
+    return "sha256=" + base64.b64encode(mac.digest()).decode("ascii")
+
+# =========================
+# SCENARIOS
+# =========================
+
+def setup(args, workdir, portfolio, notion_pages=None):
+    synthetic.write_roster_csv(portfolio["roster"], os.path.join(workdir, "roster.csv"))
+    slack = start_fake_slack(args.slack_speedup, args.slack_post_rate)
+    notion = start_fake_notion(notion_pages)
+    openai_fake = start_fake_openai(args.openai_latency)
+    return prepare_app(args, workdir, slack, notion, openai_fake), slack, notion, openai_fake
+
+
+def run_blast(args, workdir):
+    portfolio = synthetic.generate_portfolio(args.founders, months=1, seed=args.seed)
+    app, slack, _, _ = setup(args, workdir, portfolio)
+
+    recorder = LatencyRecorder()
+    app.bot_client.chat_postMessage = recorder.wrap(app.bot_client.chat_postMessage)
+
+    started = time.perf_counter()
+    app.process_messages(app.ADMIN_USER_ID, "bot")
+    elapsed = time.perf_counter() - started
+
+    delivered = slack.stats.get("chat.postMessage", 0) - 1  # minus the summary DM
+    return scenario_result(
+        "blast", delivered, elapsed, recorder.samples,
+        founders=args.founders,
+        slack_429s=slack.stats.get("rate_limited", 0),
+        failed=args.founders - delivered
+    )
+
+
+def run_webhook(args, workdir):
+    # Everyone responds this month, so the burst is exactly --submissions webhooks.
+    portfolio = synthetic.generate_portfolio(
+        args.submissions, months=args.months, seed=args.seed, typo_rate=args.typo_rate, response_rate=1.0
+    )
+    app, _, notion, openai_fake = setup(args, workdir, portfolio, portfolio["notion_pages"])
+
+    secret = os.environ["TYPEFORM_WEBHOOK_SECRET"]
+    bodies = [json.dumps(payload).encode("utf-8") for payload in portfolio["typeform_payloads"]]
+    recorder = LatencyRecorder()
+
+    @recorder.wrap
+    def post(body):
+        response = app.app.test_client().post(
+            "/typeform/webhook", data=body, content_type="application/json",
+            headers={"Typeform-Signature": sign_typeform(secret, body)}
+        )
+        return response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        statuses = list(pool.map(post, bodies))
+    accepted = time.perf_counter() - started
+
+    # Rows land when the write buffer's window closes; wait for all of them.
+    expected = len(portfolio["notion_pages"]) + len(bodies)
+    deadline = time.monotonic() + args.timeout
+    while len(notion.pages) < expected and time.monotonic() < deadline:
+        time.sleep(0.1)
+    elapsed = time.perf_counter() - started
+
+    written = notion.pages[len(portfolio["notion_pages"]):]
+    truth = [submission["company"] for submission in portfolio["submissions"]]
+    matched = {synthetic_company(page) for page in written}
+    return scenario_result(
+        "webhook", len(written), elapsed, recorder.samples,
+        submissions=len(bodies),
+        accepted_seconds=round(accepted, 3),
+        non_200=sum(1 for s in statuses if s != 200),
+        companies_resolved=len(matched & set(truth)),
+        notion_queries=notion.stats.get("query", 0),
+        notion_429s=notion.stats.get("rate_limited", 0),
+        openai_calls=openai_fake.stats.get("chat.completions", 0)
+    )
+
+
+def synthetic_company(page):
+    return page["properties"]["Company"]["title"][0]["text"]["content"]
+
+
+def run_pdf(args, workdir):
+    portfolio = synthetic.generate_portfolio(args.companies, months=args.months, seed=args.seed, response_rate=0.9)
+    app, _, _, _ = setup(args, workdir, portfolio)
+
+    portfolio_data, pending = app.portfolio_data_from_rows(portfolio["latest_rows"])
+    history = report_history(app, portfolio)
+    month_str = datetime.now().strftime("%B %Y")
+
+    samples = []
+    narrative_seconds = []
+    upload_seconds = []
+    started = time.perf_counter()
+    filepath = None
+    for _ in range(args.pdf_runs):
+        run_started = time.perf_counter()
+        narrative = app.generate_ai_narrative(portfolio_data, month_str, *app.portfolio_aggregates(portfolio_data), pending)
+        narrative_seconds.append(time.perf_counter() - run_started)
+        filepath = app.build_pdf_report(month_str, portfolio_data, pending, narrative=narrative, history=history)
+        upload_started = time.perf_counter()
+        dm = app.bot_client.conversations_open(users=app.ADMIN_USER_ID)
+        with open(filepath, "rb") as f:
+            app.bot_client.files_upload_v2(
+                channel=dm["channel"]["id"], file=f, filename=os.path.basename(filepath),
+                initial_comment=app.build_report_comment(month_str, portfolio_data, pending)
+            )
+        upload_seconds.append(time.perf_counter() - upload_started)
+        samples.append(time.perf_counter() - run_started)
+    elapsed = time.perf_counter() - started
+
+    return scenario_result(
+        "pdf", args.pdf_runs, elapsed, samples,
+        companies=len(portfolio_data),
+        pending=len(pending),
+        narrative_p50_ms=round(percentile(narrative_seconds, 50) * 1000, 2),
+        upload_p50_ms=round(percentile(upload_seconds, 50) * 1000, 2),
+        pdf_bytes=os.path.getsize(filepath) if filepath else 0
+    )
+
+
+def report_history(app, portfolio):
+    """What fetch_report_history would build from the synthetic Notion history."""
+    rows = [app.row_from_page(page) for page in portfolio["notion_pages"]] + portfolio["latest_rows"]
+    return app.build_report_history(rows)
+
+
+def timed_runs(func, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def run_scale(args, workdir):
+    """Time the roster-sized paths (Home tab, matcher, digest, PDF) at --companies."""
+    portfolio = synthetic.generate_portfolio(
+        args.companies, months=args.months, seed=args.seed, typo_rate=args.typo_rate
+    )
+    app, _, _, openai_fake = setup(args, workdir, portfolio)
+    started = time.perf_counter()
+
+    home = timed_runs(app.build_admin_home_view, args.pdf_runs)
+
+    typed = [p["form_response"]["answers"][0]["text"] for p in portfolio["typeform_payloads"]]
+    truth = [s["company"] for s in portfolio["submissions"]]
+    sample = list(zip(typed, truth))[:args.match_samples]
+    match_recorder = LatencyRecorder()
+    match = match_recorder.wrap(app.match_company_with_ai)
+    correct = sum(1 for raw, company in sample if match(raw) == company)
+
+    now = datetime.now(app.pytz.timezone("Europe/Lisbon"))
+    digest = timed_runs(lambda: app.build_digest_text(portfolio["latest_rows"], now), args.pdf_runs)
+
+    portfolio_data, pending = app.portfolio_data_from_rows(portfolio["latest_rows"])
+    month_str = datetime.now().strftime("%B %Y")
+    history = report_history(app, portfolio)
+    pdf = timed_runs(
+        lambda: app.build_pdf_report(month_str, portfolio_data, pending, narrative="Bench.", history=history),
+        args.pdf_runs
+    )
+    elapsed = time.perf_counter() - started
+
+    def ms(samples, pct):
+        return round(percentile(samples, pct) * 1000, 2)
+
+    return scenario_result(
+        "scale", args.companies, elapsed, home,
+        home_view_p50_ms=ms(home, 50),
+        match_p50_ms=ms(match_recorder.samples, 50),
+        match_p99_ms=ms(match_recorder.samples, 99),
+        match_accuracy=round(correct / len(sample), 3) if sample else None,
+        match_prompt_chars=len(app.build_match_messages("x")[1]["content"]),
+        digest_p50_ms=ms(digest, 50),
+        pdf_p50_ms=ms(pdf, 50),
+        openai_calls=openai_fake.stats.get("chat.completions", 0)
+    )
+
+
+SCENARIO_RUNNERS = {"blast": run_blast, "webhook": run_webhook, "pdf": run_pdf, "scale": run_scale}
+
+# =========================
+# CLI
+# =========================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS, help="run one scenario in this process")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--founders", type=int, default=5000, help="blast: roster size")
+    parser.add_argument("--submissions", type=int, default=500, help="webhook: burst size")
+    parser.add_argument("--concurrency", type=int, default=16, help="webhook: concurrent deliveries")
+    parser.add_argument("--companies", type=int, default=300, help="pdf/scale: portfolio size")
+    parser.add_argument("--sizes", help="comma-separated portfolio sizes to run the scale scenario at")
+    parser.add_argument("--months", type=int, default=3, help="months of synthetic history")
+    parser.add_argument("--typo-rate", type=float, default=0.3, help="share of submissions with a mistyped company")
+    parser.add_argument("--match-samples", type=int, default=50, help="scale: matcher calls to time")
+    parser.add_argument("--pdf-runs", type=int, default=5, help="pdf: repetitions")
+    parser.add_argument("--send-interval", type=float, default=0.0,
+                        help="SEND_INTERVAL_SECONDS for the blast (default 0: let Slack's 429s pace it)")
+    parser.add_argument("--slack-speedup", type=float, default=60.0,
+                        help="multiply Slack's per-minute tier limits by this")
+    parser.add_argument("--slack-post-rate", type=float, default=100.0,
+                        help="workspace-wide chat.postMessage limit per second")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="seconds per completion")
+    parser.add_argument("--timeout", type=float, default=600.0, help="webhook: max seconds to wait for Notion")
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+def run_scenario(args):
+    with tempfile.TemporaryDirectory(prefix=f"bench-{args.scenario}-") as workdir:
+        return SCENARIO_RUNNERS[args.scenario](args, workdir)
+
+
+def run_isolated(name, argv, extra=()):
+    """Run one scenario in a fresh interpreter so its peak RSS is its own."""
+    forwarded = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in ("--json", "--sizes"):
+            skip = True
+        elif not arg.startswith(("--json=", "--sizes=")):
+            forwarded.append(arg)
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *forwarded, *extra, "--scenario", name],
+        stdout=subprocess.PIPE, check=True
+    )
+    return json.loads(completed.stdout.decode("utf-8").strip().splitlines()[-1])
+
+
+def print_table(results):
+    columns = ["scenario", "ops", "seconds", "throughput_per_s", "p50_ms", "p99_ms", "peak_rss_mb"]
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in results)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for result in results:
+        print("  ".join(str(result.get(c, "")).ljust(widths[c]) for c in columns))
+        extra = {k: v for k, v in result.items() if k not in columns}
+        if extra:
+            print("    " + ", ".join(f"{k}={v}" for k, v in extra.items()))
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    args = parse_args(argv)
+    if args.scenario:
+        results = [run_scenario(args)]
+        print(json.dumps(results[0]))
+    elif args.sizes:
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+        results = [run_isolated("scale", argv, ["--companies", str(size)]) for size in sizes]
+        print_table(results)
+    else:
+        results = [run_isolated(name, argv) for name in SCENARIOS]
+        print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Synthetic portfolio data for load and scale testing.
+
+Generates a roster of N companies with a multi-month submission history, and
+renders it in every shape the app consumes:
+
+    roster.csv          the workspace_users.csv format (point ROSTER_CSV_PATH at it)
+    typeform.jsonl      one Typeform webhook payload per line for the current month,
+                        with the company name typed the way founders type it
+    notion_pages.json   earlier months as Notion pages (what row_from_page reads)
+    latest_rows.json    the current month as latest-view rows (digest / PDF input)
+
+Names are drawn from a small vocabulary on purpose, so there are realistic
+collisions ("Nova AI" / "Nova Health" / "NovaLabs") and the matcher has to work
+for its answer. Output depends only on the arguments and --seed.
+
+    python synthetic.py --companies 500 --months 6 --out synthetic/
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import uuid
+from datetime import date
+
+NAME_STEMS = [
+    "Nova", "Lumen", "Atlas", "Orbit", "Vega", "Pulse", "Terra", "Quanta", "Helix", "Aurora",
+    "Cobalt", "Delta", "Ember", "Flux", "Nimbus", "Onda", "Praia", "Sardinha", "Tejo", "Zenith"
+]
+NAME_SECTORS = ["AI", "Health", "FinTech", "Labs", "Energy", "Mobility", "Bio", "Robotics", "Data", "Cloud"]
+FIRST_NAMES = [
+    "Miguel", "Sofia", "Júlio", "Inês", "João", "Beatriz", "Tiago", "Mariana", "Rui", "Carolina",
+    "Pedro", "Ana", "Duarte", "Leonor", "André", "Marta", "Gonçalo", "Rita", "Nuno", "Catarina"
+]
+LAST_NAMES = [
+    "Santos", "Almeida", "Ferreira", "Costa", "Oliveira", "Pereira", "Rodrigues", "Martins",
+    "Sousa", "Fernandes", "Gomes", "Lopes", "Marques", "Ribeiro", "Carvalho"
+]
+WINS = [
+    "Closed a pilot with a large retailer.", "Hired our first VP Sales.", "Shipped the mobile app.",
+    "Signed three new enterprise customers.", "Raised a bridge round from existing investors.", ""
+]
+BLOCKERS = [
+    "Hiring senior engineers.", "Long enterprise sales cycles.", "Payment provider onboarding.",
+    "Regulatory approval is taking longer than expected.", "Churn in the SMB segment.", ""
+]
+HELP_ANSWERS = ["No", "Não", "", "Intros to investors", "Help with hiring", "Feedback on pricing"]
+
+TYPEFORM_FIELDS = [
+    ("f_company", "Company name"),
+    ("f_mrr", "MRR (€)"),
+    ("f_runway", "Runway (months)"),
+    ("f_headcount", "Headcount"),
+    ("f_win", "Biggest win this month"),
+    ("f_blocker", "Biggest blocker"),
+    ("f_help", "Do you need help from Unicorn Factory?")
+]
+
+# =========================
+# ROSTER
+# =========================
+
+def company_name(index, rng, used):
+    """Stem + sector, with the odd squashed or numbered variant once the space fills up."""
+    while True:
+        stem = rng.choice(NAME_STEMS)
+        sector = rng.choice(NAME_SECTORS)
+        roll = rng.random()
+        if roll < 0.1:
+            name = f"{stem}{sector}"
+        elif roll < 0.15:
+            name = stem
+        else:
+            name = f"{stem} {sector}"
+        if len(used) >= len(NAME_STEMS) * len(NAME_SECTORS):
+            name = f"{name} {index}"
+        if name not in used:
+            used.add(name)
+            return name
+
+
+def generate_roster(companies, rng):
+    used = set()
+    roster = []
+    for i in range(companies):
+        roster.append({
+            "startup_name": company_name(i, rng, used),
+            "founder_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "slack_user_id": f"U{i:09d}"
+        })
+    return roster
+
+
+def misspell(name, rng):
+    """Type a company name the way a founder in a hurry would."""
+    kind = rng.choice(["drop", "swap", "case", "stem", "suffix"])
+    if kind == "drop" and len(name) > 3:
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i + 1:]
+    if kind == "swap" and len(name) > 3:
+        i = rng.randrange(0, len(name) - 2)
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    if kind == "case":
+        return name.lower()
+    if kind == "stem" and " " in name:
+        # Ambiguous on purpose: "Nova" when the roster has several Nova companies.
+        return name.split(" ")[0]
+    return f"{name} Lda"
+
+# =========================
+# HISTORY
+# =========================
+
+def month_starts(months, today=None):
+    """First day of each of the last `months` months, oldest first."""
+    today = today or date.today()
+    starts = []
+    year, month = today.year, today.month
+    for _ in range(months):
+        starts.append(date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return list(reversed(starts))
+
+
+def generate_history(roster, months, rng, response_rate=0.85, today=None):
+    """One list of submissions per month, following each company's own trajectory."""
+    history = []
+    state = {}
+    for entry in roster:
+        state[entry["startup_name"]] = {
+            "mrr": round(rng.lognormvariate(9.5, 1.2)) if rng.random() > 0.1 else 0,
+            "growth": rng.gauss(0.04, 0.08),
+            "runway": rng.randint(3, 30),
+            "headcount": rng.randint(2, 40)
+        }
+
+    for start in month_starts(months, today):
+        submissions = []
+        for entry in roster:
+            company = entry["startup_name"]
+            s = state[company]
+            s["mrr"] = max(0, round(s["mrr"] * (1 + rng.gauss(s["growth"], 0.1))))
+            s["runway"] = max(0, s["runway"] - 1 + (12 if rng.random() < 0.05 else 0))
+            s["headcount"] = max(1, s["headcount"] + rng.choice([-1, 0, 0, 0, 1, 2]))
+            if rng.random() > response_rate:
+                continue
+            day = min(28, 1 + int(abs(rng.gauss(6, 4))))
+            submissions.append({
+                "company": company,
+                "founder": entry["founder_name"],
+                "slack_user_id": entry["slack_user_id"],
+                "date": start.replace(day=day).isoformat(),
+                "mrr": s["mrr"],
+                "runway": s["runway"],
+                "headcount": s["headcount"],
+                "biggest_win": rng.choice(WINS),
+                "biggest_blocker": rng.choice(BLOCKERS),
+                "help_needed": rng.choice(HELP_ANSWERS)
+            })
+        history.append(submissions)
+    return history
+
+# =========================
+# RENDERING
+# =========================
+
+def typeform_payload(submission, rng, typo_rate=0.3):
+    typed = misspell(submission["company"], rng) if rng.random() < typo_rate else submission["company"]
+    answers = [
+        {"field": {"id": "f_company"}, "type": "text", "text": typed},
+        {"field": {"id": "f_mrr"}, "type": "number", "number": submission["mrr"]},
+        {"field": {"id": "f_runway"}, "type": "number", "number": submission["runway"]},
+        {"field": {"id": "f_headcount"}, "type": "number", "number": submission["headcount"]},
+        {"field": {"id": "f_win"}, "type": "text", "text": submission["biggest_win"]},
+        {"field": {"id": "f_blocker"}, "type": "text", "text": submission["biggest_blocker"]},
+        {"field": {"id": "f_help"}, "type": "text", "text": submission["help_needed"]}
+    ]
+    return {
+        "event_id": uuid.UUID(int=rng.getrandbits(128)).hex,
+        "event_type": "form_response",
+        "form_response": {
+            "submitted_at": f"{submission['date']}T10:00:00Z",
+            "definition": {"fields": [{"id": fid, "title": title} for fid, title in TYPEFORM_FIELDS]},
+            "answers": answers
+        }
+    }
+
+
+def notion_page(submission, previous_mrr, rng):
+    def text(value):
+        return {"rich_text": [{"text": {"content": value or ""}}]}
+
+    return {
+        "object": "page",
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "properties": {
+            "Company": {"title": [{"text": {"content": submission["company"]}}]},
+            "Founder": text(submission["founder"]),
+            "Date": {"date": {"start": submission["date"]}},
+            "MRR (€)": {"number": submission["mrr"]},
+            "Previous MRR (€)": {"number": previous_mrr or 0},
+            "Runway (months)": {"number": submission["runway"]},
+            "Headcount": {"number": submission["headcount"]},
+            "Biggest Win": text(submission["biggest_win"]),
+            "Biggest Blocker": text(submission["biggest_blocker"]),
+            "Help Needed": text(submission["help_needed"]),
+            "Alert": {"checkbox": False},
+            "Alert Reason": text(""),
+            "Responded": {"checkbox": True}
+        }
+    }
+
+
+def latest_row(submission, previous_mrr):
+    """The shape app.row_from_submission produces for the latest view."""
+    return {
+        "company": submission["company"],
+        "founder": submission["founder"],
+        "date": submission["date"],
+        "mrr": submission["mrr"],
+        "previous_mrr": previous_mrr or 0,
+        "runway": submission["runway"],
+        "headcount": submission["headcount"],
+        "biggest_win": submission["biggest_win"] or "—",
+        "biggest_blocker": submission["biggest_blocker"] or "—",
+        "help_needed": submission["help_needed"] or ""
+    }
+
+# =========================
+# PORTFOLIO
+# =========================
+
+def generate_portfolio(companies, months=6, seed=7, typo_rate=0.3, response_rate=0.85, today=None):
+    """
+    Build everything for one synthetic portfolio. The last month of history is
+    "this month": it becomes Typeform payloads and latest-view rows, earlier
+    months become Notion pages.
+    """
+    rng = random.Random(seed)
+    roster = generate_roster(companies, rng)
+    history = generate_history(roster, max(1, months), rng, response_rate, today)
+
+    previous_mrr = {}
+    notion_pages = []
+    for submissions in history[:-1]:
+        for submission in submissions:
+            notion_pages.append(notion_page(submission, previous_mrr.get(submission["company"]), rng))
+            previous_mrr[submission["company"]] = submission["mrr"]
+
+    current = history[-1]
+    return {
+        "roster": roster,
+        "history": history,
+        "notion_pages": notion_pages,
+        "submissions": current,
+        "typeform_payloads": [typeform_payload(s, rng, typo_rate) for s in current],
+        "latest_rows": [latest_row(s, previous_mrr.get(s["company"])) for s in current]
+    }
+
+
+def write_roster_csv(roster, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["startup_name", "founder_name", "slack_user_id"])
+        writer.writeheader()
+        writer.writerows(roster)
+
+
+def write_portfolio(portfolio, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    write_roster_csv(portfolio["roster"], os.path.join(out_dir, "roster.csv"))
+    with open(os.path.join(out_dir, "typeform.jsonl"), "w", encoding="utf-8") as f:
+        for payload in portfolio["typeform_payloads"]:
+            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+    with open(os.path.join(out_dir, "notion_pages.json"), "w", encoding="utf-8") as f:
+        json.dump(portfolio["notion_pages"], f, ensure_ascii=False)
+    with open(os.path.join(out_dir, "latest_rows.json"), "w", encoding="utf-8") as f:
+        json.dump(portfolio["latest_rows"], f, ensure_ascii=False)
+
+
+def name_collisions(roster):
+    """How many companies share their first word with another company."""
+    stems = {}
+    for entry in roster:
+        stem = entry["startup_name"].split(" ")[0]
+        stems[stem] = stems.get(stem, 0) + 1
+    return sum(count for count in stems.values() if count > 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, default=300)
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--typo-rate", type=float, default=0.3)
+    parser.add_argument("--response-rate", type=float, default=0.85)
+    parser.add_argument("--out", default="synthetic")
+    args = parser.parse_args(argv)
+
+    portfolio = generate_portfolio(args.companies, args.months, args.seed, args.typo_rate, args.response_rate)
+    write_portfolio(portfolio, args.out)
+    print(
+        f"{len(portfolio['roster'])} companies ({name_collisions(portfolio['roster'])} sharing a name stem), "
+        f"{len(portfolio['notion_pages'])} Notion pages over {max(1, args.months) - 1} months, "
+        f"{len(portfolio['typeform_payloads'])} submissions this month → {args.out}/"
+    )
+
+
+if __name__ == "__main__":
+    main()